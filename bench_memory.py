@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Measure how many bytes each node object costs.
+
+Compares the slotted node classes in src/ with dict-backed equivalents that
+store their attributes the way the classes did before __slots__ was added.
+Only the node objects themselves are counted: the strings they point at are
+created up front and shared by both variants.
+
+Usage: python3 bench_memory.py [--count N]
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from textnode import TextNode, TextType
+from htmlnode import HTMLNode
+from leafnode import LeafNode
+from parentnode import ParentNode
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictLeafNode(DictHTMLNode):
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag, value, None, props)
+
+
+class DictParentNode(DictHTMLNode):
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag, None, children, props)
+
+
+CHILDREN = []  # Shared so list allocations don't count towards parent nodes
+
+CASES = [
+    ("TextNode", lambda: TextNode("text", TextType.BOLD), lambda: DictTextNode("text", TextType.BOLD)),
+    ("HTMLNode", lambda: HTMLNode("p", "text"), lambda: DictHTMLNode("p", "text")),
+    ("LeafNode", lambda: LeafNode("b", "text"), lambda: DictLeafNode("b", "text")),
+    ("ParentNode", lambda: ParentNode("div", CHILDREN), lambda: DictParentNode("div", CHILDREN)),
+]
+
+
+def bytes_per_object(factory, count):
+    """Return the average number of bytes allocated per object made by factory."""
+    objects = [None] * count  # Preallocate so the list itself isn't measured
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(count):
+        objects[i] = factory()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / count
+
+
+def run(count):
+    results = {}
+    for name, slotted, dict_backed in CASES:
+        results[name] = (bytes_per_object(dict_backed, count), bytes_per_object(slotted, count))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--count", type=int, default=100_000, help="objects to allocate per case")
+    args = parser.parse_args()
+
+    print(f"{'class':<12}{'before (dict)':>16}{'after (slots)':>16}{'saved':>10}")
+    for name, (before, after) in run(args.count).items():
+        print(f"{name:<12}{before:>14.1f} B{after:>14.1f} B{1 - after / before:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
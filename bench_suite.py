@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmarks for the parser, renderer and asset copying.
+
+Runs each stage over synthetic corpora built from a fixed seed, so every run
+measures the same input, and reports the best of several repeats as MB/s
+(plus pages/s or files/s where that means more). Results can be saved as a
+baseline JSON file and later runs compared against it: any benchmark that
+drops more than --threshold below its baseline is reported as a regression
+and makes the script exit non-zero.
+
+Corpora:
+    paragraphs   long paragraphs of mixed inline markup
+    lists        long lists with nested inline markup in every item
+                 (the parser has no nested lists, so depth becomes length)
+    links        text dominated by links and images
+    code         a few huge fenced code blocks
+    small_files  thousands of tiny pages / static files
+
+Usage:
+    python3 bench_suite.py [--quick] [--only NAME] [--repeat N]
+    python3 bench_suite.py --save-baseline
+    python3 bench_suite.py --baseline bench_baseline.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from markdown import DEFAULT_INLINE_CACHE_SIZE, markdown_to_blocks, markdown_to_html_node, set_inline_cache_size
+from textnode import text_to_textnodes
+from make_public import distribute
+from build import build_site
+
+BASELINE_PATH = "bench_baseline.json"
+DEFAULT_THRESHOLD = 0.15
+DEFAULT_REPEAT = 5
+SEED = 1234
+
+WORDS = ("static", "site", "generator", "markdown", "parse", "render", "node", "tree",
+         "block", "inline", "fast", "page", "copy", "html", "text", "list")
+
+MB = 1024 * 1024
+
+
+def _sentence(rng, words=12):
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < 0.08:
+            word = f"**{word}**"
+        elif roll < 0.14:
+            word = f"_{word}_"
+        elif roll < 0.18:
+            word = f"`{word}`"
+        parts.append(word)
+    return " ".join(parts) + "."
+
+
+def _link(rng):
+    word = rng.choice(WORDS)
+    if rng.random() < 0.3:
+        return f"![{word}](/img/{word}.png)"
+    return f"[{word}](https://example.com/{word}?q={rng.randrange(1000)})"
+
+
+def gen_paragraphs(rng, scale):
+    """Long paragraphs of mixed bold, italic and code spans."""
+    return "\n\n".join(
+        " ".join(_sentence(rng) for _ in range(40)) for _ in range(20 * scale)
+    )
+
+
+def gen_lists(rng, scale):
+    """Long unordered and ordered lists with markup in every item."""
+    blocks = []
+    for n in range(4 * scale):
+        items = range(1, 301)
+        if n % 2:
+            blocks.append("\n".join(f"{i}. {_sentence(rng, 6)} {_link(rng)}" for i in items))
+        else:
+            blocks.append("\n".join(f"- {_sentence(rng, 6)} **_{rng.choice(WORDS)}_**" for _ in items))
+    return "\n\n".join(blocks)
+
+
+def gen_links(rng, scale):
+    """Paragraphs that are mostly links and images."""
+    return "\n\n".join(
+        " ".join(_link(rng) if i % 2 else rng.choice(WORDS) for i in range(200))
+        for _ in range(20 * scale)
+    )
+
+
+def gen_code(rng, scale):
+    """A few very large fenced code blocks."""
+    blocks = []
+    for _ in range(2 * scale):
+        lines = (f"    {rng.choice(WORDS)} = {rng.randrange(10 ** 6)}  # {rng.choice(WORDS)}" for _ in range(5000))
+        blocks.append("```\n" + "\n".join(lines) + "\n```")
+    return "\n\n".join(blocks)
+
+
+def gen_small_pages(rng, scale):
+    """Many tiny markdown pages, as (relative path, text) pairs."""
+    return [
+        (os.path.join(f"section{i % 20}", f"page{i}.md"), f"# Page {i}\n\n{_sentence(rng)}\n\n- {_link(rng)}")
+        for i in range(1000 * scale)
+    ]
+
+
+CORPORA = {
+    "paragraphs": gen_paragraphs,
+    "lists": gen_lists,
+    "links": gen_links,
+    "code": gen_code,
+}
+
+
+def best_time(func, repeat):
+    """Return the fastest of repeat timed calls to func."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_markdown(name, markdown, repeat):
+    size = len(markdown.encode("utf-8")) / MB
+    seconds = best_time(lambda: markdown_to_html_node(markdown), repeat)
+    return {f"markdown_to_html_node/{name}": {"MB/s": size / seconds}}
+
+
+def bench_inline(name, markdown, repeat):
+    blocks = [block for block in markdown_to_blocks(markdown) if not block.startswith("```")]
+    if not blocks:
+        return {}
+    size = sum(len(block.encode("utf-8")) for block in blocks) / MB
+    seconds = best_time(lambda: [text_to_textnodes(block) for block in blocks], repeat)
+    return {f"text_to_textnodes/{name}": {"MB/s": size / seconds}}
+
+
+def bench_to_html(name, markdown, repeat):
+    node = markdown_to_html_node(markdown)
+    size = len(node.to_html().encode("utf-8")) / MB
+    seconds = best_time(node.to_html, repeat)
+    return {f"to_html/{name}": {"MB/s": size / seconds}}
+
+
+def bench_build(content, pages, tmp, repeat):
+    size = sum(len(text.encode("utf-8")) for _, text in pages) / MB
+    dest = os.path.join(tmp, "public")
+    seconds = best_time(lambda: build_site(content, dest, workers=1), repeat)
+    return {"build_site/small_files": {"pages/s": len(pages) / seconds, "MB/s": size / seconds}}
+
+
+def bench_distribute(content, pages, tmp, repeat):
+    # The markdown sources double as a tree of small static files
+    size = sum(len(text.encode("utf-8")) for _, text in pages) / MB
+    dest = os.path.join(tmp, "static")
+    seconds = best_time(lambda: distribute(content, dest), repeat)
+    return {"distribute/small_files": {"files/s": len(pages) / seconds, "MB/s": size / seconds}}
+
+
+def _write_pages(pages, content):
+    for rel_path, text in pages:
+        path = os.path.join(content, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+
+CORPUS_BENCHES = (
+    ("markdown_to_html_node", bench_markdown),
+    ("text_to_textnodes", bench_inline),
+    ("to_html", bench_to_html),
+)
+FILE_BENCHES = (
+    ("build_site", bench_build),
+    ("distribute", bench_distribute),
+)
+
+
+def run(scale, repeat, only=None):
+    """Run every benchmark whose name contains only and return name -> metrics."""
+    rng = random.Random(SEED)
+    corpora = {name: generate(rng, scale) for name, generate in CORPORA.items()}
+    # Repeats parse the same text, which the inline memo would answer from
+    # memory after the first run; measure the parser itself instead
+    set_inline_cache_size(0)
+    pages = gen_small_pages(rng, scale)
+
+    results = {}
+    for name, markdown in corpora.items():
+        for label, bench in CORPUS_BENCHES:
+            if only is None or only in f"{label}/{name}":
+                results.update(bench(name, markdown, repeat))
+
+    file_benches = [bench for label, bench in FILE_BENCHES if only is None or only in f"{label}/small_files"]
+    if file_benches:
+        tmp = tempfile.mkdtemp(prefix="ssg-bench-")
+        try:
+            content = os.path.join(tmp, "content")
+            _write_pages(pages, content)
+            for bench in file_benches:
+                results.update(bench(content, pages, tmp, repeat))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    set_inline_cache_size(DEFAULT_INLINE_CACHE_SIZE)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (benchmark, metric, baseline, current) for every regression beyond threshold."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            expected = baseline.get(name, {}).get(metric)
+            if expected and value < expected * (1 - threshold):
+                regressions.append((name, metric, expected, value))
+    return regressions
+
+
+def environment():
+    return {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quick", action="store_true", help="smaller corpora and fewer repeats, for a smoke run")
+    parser.add_argument("--repeat", type=int, default=None, help=f"timed runs per benchmark (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--only", help="only run benchmarks whose name contains this")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help=f"baseline JSON file (default: {BASELINE_PATH})")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"allowed slowdown before failing, as a fraction (default: {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    scale = 1 if args.quick else 5
+    repeat = args.repeat or (2 if args.quick else DEFAULT_REPEAT)
+    results = run(scale, repeat, args.only)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline = stored.get("results", {})
+        if stored.get("environment") != environment() or stored.get("scale") != scale:
+            print(f"Note: {args.baseline} was recorded with a different setup, comparisons are rough")
+
+    print(f"{'benchmark':<36}{'metric':>10}{'current':>12}{'baseline':>12}{'change':>9}")
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            expected = baseline.get(name, {}).get(metric)
+            if expected:
+                print(f"{name:<36}{metric:>10}{value:>12.1f}{expected:>12.1f}{value / expected - 1:>+9.0%}")
+            else:
+                print(f"{name:<36}{metric:>10}{value:>12.1f}{'-':>12}{'':>9}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment(), "scale": scale, "results": results}, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, metric, expected, value in regressions:
+        print(f"REGRESSION {name} {metric}: {value:.1f} vs baseline {expected:.1f}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
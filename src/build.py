@@ -0,0 +1,325 @@
+"""
+Site build pipeline.
+
+Walks a content directory of markdown files, renders each one to HTML with
+markdown_to_html_node and writes the result to the matching path under the
+destination directory (content/blog/post.md -> public/blog/post.html).
+Rendering fans out over a process pool so large sites use every core, and
+an optional RenderCache lets unchanged pages skip rendering altogether.
+Given a template, each page is wrapped in it after rendering, so the cache
+holds bare page HTML and editing the template never forces a re-render.
+Front matter is stripped before rendering; its title wins over the page's
+first heading, and pages marked draft are left out of the build. Passing a
+LinkGraph collects every page's links as they are parsed.
+Passing a Profile times every page and gathers stage timings from the workers.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import log
+import profiling
+from frontmatter import read_front_matter, split_front_matter
+from links import LinkGraph
+from log import count, fields, logger, trace
+from make_public import scan_tree
+from markdown import BlockCache, inline_cache_info, markdown_to_html_node
+from metadata import MetadataIndex
+from profiling import Profile
+from render_cache import RenderCache, pack_entry, unpack_entry
+from template import load_template, page_title, page_values
+
+MARKDOWN_EXTENSION = ".md"
+HTML_EXTENSION = ".html"
+
+# Below this many pages the cost of starting worker processes outweighs the win
+MIN_PAGES_PER_WORKER = 8
+
+
+def build_site(
+    content_dir: str,
+    dest_dir: str,
+    workers: Optional[int] = None,
+    cache: Optional[RenderCache] = None,
+    profile: Optional[Profile] = None,
+    template: Optional[str] = None,
+    index: Optional[MetadataIndex] = None,
+    links: Optional[LinkGraph] = None
+) -> Dict[str, float]:
+    """
+    Render every markdown file under content_dir into dest_dir.
+
+    Args:
+        content_dir: Directory holding the markdown sources (e.g. "content")
+        dest_dir: Directory the HTML pages are written to (e.g. "public")
+        workers: Number of rendering processes, defaults to the CPU count
+        cache: Render cache to serve unchanged pages from, if any
+        profile: Profile to record page and stage timings in, if any
+        template: Path of the template every page is wrapped in, if any
+        index: Metadata index to read front matter through and keep up to
+            date; without one every page's header is read
+        links: Link graph to record every page's links and images in, if any
+
+    Returns:
+        Counts of pages rendered, cache hits and bytes written, plus elapsed seconds
+    """
+    if not os.path.isdir(content_dir):
+        logger.warning("Content directory doesn't exist: %s", content_dir)
+        return {"pages": 0, "cached": 0, "bytes": 0, "seconds": 0.0}
+
+    start = time.perf_counter()
+    jobs = find_pages(content_dir, dest_dir)
+    jobs = _skip_drafts(jobs, index if index is not None else MetadataIndex(content_dir, path=None))
+
+    # Create output directories up front so workers only ever write files
+    for out_dir in {os.path.dirname(dest_path) for _, dest_path in jobs}:
+        os.makedirs(out_dir, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, max(1, len(jobs) // MIN_PAGES_PER_WORKER))
+    render = partial(
+        _render_job, cache=cache, profiled=profile is not None, template=template, collect_links=links is not None
+    )
+    if workers <= 1:
+        results = [render(job) for job in jobs]
+    else:
+        # Hand out pages in chunks so per-task IPC doesn't dominate tiny pages
+        chunksize = max(1, len(jobs) // (workers * 4))
+        # Forked workers inherit the log buffer, so empty it before they start
+        log.flush()
+        initializer = partial(_init_worker, profile is not None)
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as pool:
+            results = list(pool.map(render, jobs, chunksize=chunksize))
+
+    total_bytes = 0
+    cached = 0
+    for (source_path, dest_path), (size, hit, counters, timing, page_links) in zip(jobs, results):
+        total_bytes += size
+        cached += hit
+        log.merge_counters(counters)
+        if timing is not None:
+            profile.add_page(source_path, timing[0])
+            profile.merge(timing[1])
+        if page_links is not None:
+            links.add(os.path.relpath(dest_path, dest_dir).replace(os.sep, "/"), page_links)
+        trace("Rendered %s -> %s", source_path, dest_path, extra=fields(bytes=size, cached=hit))
+
+    if cache is not None:
+        evicted = cache.evict()
+        logger.debug("Evicted %d render cache entries", evicted)
+    inline_hits = log.counters["inline_cache_hits"]
+    inline_lookups = inline_hits + log.counters["inline_cache_misses"]
+    if inline_lookups:
+        logger.debug("Inline cache hit rate %.1f%%", 100 * inline_hits / inline_lookups, extra=fields(lookups=inline_lookups))
+
+    seconds = time.perf_counter() - start
+    count("pages_rendered", len(jobs) - cached)
+    count("pages_cached", cached)
+    count("bytes_written", total_bytes)
+    logger.info(
+        "Rendered %d pages (%d from cache, %.1f MB) in %.2fs",
+        len(jobs), cached, total_bytes / (1024 * 1024), seconds,
+        extra=fields(pages_per_s=round(len(jobs) / max(seconds, 1e-9))),
+    )
+    return {"pages": len(jobs), "cached": cached, "bytes": total_bytes, "seconds": seconds}
+
+
+def find_pages(content_dir: str, dest_dir: str) -> List[Tuple[str, str]]:
+    """Return (markdown source, html destination) pairs for every page under content_dir."""
+    jobs = []
+    for root, _, file_names in os.walk(content_dir):
+        rel_root = os.path.relpath(root, content_dir)
+        for name in file_names:
+            stem, extension = os.path.splitext(name)
+            if extension != MARKDOWN_EXTENSION:
+                continue
+            dest_path = os.path.normpath(os.path.join(dest_dir, rel_root, stem + HTML_EXTENSION))
+            jobs.append((os.path.join(root, name), dest_path))
+    jobs.sort()
+    return jobs
+
+
+def remove_stale_pages(content_dir: str, dest_dir: str, static_dir: Optional[str] = None) -> int:
+    """
+    Delete pages under dest_dir whose markdown source no longer exists.
+
+    A build only writes the pages it finds, so one that starts from an
+    earlier build's output (a seeded staging directory, or dest itself) keeps
+    the pages of deleted sources until they are removed here. HTML files that
+    are static assets (present under static_dir) are left alone, as are
+    drafts, whose pages build_site already removed.
+
+    Returns:
+        Number of pages removed
+    """
+    if not os.path.isdir(content_dir):
+        return 0
+    pages = {dest_path for _, dest_path in find_pages(content_dir, dest_dir)}
+    _, files = scan_tree(dest_dir)
+    removed = 0
+    for rel in files:
+        if not rel.endswith(HTML_EXTENSION):
+            continue
+        path = os.path.normpath(os.path.join(dest_dir, rel))
+        if path in pages or static_dir is not None and os.path.lexists(os.path.join(static_dir, rel)):
+            continue
+        os.remove(path)
+        removed += 1
+        trace("Removed stale page %s", path)
+        # Drop directories the page leaves empty, up to dest_dir itself
+        parent = os.path.dirname(path)
+        while os.path.normpath(parent) != os.path.normpath(dest_dir):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                break
+            parent = os.path.dirname(parent)
+    count("pages_removed", removed)
+    if removed:
+        logger.info("Removed %d stale pages", removed)
+    return removed
+
+
+def render_page(
+    job: Tuple[str, str],
+    cache: Optional[RenderCache] = None,
+    template: Optional[str] = None,
+    links: Optional[List[Tuple[str, str]]] = None,
+    block_cache: Optional[BlockCache] = None
+) -> Tuple[int, bool]:
+    """
+    Render one markdown file to HTML and write it out.
+
+    The page is written to a temporary file and renamed into place, so readers
+    of dest never see a half-written page.
+
+    Args:
+        job: (markdown source path, html destination path)
+        cache: Render cache to look the page up in and store it to
+        template: Path of the template to wrap the page in, if any
+        links: List to append the page's (tag, url) links and images to, if any
+        block_cache: Block cache to reuse unchanged blocks of the page from, if any
+
+    Returns:
+        Number of bytes written and whether the page came from the cache
+    """
+    source_path, dest_path = job
+    if cache is None:
+        # Nothing to hash, so stream blocks off the source and HTML into the page
+        tmp_path = _tmp_path(dest_path)
+        try:
+            with open(source_path, "r", encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as out:
+                metadata, lines = read_front_matter(src)
+                node = markdown_to_html_node(lines, links, block_cache)
+                if template is None:
+                    node.write_html(out)
+                else:
+                    load_template(template).write(out, page_values(page_title(metadata, node), node))
+        except BaseException:
+            # Don't leave a partial page behind next to the last good one
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, dest_path)
+        count("blocks_parsed", len(node.children))
+        return os.path.getsize(dest_path), False
+
+    with open(source_path, "rb") as f:
+        source = f.read()
+
+    key = cache.key(source)
+    entry = cache.get(key)
+    hit = entry is not None
+    if hit:
+        meta, data = unpack_entry(entry)
+    else:
+        metadata, body = split_front_matter(_decode(source))
+        found: List[Tuple[str, str]] = []
+        node = markdown_to_html_node(body, found, block_cache)
+        count("blocks_parsed", len(node.children))
+        meta = {"title": page_title(metadata, node), "links": found}
+        data = node.to_html().encode("utf-8")
+        cache.put(key, pack_entry(meta, data))
+    if links is not None:
+        links.extend((tag, url) for tag, url in meta["links"])
+
+    if template is not None:
+        page = load_template(template).render(page_values(meta["title"], data.decode("utf-8")))
+        data = page.encode("utf-8")
+    _write_atomic(dest_path, data)
+    return len(data), hit
+
+
+def _skip_drafts(jobs: List[Tuple[str, str]], index: MetadataIndex) -> List[Tuple[str, str]]:
+    """Return the jobs whose page isn't a draft, removing drafts' pages from a previous build."""
+    index.retain(source_path for source_path, _ in jobs)
+    published = []
+    for source_path, dest_path in jobs:
+        if not index.get(source_path).get("draft"):
+            published.append((source_path, dest_path))
+            continue
+        count("pages_draft")
+        trace("Skipped draft %s", source_path)
+        try:
+            os.remove(dest_path)
+        except FileNotFoundError:
+            pass
+    index.save()
+    return published
+
+
+def _init_worker(profiled: bool) -> None:
+    """Drop counters and timings inherited from the parent, which reports its own."""
+    log.drain_counters()
+    profiling.init_worker(profiled)
+
+
+def _render_job(
+    job: Tuple[str, str],
+    cache: Optional[RenderCache] = None,
+    profiled: bool = False,
+    template: Optional[str] = None,
+    collect_links: bool = False
+) -> Tuple[
+    int, bool, Dict[str, int], Optional[Tuple[float, Dict[str, List[float]]]], Optional[List[Tuple[str, str]]]
+]:
+    """
+    Render a page on behalf of build_site, possibly in a worker process.
+
+    Returns:
+        render_page's bytes and cache hit, the log counters the page bumped,
+        when profiled, how long it took with the stage timings it produced,
+        and when collecting links, the page's links
+    """
+    start = time.perf_counter()
+    page_links = [] if collect_links else None
+    hits, misses = inline_cache_info()[:2]
+    size, hit = render_page(job, cache, template, page_links)
+    inline = inline_cache_info()
+    count("inline_cache_hits", inline.hits - hits)
+    count("inline_cache_misses", inline.misses - misses)
+    timing = None
+    if profiled:
+        timing = (time.perf_counter() - start, profiling.drain())
+    return size, hit, log.drain_counters(), timing, page_links
+
+
+def _decode(source: bytes) -> str:
+    """Decode markdown bytes the way a text-mode open() would, newlines included."""
+    return source.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _tmp_path(path: str) -> str:
+    """Return a per-process temporary name next to path."""
+    return f"{path}.{os.getpid()}.tmp"
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Write data to path via a temporary file and a rename."""
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
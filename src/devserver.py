@@ -0,0 +1,402 @@
+"""
+Development server.
+
+Serves the site straight from its sources without building it: markdown
+pages are rendered on request with markdown_to_html_node and kept in an
+in-memory LRU, and static files are streamed with sendfile. A watcher
+(see watch.py) runs next to the server and tells every open page to reload
+over server-sent events when a source changes.
+
+URLs map onto content like the build does: /blog/post, /blog/post.html
+and /blog/post.md all serve content/blog/post.md, and a directory serves
+its index.md. Anything else is looked up under static.
+
+Given a template, pages are wrapped in it like the build does, and editing
+the template reloads every open page.
+"""
+
+import asyncio
+import html
+import mimetypes
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Optional, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+from build import HTML_EXTENSION, MARKDOWN_EXTENSION
+from frontmatter import read_front_matter
+from log import NOTICE, count, fields, flush, logger, trace
+from markdown import BlockCache, markdown_to_html_node
+from template import load_template, page_title, page_values, template_version
+from watch import DEFAULT_DEBOUNCE, STOP_CHECK_INTERVAL, collect_changes, open_watcher
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_CACHE_ENTRIES = 1024
+
+LIVE_RELOAD_PATH = "/__livereload"
+INDEX_NAME = "index"
+# Sent to idle live reload connections so proxies and browsers keep them open
+HEARTBEAT_SECONDS = 15
+MAX_HEADER_BYTES = 64 * 1024
+
+LIVE_RELOAD_SCRIPT = (
+    "<script>new EventSource(\"" + LIVE_RELOAD_PATH + "\")"
+    ".addEventListener(\"reload\", () => location.reload());</script>"
+)
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class PageCache:
+    """
+    LRU of rendered pages keyed by source path.
+
+    Entries remember the version (mtime and size) of the source and
+    template they were rendered from, so a page edited behind the watcher's
+    back is still re-rendered on its next request. Pages are
+    rendered on executor threads, so every operation takes a lock.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, ...], bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str, version: Tuple[int, ...]) -> Optional[bytes]:
+        """Return the page rendered from path at version, or None."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, path: str, version: Tuple[int, ...], html: bytes) -> None:
+        """Store a rendered page, evicting the least recently used beyond max_entries."""
+        with self._lock:
+            self._entries[path] = (version, html)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, path: str) -> None:
+        """Forget the page rendered from path, if any."""
+        with self._lock:
+            self._entries.pop(path, None)
+
+
+class DevServer:
+    """
+    asyncio HTTP/1.1 server for previewing a site while editing it.
+
+    Attributes:
+        content_dir: Markdown source directory
+        static_dir: Static asset directory
+        host: Interface to listen on
+        port: Port to listen on; after start() the port actually bound
+        live_reload: Whether pages reload themselves when sources change
+        template: Path of the template pages are wrapped in, if any
+        pages: Rendered page cache
+        blocks: Converted blocks reused when an edited page is rendered again
+    """
+
+    def __init__(
+        self,
+        content_dir: str,
+        static_dir: str,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        cache_entries: int = DEFAULT_CACHE_ENTRIES,
+        live_reload: bool = True,
+        poll_interval: Optional[float] = None,
+        template: Optional[str] = None
+    ) -> None:
+        self.content_dir = os.path.abspath(content_dir)
+        self.static_dir = os.path.abspath(static_dir)
+        self.host = host
+        self.port = port
+        self.live_reload = live_reload
+        self.poll_interval = poll_interval
+        self.template = template
+        self.pages = PageCache(cache_entries)
+        self.blocks = BlockCache()
+        self._clients: Set[asyncio.Queue] = set()
+        self._server: Optional[asyncio.Server] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop = threading.Event()
+        self._watcher_thread: Optional[threading.Thread] = None
+
+    async def start(self) -> None:
+        """Bind the socket and start watching the sources."""
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.live_reload:
+            self._watcher_thread = threading.Thread(target=self._watch, name="devserver-watch", daemon=True)
+            self._watcher_thread.start()
+        logger.log(NOTICE, "Serving %s and %s on http://%s:%d/", self.content_dir, self.static_dir, self.host, self.port)
+        flush()
+
+    async def serve_forever(self) -> None:
+        """Start the server and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """Stop serving, end live reload streams and stop the watcher."""
+        self._stop.set()
+        for queue in list(self._clients):
+            queue.put_nowait(None)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._watcher_thread is not None:
+            await asyncio.to_thread(self._watcher_thread.join)
+
+    def notify(self, changed: Set[str]) -> None:
+        """Drop cached pages for the changed paths and tell every open page to reload."""
+        # Edited pages would be re-rendered anyway; this frees deleted ones
+        for path in changed:
+            self.pages.discard(path)
+        for queue in self._clients:
+            queue.put_nowait(sorted(changed))
+        count("reloads")
+        logger.info("Sources changed, reloading %d pages", len(self._clients), extra=fields(changed=len(changed)))
+        flush()
+
+    def resolve(self, url_path: str) -> Tuple[Optional[str], bool]:
+        """
+        Map a URL path to a file.
+
+        Returns:
+            (file path or None, whether it's a markdown page)
+        """
+        rel = os.path.normpath(unquote(url_path).lstrip("/"))
+        if rel == "." or url_path.endswith("/"):
+            rel = os.path.normpath(os.path.join(rel, INDEX_NAME))
+        if rel == ".." or rel.startswith(".." + os.sep) or os.path.isabs(rel):
+            return None, False
+
+        stem, extension = os.path.splitext(rel)
+        if extension in (HTML_EXTENSION, MARKDOWN_EXTENSION):
+            candidates = [stem]
+        else:
+            candidates = [rel, os.path.join(rel, INDEX_NAME)]
+        for candidate in candidates:
+            source = os.path.join(self.content_dir, candidate + MARKDOWN_EXTENSION)
+            if os.path.isfile(source):
+                return source, True
+
+        static = os.path.join(self.static_dir, rel)
+        if os.path.isfile(static):
+            return static, False
+        return None, False
+
+    def render(self, source: str) -> bytes:
+        """Return the HTML for a markdown page, from the cache when it's unchanged."""
+        st = os.stat(source)
+        # A template that is missing (say, mid-save) leaves pages bare rather than failing them
+        layout = template_version(self.template)
+        version = (st.st_mtime_ns, st.st_size) + (layout or ())
+        html = self.pages.get(source, version)
+        if html is not None:
+            return html
+        with open(source, "r", encoding="utf-8") as f:
+            metadata, lines = read_front_matter(f)
+            node = markdown_to_html_node(lines, block_cache=self.blocks)
+        text = node.to_html()
+        if layout is not None:
+            text = load_template(self.template).render(page_values(page_title(metadata, node), text))
+        if self.live_reload:
+            text = _inject_live_reload(text)
+        html = text.encode("utf-8")
+        self.pages.put(source, version, html)
+        count("pages_rendered")
+        return html
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if method not in ("GET", "HEAD"):
+                    await _respond(writer, 405, b"Method not allowed\n", keep_alive=keep_alive)
+                elif urlsplit(target).path == LIVE_RELOAD_PATH:
+                    await self._stream_reloads(writer)
+                    break
+                else:
+                    await self._serve(writer, urlsplit(target).path, method == "HEAD", keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:
+            try:
+                await _respond(writer, 400, b"Bad request\n", keep_alive=False)
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _serve(self, writer: asyncio.StreamWriter, url_path: str, head: bool, keep_alive: bool) -> None:
+        start = time.perf_counter()
+        path, is_page = self.resolve(url_path)
+        if path is None:
+            await _respond(writer, 404, b"Not found\n", keep_alive=keep_alive)
+            trace("404 %s", url_path)
+            return
+        try:
+            if is_page:
+                page = await asyncio.get_running_loop().run_in_executor(None, self.render, path)
+            else:
+                f = open(path, "rb")
+        except (ValueError, OSError) as error:
+            # Invalid markdown mid-edit, or a file deleted since resolve(): show
+            # what went wrong on a page that reloads once the source is fixed
+            logger.error("Can't serve %s: %s", url_path, error)
+            count("pages_failed" if is_page else "files_failed")
+            await _respond(writer, 500, self._error_page(path, error), "text/html; charset=utf-8", keep_alive, head)
+            return
+        if is_page:
+            await _respond(writer, 200, page, "text/html; charset=utf-8", keep_alive, head)
+        else:
+            with f:
+                await self._send_file(writer, f, path, head, keep_alive)
+        trace("200 %s", url_path, extra=fields(ms=round((time.perf_counter() - start) * 1000, 2)))
+
+    def _error_page(self, path: str, error: Exception) -> bytes:
+        text = (
+            f"<!doctype html><html><head><title>Error</title></head><body>"
+            f"<h1>Can't serve {html.escape(os.path.relpath(path))}</h1><pre>{html.escape(str(error))}</pre></body></html>"
+        )
+        if self.live_reload:
+            text = _inject_live_reload(text)
+        return text.encode("utf-8")
+
+    async def _send_file(self, writer: asyncio.StreamWriter, f: BinaryIO, path: str, head: bool, keep_alive: bool) -> None:
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        size = os.fstat(f.fileno()).st_size
+        writer.write(_headers(200, size, content_type, keep_alive))
+        await writer.drain()
+        if not head and size:
+            # Hands the file to os.sendfile where the transport supports it
+            await asyncio.get_running_loop().sendfile(writer.transport, f, 0, size)
+        count("files_served")
+
+    async def _stream_reloads(self, writer: asyncio.StreamWriter) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n"
+            b": connected\n\n"
+        )
+        await writer.drain()
+        queue: asyncio.Queue = asyncio.Queue()
+        self._clients.add(queue)
+        try:
+            while True:
+                try:
+                    changed = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    writer.write(b": heartbeat\n\n")
+                else:
+                    if changed is None:
+                        break
+                    data = "\ndata: ".join(changed)
+                    writer.write(f"event: reload\ndata: {data}\n\n".encode("utf-8"))
+                await writer.drain()
+        finally:
+            self._clients.discard(queue)
+
+    def _watch(self) -> None:
+        with open_watcher([self.content_dir, self.static_dir], self.poll_interval) as watcher:
+            layout = template_version(self.template)
+            while not self._stop.is_set():
+                changed = collect_changes(watcher, STOP_CHECK_INTERVAL, DEFAULT_DEBOUNCE)
+                version = template_version(self.template)
+                if version != layout:
+                    layout = version
+                    changed.add(os.path.abspath(self.template))
+                if changed and not self._stop.is_set():
+                    self._loop.call_soon_threadsafe(self.notify, changed)
+
+
+def serve(content_dir: str, static_dir: str, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, **options) -> None:
+    """Run a DevServer until interrupted. Extra options are passed to DevServer."""
+    server = DevServer(content_dir, static_dir, host, port, **options)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str]]]:
+    """Read one request head, returning None when the client has gone away."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as error:
+        if error.partial.strip():
+            raise ValueError("Truncated request") from error
+        return None
+    except asyncio.LimitOverrunError as error:
+        raise ValueError("Request head too large") from error
+    if len(head) > MAX_HEADER_BYTES:
+        raise ValueError("Request head too large")
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ")
+    if len(parts) != 3:
+        raise ValueError(f"Malformed request line: {lines[0]!r}")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    return parts[0], parts[1], headers
+
+
+def _headers(status: int, length: int, content_type: str, keep_alive: bool) -> bytes:
+    return (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {length}\r\n"
+        "Cache-Control: no-store\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    ).encode("latin-1")
+
+
+async def _respond(
+    writer: asyncio.StreamWriter,
+    status: int,
+    body: bytes,
+    content_type: str = "text/plain; charset=utf-8",
+    keep_alive: bool = True,
+    head: bool = False
+) -> None:
+    writer.write(_headers(status, len(body), content_type, keep_alive))
+    if not head:
+        writer.write(body)
+    await writer.drain()
+
+
+def _inject_live_reload(html: str) -> str:
+    """Add the live reload script before </body>, or at the end of a fragment."""
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + LIVE_RELOAD_SCRIPT
+    return html[:index] + LIVE_RELOAD_SCRIPT + html[index:]
@@ -0,0 +1,185 @@
+"""
+Flat, array-backed document representation.
+
+An alternative to HTMLNode trees for big builds. A FlatDocument keeps its
+nodes in parallel integer arrays in document order, and all leaf text lives
+in one shared string buffer. Building one allocates a handful of arrays and a
+list of text chunks instead of an object (plus children list and props dict)
+per node. Rendering is a single loop over the arrays with a small stack of
+open elements.
+
+Per node i:
+    tags[i]        index into tag_names, or -1 for raw text
+    parents[i]     index of the parent node, or -1 for the root
+    text_starts[i] offset of the node's text in the buffer, or -1 for elements
+    text_ends[i]   end offset of the node's text in the buffer
+    props[i]       index into props_table, or -1 for no attributes
+"""
+
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from htmlnode import HTMLNode, render_props
+
+NO_INDEX = -1
+
+
+class FlatDocument:
+    """
+    A rendered page stored as parallel arrays over one shared text buffer.
+
+    Nodes must be added in document order (a parent before its children, and
+    siblings left to right), which is how markdown is parsed anyway.
+
+    Examples:
+        doc = FlatDocument()
+        div = doc.add_element("div")
+        doc.add_leaf("b", "bold", div)
+        doc.to_html() -> "<div><b>bold</b></div>"
+    """
+
+    __slots__ = (
+        "tags", "parents", "text_starts", "text_ends", "props",
+        "tag_names", "props_table", "_tag_ids", "_props_ids",
+        "_chunks", "_length", "_buffer",
+    )
+
+    def __init__(self) -> None:
+        self.tags = array("i")
+        self.parents = array("i")
+        self.text_starts = array("i")
+        self.text_ends = array("i")
+        self.props = array("i")
+        self.tag_names: List[str] = []
+        self.props_table: List[Dict[str, str]] = []
+        self._tag_ids: Dict[str, int] = {}
+        self._props_ids: Dict[Tuple[Tuple[str, str], ...], int] = {}
+        self._chunks: List[str] = []
+        self._length = 0
+        self._buffer: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    @property
+    def buffer(self) -> str:
+        """The shared text buffer all leaf text is stored in."""
+        if self._buffer is None or len(self._chunks) > 1:
+            self._buffer = "".join(self._chunks)
+            self._chunks = [self._buffer]
+        return self._buffer
+
+    def add_element(
+        self,
+        tag: str,
+        parent: int = NO_INDEX,
+        props: Optional[Dict[str, str]] = None
+    ) -> int:
+        """
+        Add an element that will contain later nodes.
+
+        Returns:
+            The new node's index, to pass as parent to its children
+        """
+        return self._add(self._tag_id(tag), parent, NO_INDEX, NO_INDEX, props)
+
+    def add_leaf(
+        self,
+        tag: Optional[str],
+        text: str,
+        parent: int = NO_INDEX,
+        props: Optional[Dict[str, str]] = None
+    ) -> int:
+        """
+        Add a node holding text: raw text when tag is None, <tag>text</tag> otherwise.
+
+        Returns:
+            The new node's index
+        """
+        start = self._length
+        self._chunks.append(text)
+        self._length += len(text)
+        tag_id = NO_INDEX if tag is None else self._tag_id(tag)
+        return self._add(tag_id, parent, start, self._length, props)
+
+    def to_html(self) -> str:
+        """Render the document to an HTML string."""
+        buffer = self.buffer
+        tag_names = self.tag_names
+        opening_plain = [f"<{tag}>" for tag in tag_names]
+        closing = [f"</{tag}>" for tag in tag_names]
+        props_html = [render_props(props) for props in self.props_table]
+        tags, parents, props = self.tags, self.parents, self.props
+        text_starts, text_ends = self.text_starts, self.text_ends
+
+        out = []
+        append = out.append
+        open_elements = []
+        for i in range(len(tags)):
+            parent = parents[i]
+            # Close every element this node is not inside of
+            while open_elements and open_elements[-1] != parent:
+                append(closing[tags[open_elements.pop()]])
+
+            tag_id = tags[i]
+            start = text_starts[i]
+            if tag_id == NO_INDEX:
+                append(buffer[start:text_ends[i]])
+                continue
+            props_id = props[i]
+            if props_id == NO_INDEX:
+                append(opening_plain[tag_id])
+            else:
+                append(f"<{tag_names[tag_id]}{props_html[props_id]}>")
+            if start == NO_INDEX:
+                open_elements.append(i)
+            else:
+                append(buffer[start:text_ends[i]])
+                append(closing[tag_id])
+
+        while open_elements:
+            append(closing[tags[open_elements.pop()]])
+        return "".join(out)
+
+    @classmethod
+    def from_node(cls, node: HTMLNode) -> "FlatDocument":
+        """Flatten an existing HTMLNode tree (without recursion)."""
+        doc = cls()
+        stack = [(node, NO_INDEX)]
+        while stack:
+            current, parent = stack.pop()
+            if current.children:
+                index = doc.add_element(current.tag, parent, current.props)
+                # Reversed so children come off the stack in document order
+                for child in reversed(current.children):
+                    stack.append((child, index))
+            else:
+                doc.add_leaf(current.tag, current.value or "", parent, current.props)
+        return doc
+
+    def _add(self, tag_id: int, parent: int, start: int, end: int, props: Optional[Dict[str, str]]) -> int:
+        index = len(self.tags)
+        self.tags.append(tag_id)
+        self.parents.append(parent)
+        self.text_starts.append(start)
+        self.text_ends.append(end)
+        self.props.append(self._props_id(props))
+        return index
+
+    def _tag_id(self, tag: str) -> int:
+        tag_id = self._tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = self._tag_ids[tag] = len(self.tag_names)
+            self.tag_names.append(tag)
+        return tag_id
+
+    def _props_id(self, props: Optional[Dict[str, str]]) -> int:
+        # Identical attribute sets (same href, same class) are stored once
+        if props is None:
+            return NO_INDEX
+        key = tuple(props.items())
+        props_id = self._props_ids.get(key)
+        if props_id is None:
+            props_id = self._props_ids[key] = len(self.props_table)
+            self.props_table.append(dict(props))
+        return props_id
@@ -0,0 +1,139 @@
+"""
+Front matter: page metadata at the top of a markdown file.
+
+A page may start with a block of key: value lines between two --- lines:
+
+    ---
+    title: Release notes
+    date: 2024-03-01
+    tags: [releases, changelog]
+    draft: false
+    ---
+    # Release notes
+    ...
+
+The block is removed before the markdown is split into blocks. Values in
+[brackets] (and tags, even written as a plain a, b list) become lists, true and
+false become booleans, quotes around a value are dropped and everything
+else stays a string. Keys are lowercased.
+
+Only the header is ever read to get at the metadata: read_front_matter()
+consumes lines up to the closing --- and hands back the rest unread, and
+read_page_metadata() stops there. A file whose first line isn't --- has no
+front matter, and neither does one whose block isn't closed within
+MAX_HEADER_LINES lines; either way the whole file is treated as markdown.
+"""
+
+from itertools import chain
+from typing import Any, Dict, Iterator, List, Tuple
+
+DELIMITER = "---"
+# A header that runs longer than this is taken to be markdown, not front matter
+MAX_HEADER_LINES = 64
+
+# Keys whose value is always a list
+LIST_KEYS = ("tags",)
+
+
+def read_front_matter(lines: Iterator[str]) -> Tuple[Dict[str, Any], Iterator[str]]:
+    """
+    Consume the front matter at the start of lines.
+
+    Args:
+        lines: Lines of a markdown file, e.g. an open text file
+
+    Returns:
+        The metadata (empty without front matter) and an iterator over the
+        remaining markdown lines
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, lines
+    if first.rstrip() != DELIMITER:
+        return {}, chain([first], lines)
+    header: List[str] = []
+    for line in lines:
+        if line.rstrip() == DELIMITER:
+            return parse_fields(header), lines
+        header.append(line)
+        if len(header) > MAX_HEADER_LINES:
+            break
+    return {}, chain([first], header, lines)
+
+
+def split_front_matter(text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Separate the front matter from a markdown string.
+
+    Returns:
+        The metadata (empty without front matter) and the markdown after it
+    """
+    if not text.startswith(DELIMITER):
+        return {}, text
+    end = text.find("\n")
+    if end == -1 or text[:end].rstrip() != DELIMITER:
+        return {}, text
+    header: List[str] = []
+    start = end + 1
+    while len(header) <= MAX_HEADER_LINES:
+        end = text.find("\n", start)
+        line = text[start:] if end == -1 else text[start:end]
+        if line.rstrip() == DELIMITER:
+            return parse_fields(header), "" if end == -1 else text[end + 1:]
+        if end == -1:
+            break
+        header.append(line)
+        start = end + 1
+    return {}, text
+
+
+def read_page_metadata(path: str) -> Dict[str, Any]:
+    """Return the front matter of the markdown file at path, reading no further than its header."""
+    with open(path, "r", encoding="utf-8") as f:
+        metadata, _ = read_front_matter(f)
+    return metadata
+
+
+def parse_fields(lines: List[str]) -> Dict[str, Any]:
+    """
+    Parse front matter lines into a metadata dict.
+
+    Blank lines, # comments and lines without a colon are ignored.
+
+    Examples:
+        parse_fields(["title: Hi", "tags: [a, b]", "draft: true"])
+            -> {"title": "Hi", "tags": ["a", "b"], "draft": True}
+    """
+    metadata: Dict[str, Any] = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        key, colon, value = line.partition(":")
+        if not colon:
+            continue
+        key = key.strip().lower()
+        value = _parse_value(value.strip())
+        if key in LIST_KEYS and not isinstance(value, list):
+            value = _split_list(str(value)) if value != "" else []
+        metadata[key] = value
+    return metadata
+
+
+def _parse_value(value: str) -> Any:
+    if value.startswith("[") and value.endswith("]"):
+        return _split_list(value[1:-1])
+    if value in ("true", "false"):
+        return value == "true"
+    return _unquote(value)
+
+
+def _split_list(value: str) -> List[str]:
+    return [_unquote(item.strip()) for item in value.split(",") if item.strip()]
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
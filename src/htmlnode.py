@@ -1,4 +1,16 @@
-from typing import Optional, List, Dict, Any
+import html
+from functools import lru_cache
+from itertools import chain
+from typing import Optional, List, Dict, Any, Iterator, TextIO, Tuple
+
+# How much output write_html gathers before handing it to the stream
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# Distinct attribute sets whose rendered form is kept around
+PROPS_CACHE_SIZE = 4096
+
+# Marks the end of a node's children in iter_html; None is a (broken) child, not the end
+_END = object()
 
 
 class HTMLNode:
@@ -16,6 +28,9 @@ class HTMLNode:
         props: Dictionary of HTML attributes (e.g., {'class': 'highlight', 'id': 'main'})
     """
     
+    # One instance per element and text run of every page; slots keep the tree compact
+    __slots__ = ("tag", "value", "children", "props")
+    
     def __init__(
         self, 
         tag: Optional[str] = None, 
@@ -35,6 +50,77 @@ class HTMLNode:
         Returns:
             HTML string representation of this node and its children
             
+        Raises:
+            ValueError: If the node has no tag specified
+        """
+        return "".join(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
+        """
+        Yield the HTML for this node and its descendants as a series of chunks.
+        
+        The tree is walked with an explicit stack instead of recursion, so
+        arbitrarily deep trees render without hitting Python's recursion limit,
+        and no intermediate string is built for any subtree.
+        
+        Yields:
+            Consecutive pieces of the HTML output
+            
+        Raises:
+            ValueError: If a node in the tree can't be rendered
+        """
+        opening, children, closing = self._html_parts()
+        yield opening
+        if not children:
+            if closing:
+                yield closing
+            return
+        
+        # Each entry is (iterator over remaining children, closing tag)
+        stack = [(iter(children), closing)]
+        while stack:
+            child = next(stack[-1][0], _END)
+            if child is _END:
+                yield stack.pop()[1]
+                continue
+            opening, children, closing = child._html_parts()
+            yield opening
+            if children:
+                stack.append((iter(children), closing))
+            elif closing:
+                yield closing
+
+    def write_html(self, stream: TextIO, buffer_size: int = WRITE_BUFFER_SIZE) -> None:
+        """
+        Write the HTML for this node to a text stream without building the whole page.
+        
+        Chunks are gathered into writes of roughly buffer_size characters, so
+        unbuffered targets (sockets, pipes) aren't hit with one call per tag.
+        
+        Args:
+            stream: Object with a write(str) method, e.g. an open text file
+            buffer_size: Approximate number of characters per write
+        """
+        pending = []
+        pending_size = 0
+        for chunk in self.iter_html():
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size >= buffer_size:
+                stream.write("".join(pending))
+                pending = []
+                pending_size = 0
+        if pending:
+            stream.write("".join(pending))
+
+    def _html_parts(self) -> Tuple[str, Optional[List['HTMLNode']], str]:
+        """
+        Describe how this node renders, without rendering its children.
+        
+        Returns:
+            (opening HTML, children to render next or None, closing HTML).
+            Nodes without children put their whole HTML in the opening part.
+            
         Raises:
             ValueError: If the node has no tag specified
         """
@@ -44,13 +130,10 @@ class HTMLNode:
         # Handle leaf nodes (no children)
         if self.children is None or self.children == []:
             content = self.value or ""
-            return f"<{self.tag}{self.props_to_html()}>{content}</{self.tag}>"
+            return f"<{self.tag}{self.props_to_html()}>{content}</{self.tag}>", None, ""
         
         # Handle parent nodes (with children)
-        child_html = ""
-        for child in self.children:
-            child_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{child_html}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>", self.children, f"</{self.tag}>"
     
     def props_to_html(self) -> str:
         """
@@ -60,13 +143,7 @@ class HTMLNode:
             String representation of HTML attributes (e.g., ' class="highlight" id="main"')
             Returns empty string if no props exist
         """
-        if self.props is None:
-            return ""
-            
-        attrs = []
-        for key, value in self.props.items():
-            attrs.append(f'{key}="{value}"')
-        return f" {' '.join(attrs)}"
+        return render_props(self.props)
     
     def __eq__(self, other: object) -> bool:
         """Check equality with another HTMLNode based on all attributes."""
@@ -83,3 +160,37 @@ class HTMLNode:
         """Return a string representation of the HTMLNode for debugging."""
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
     
+
+
+def render_props(props: Optional[Dict[str, str]]) -> str:
+    """
+    Render a props dictionary as an HTML attribute string, escaping the values.
+
+    Results are cached by the props' contents rather than by the dict object,
+    so every node sharing an attribute set (the same href, the same class)
+    gets back one shared string, and mutating a props dict simply looks up a
+    different entry instead of returning stale HTML.
+
+    Args:
+        props: Attribute names mapped to their values, or None
+
+    Returns:
+        String of attributes with a leading space (e.g., ' href="/?a=1&amp;b=2"'),
+        or an empty string if props is None
+    """
+    if props is None:
+        return ""
+    # Flattened to name, value, name, value, ... so the typed cache sees each
+    # value's type and 1 and True (which compare equal) get separate entries
+    items = tuple(chain.from_iterable(props.items()))
+    try:
+        return _render_props_items(*items)
+    except TypeError:
+        # Unhashable values can't be cached, render them directly
+        return _render_props_items.__wrapped__(*items)
+
+
+@lru_cache(maxsize=PROPS_CACHE_SIZE, typed=True)
+def _render_props_items(*items: Any) -> str:
+    attrs = [f'{key}="{html.escape(str(value), quote=True)}"' for key, value in zip(items[::2], items[1::2])]
+    return f" {' '.join(attrs)}"
@@ -1,4 +1,4 @@
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 from htmlnode import HTMLNode
 
 
@@ -16,6 +16,8 @@ class LeafNode(HTMLNode):
         LeafNode("a", "Link", {"href": "http://example.com"}) -> <a href="http://example.com">Link</a>
     """
     
+    __slots__ = ()
+    
     def __init__(self, tag: Optional[str], value: str, props: Optional[Dict[str, str]] = None) -> None:
         """
         Initialize a LeafNode.
@@ -27,13 +29,13 @@ class LeafNode(HTMLNode):
         """
         super().__init__(tag, value, None, props)
 
-    def to_html(self) -> str:
+    def _html_parts(self) -> Tuple[str, Optional[List[HTMLNode]], str]:
         """
-        Convert this LeafNode to an HTML string representation.
+        Describe how this LeafNode renders (see HTMLNode.to_html / iter_html).
         
         Returns:
-            HTML string representation. If no tag is specified, returns raw value.
-            If tag is specified, returns value wrapped in the tag with any props.
+            The whole HTML as the opening part. If no tag is specified, that's
+            the raw value; otherwise the value wrapped in the tag with any props.
             
         Raises:
             ValueError: If the node has a tag but no value
@@ -45,11 +47,11 @@ class LeafNode(HTMLNode):
         """
         # Handle raw text nodes (no HTML tag)
         if not self.tag:
-            return self.value
+            return self.value, None, ""
             
         # Leaf nodes with tags must have values
         if self.value is None:
             raise ValueError("LeafNode with a tag requires a value")
             
         # Generate HTML with tag and props
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
\ No newline at end of file
+        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>", None, ""
@@ -0,0 +1,168 @@
+"""
+Site-wide link graph and broken link checker.
+
+While a page is parsed, every link and image URL in it is appended to a
+list (see markdown_to_html_node), and the render cache keeps that list with
+the page's HTML. build_site gathers the lists into a LinkGraph mapping each
+output page to the URLs it references, so the graph costs no extra parsing,
+even for pages served from the cache.
+
+check_links() resolves every internal URL against the set of published
+files, which is one set lookup per link. External URLs (anything with a
+scheme or host) and same-page #fragments are not checked. A URL resolves the
+way a static file server would resolve it:
+
+    /blog/post       blog/post, blog/post.html or blog/post/index.html
+    ../images/a.png  relative to the page's own directory
+    /                index.html
+"""
+
+import json
+import os
+import posixpath
+from typing import Collection, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+from log import count, fields, logger
+from make_public import scan_tree
+
+LINKS_PATH = os.path.join(".cache", "links.json")
+INDEX_PAGE = "index.html"
+HTML_EXTENSION = ".html"
+
+
+class BrokenLink(NamedTuple):
+    page: str
+    tag: str
+    url: str
+
+
+class LinkGraph:
+    """
+    The links and images of every page, keyed by the page's path relative to the output directory.
+
+    Examples:
+        graph = LinkGraph()
+        graph.add("blog/post.html", [("a", "/about"), ("img", "cat.png")])
+        graph.backlinks() -> {"about": ["blog/post.html"], "blog/cat.png": ["blog/post.html"]}
+    """
+
+    def __init__(self) -> None:
+        self.pages: Dict[str, List[Tuple[str, str]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(links) for links in self.pages.values())
+
+    def add(self, page: str, links: List[Tuple[str, str]]) -> None:
+        """Record the (tag, url) pairs found on page, replacing any recorded before."""
+        self.pages[page] = links
+
+    def discard(self, page: str) -> None:
+        """Forget a page, or every page under a directory."""
+        if self.pages.pop(page, None) is None:
+            prefix = page.rstrip("/") + "/"
+            for gone in [key for key in self.pages if key.startswith(prefix)]:
+                del self.pages[gone]
+
+    def links(self) -> Iterator[Tuple[str, str, str]]:
+        """Yield (page, tag, url) for every link in the graph."""
+        for page, links in self.pages.items():
+            for tag, url in links:
+                yield page, tag, url
+
+    def backlinks(self) -> Dict[str, List[str]]:
+        """Return each internal target (as resolve_link gives it) mapped to the pages that reference it."""
+        targets: Dict[str, List[str]] = {}
+        for page, _, url in self.links():
+            target = resolve_link(page, url)
+            if target is not None:
+                pages = targets.setdefault(target, [])
+                if not pages or pages[-1] != page:
+                    pages.append(page)
+        return targets
+
+    def save(self, path: str = LINKS_PATH) -> None:
+        """Write the graph to path as JSON."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.pages, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = LINKS_PATH) -> "LinkGraph":
+        """
+        Read a graph written by save().
+
+        Raises:
+            OSError: If path can't be read
+            ValueError: If it isn't a saved graph
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            pages = json.load(f)
+        graph = cls()
+        graph.pages = {page: [(tag, url) for tag, url in links] for page, links in pages.items()}
+        return graph
+
+
+def resolve_link(page: str, url: str) -> Optional[str]:
+    """
+    Return the output path a URL on page points at, or None if it's external or a #fragment.
+
+    Examples:
+        resolve_link("blog/post.html", "../about#team") -> "about"
+        resolve_link("blog/post.html", "https://example.com") -> None
+    """
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = unquote(parts.path)
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(page), path)
+    target = posixpath.normpath(path).lstrip("/")
+    return "" if target == "." else target
+
+
+def check_links(graph: LinkGraph, files: Collection[str]) -> List[BrokenLink]:
+    """
+    Return every internal link in graph that points at none of files.
+
+    Args:
+        graph: Links of the built pages
+        files: Paths of the published files, relative to the output directory
+    """
+    broken = []
+    for page, tag, url in graph.links():
+        target = resolve_link(page, url)
+        if target is not None and not _published(target, files):
+            broken.append(BrokenLink(page, tag, url))
+    return broken
+
+
+def published_files(dest: str) -> Set[str]:
+    """Return the paths of every file under dest, relative to it, with / separators."""
+    _, files = scan_tree(dest)
+    if os.sep == "/":
+        return set(files)
+    return {rel.replace(os.sep, "/") for rel in files}
+
+
+def report_broken_links(graph: LinkGraph, dest: str) -> List[BrokenLink]:
+    """Check graph against the files published under dest, logging a warning per broken link."""
+    broken = check_links(graph, published_files(dest))
+    for link in broken:
+        logger.warning("Broken %s in %s: %s", "image" if link.tag == "img" else "link", link.page, link.url)
+    count("links_checked", len(graph))
+    count("links_broken", len(broken))
+    logger.info("Checked %d links", len(graph), extra=fields(pages=len(graph.pages), broken=len(broken)))
+    return broken
+
+
+def _published(target: str, files: Collection[str]) -> bool:
+    if target in files:
+        return True
+    if target == "":
+        return INDEX_PAGE in files
+    return target + HTML_EXTENSION in files or posixpath.join(target, INDEX_PAGE) in files
@@ -0,0 +1,173 @@
+"""
+Leveled, structured logging for builds.
+
+Every module logs through the "ssg" logger. Until configure() is called
+(main does it from the command line flags) nothing below WARNING is shown,
+so library use and the tests stay quiet. Levels, from chattiest:
+
+    TRACE    one line per file copied or page rendered
+    DEBUG    per-phase details (cache evictions, directories created)
+    INFO     one summary line per phase
+    NOTICE   the final counter report and what a long-running command is
+             doing (the address being served, each watch rebuild)
+    WARNING  problems the build worked around
+
+main shows NOTICE and up unless asked for more or less.
+
+Records can carry structured fields, as in
+logger.info("Synced", extra=fields(copied=3)), which are written after the
+message as key=value pairs or as JSON lines. Output is gathered by a
+BufferedHandler and written in batches instead of one write per record.
+
+Instead of logging every item, hot paths bump counters with count(), and
+report() logs them once at the end. Worker processes hand theirs back with
+drain_counters() so the parent's report covers the whole build.
+"""
+
+import json
+import logging
+import sys
+from collections import Counter
+from typing import Any, Dict, List, Optional, TextIO
+
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+NOTICE = 25
+logging.addLevelName(NOTICE, "NOTICE")
+
+logger = logging.getLogger("ssg")
+
+# Records gathered before the handler writes them out in one go
+DEFAULT_BUFFER_RECORDS = 512
+
+counters: Counter = Counter()
+
+
+def configure(
+    level: int = NOTICE,
+    stream: Optional[TextIO] = None,
+    json_lines: bool = False,
+    buffer_records: int = DEFAULT_BUFFER_RECORDS
+) -> logging.Handler:
+    """
+    Send the "ssg" logger's records at or above level to stream (default stderr).
+
+    Calling it again replaces the previous configuration.
+
+    Returns:
+        The installed handler
+    """
+    for handler in list(logger.handlers):
+        handler.flush()
+        logger.removeHandler(handler)
+    handler = BufferedHandler(stream, buffer_records)
+    handler.setFormatter(StructuredFormatter(json_lines))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return handler
+
+
+def flush() -> None:
+    """Write out any buffered records."""
+    for handler in logger.handlers:
+        handler.flush()
+
+
+def trace(message: str, *args: Any, **kwargs: Any) -> None:
+    """Log a per-item message at TRACE level."""
+    if logger.isEnabledFor(TRACE):
+        logger.log(TRACE, message, *args, **kwargs)
+
+
+def fields(**values: Any) -> Dict[str, Dict[str, Any]]:
+    """Return values as the extra= argument that attaches them to a record."""
+    return {"fields": values}
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Add amount to the named counter."""
+    counters[name] += amount
+
+
+def drain_counters() -> Dict[str, int]:
+    """Return the counters gathered so far and reset them."""
+    drained = dict(counters)
+    counters.clear()
+    return drained
+
+
+def merge_counters(values: Dict[str, int]) -> None:
+    """Add counters drained in another process."""
+    counters.update(values)
+
+
+def report(reset: bool = True) -> None:
+    """Log every counter as one summary record."""
+    if counters:
+        logger.log(NOTICE, "Summary", extra=fields(**dict(sorted(counters.items()))))
+    if reset:
+        counters.clear()
+    flush()
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Format records as their message followed by key=value fields, or as JSON lines.
+
+    Examples:
+        Synced static -> public copied=3 unchanged=12
+        {"level": "info", "message": "Synced static -> public", "copied": 3, "unchanged": 12}
+        warning: Publish strategy 'hardlink' unsupported, falling back error=Invalid cross-device link
+    """
+
+    def __init__(self, json_lines: bool = False) -> None:
+        super().__init__()
+        self.json_lines = json_lines
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        values = getattr(record, "fields", None) or {}
+        if self.json_lines:
+            return json.dumps({"level": record.levelname.lower(), "message": message, **values}, default=str)
+        if record.levelno >= logging.WARNING:
+            message = f"{record.levelname.lower()}: {message}"
+        if values:
+            message += " " + " ".join(f"{key}={value}" for key, value in values.items())
+        return message
+
+
+class BufferedHandler(logging.Handler):
+    """
+    Handler that formats records into a list and writes them in batches.
+
+    The batch is written when it holds capacity records, when a WARNING or
+    worse comes in, and on flush() (logging flushes handlers at exit).
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, capacity: int = DEFAULT_BUFFER_RECORDS) -> None:
+        super().__init__()
+        self.stream = stream
+        self.capacity = capacity
+        self.lines: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self.lock:
+            self.lines.append(line)
+            full = len(self.lines) >= self.capacity
+        if full or record.levelno >= logging.WARNING:
+            self.flush()
+
+    def flush(self) -> None:
+        with self.lock:
+            if not self.lines:
+                return
+            stream = self.stream or sys.stderr
+            stream.write("\n".join(self.lines) + "\n")
+            self.lines.clear()
+            stream.flush()
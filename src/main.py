@@ -1,9 +1,281 @@
-from textnode import *
+import argparse
+import cProfile
+import logging
+import os
+import sys
+from contextlib import nullcontext
+
+import log
+import profiling
 from make_public import *
+from build import build_site, remove_stale_pages
+from links import LINKS_PATH, LinkGraph, report_broken_links
+from markdown import DEFAULT_INLINE_CACHE_SIZE, set_inline_cache_size
+from metadata import MetadataIndex
+from profiling import DEFAULT_TOP_PAGES, Profile
+from render_cache import CACHE_DIR, DEFAULT_MAX_BYTES, RenderCache
+from watch import DEFAULT_DEBOUNCE, watch
+from devserver import DEFAULT_CACHE_ENTRIES, DEFAULT_HOST, DEFAULT_PORT, serve
+from publish import DEFAULT_KEEP, live_dir, rollback, staged
+from template import DEFAULT_TEMPLATE
+
+
+LOG_LEVELS = {
+    "trace": log.TRACE,
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "notice": log.NOTICE,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+
+def _log_level(name):
+    try:
+        return LOG_LEVELS[name.lower()]
+    except KeyError:
+        raise argparse.ArgumentTypeError(f"unknown log level: {name}")
+
+
+def log_level(args):
+    """Return the level to log at: warnings and the summary by default, more with each -v."""
+    if args.log_level is not None:
+        return args.log_level
+    if args.verbose >= 2:
+        return logging.DEBUG
+    return logging.INFO if args.verbose else log.NOTICE
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Static site generator")
+    commands = parser.add_subparsers(dest="command")
+
+    logging_options = argparse.ArgumentParser(add_help=False)
+    verbosity = logging_options.add_mutually_exclusive_group()
+    verbosity.add_argument("-q", "--quiet", action="store_const", dest="log_level", const=logging.WARNING,
+                           help="only report problems, not even the summary")
+    verbosity.add_argument("-v", "--verbose", action="count", default=0,
+                           help="also report a line per phase; -vv adds per-phase details")
+    verbosity.add_argument("--trace", action="store_const", dest="log_level", const=log.TRACE,
+                           help="log every file copied and page rendered")
+    verbosity.add_argument("--log-level", dest="log_level", type=_log_level, metavar="LEVEL",
+                           help=f"lowest level logged, one of {', '.join(LOG_LEVELS)} (default: notice)")
+    logging_options.add_argument("--log-json", action="store_true", help="write log records as JSON lines")
+
+    # Options shared by every command that renders pages
+    rendering = argparse.ArgumentParser(add_help=False)
+    rendering.add_argument("--template", default=None,
+                           help=f"page template (default: {DEFAULT_TEMPLATE} if it exists, else bare pages)")
+    rendering.add_argument("--inline-cache-size", type=int, default=DEFAULT_INLINE_CACHE_SIZE, metavar="N",
+                           help=f"distinct inline texts kept converted, 0 to disable (default: {DEFAULT_INLINE_CACHE_SIZE})")
+
+    # Options shared by every command that writes the site
+    site = argparse.ArgumentParser(add_help=False, parents=[logging_options, rendering])
+    site.add_argument("--content", default="content", help="markdown source directory (default: content)")
+    site.add_argument("--static", default="static", help="static asset directory (default: static)")
+    site.add_argument("--dest", default="public", help="output directory (default: public)")
+    site.add_argument("--workers", type=int, default=None, help="page rendering processes (default: CPU count)")
+    site.add_argument("--copy-workers", type=int, default=DEFAULT_WORKERS, help="asset copying threads")
+    site.add_argument("--scan-workers", type=int, default=1, help="threads walking the static directory (default: 1)")
+    site.add_argument("--strategy", choices=STRATEGIES, default="copy", help="how static assets are published")
+    site.add_argument("--no-cache", action="store_true", help="render every page instead of reusing cached HTML")
+    site.add_argument("--cache-dir", default=CACHE_DIR, help=f"render cache location (default: {CACHE_DIR})")
+    site.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                      help="render cache size budget in MB")
+
+    build = commands.add_parser("build", parents=[site],
+                                help="copy static assets and render content into the output directory")
+    build.add_argument("--full", action="store_true",
+                       help="wipe and recopy static assets instead of syncing, which also repairs assets edited in --dest")
+    build.add_argument("--checksum", action="store_true", help="hash touched assets before recopying them")
+    build.add_argument("--in-place", action="store_true",
+                       help="write straight into --dest instead of staging and swapping in a new generation")
+    build.add_argument("--generations", type=int, default=DEFAULT_KEEP, metavar="N",
+                       help=f"previous generations kept for rollback (default: {DEFAULT_KEEP})")
+    build.add_argument("--check-links", action="store_true",
+                       help="report links and images that point at nothing in the built site, and exit 1 if any do")
+    build.add_argument("--profile", action="store_true", help="print a per-stage timing breakdown and the slowest pages")
+    build.add_argument("--profile-top", type=int, default=DEFAULT_TOP_PAGES, metavar="N",
+                       help=f"slowest pages to list with --profile (default: {DEFAULT_TOP_PAGES})")
+    build.add_argument("--profile-output", metavar="FILE",
+                       help="also write cProfile stats to FILE (renders in a single process)")
+
+    watch = commands.add_parser("watch", parents=[site],
+                                help="build, then rebuild changed pages and assets as they are edited")
+    watch.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE * 1000, metavar="MS",
+                       help=f"quiet period that ends a burst of changes (default: {DEFAULT_DEBOUNCE * 1000:.0f})")
+    watch.add_argument("--poll", type=float, default=None, metavar="SECONDS",
+                       help="poll for changes every SECONDS instead of using inotify")
+
+    serve = commands.add_parser("serve", parents=[logging_options, rendering],
+                                help="serve pages rendered on request, reloading them as sources change")
+    serve.add_argument("--content", default="content", help="markdown source directory (default: content)")
+    serve.add_argument("--static", default="static", help="static asset directory (default: static)")
+    serve.add_argument("--host", default=DEFAULT_HOST, help=f"interface to listen on (default: {DEFAULT_HOST})")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    serve.add_argument("--cache-entries", type=int, default=DEFAULT_CACHE_ENTRIES,
+                       help=f"rendered pages kept in memory (default: {DEFAULT_CACHE_ENTRIES})")
+    serve.add_argument("--no-reload", action="store_true", help="don't reload open pages when sources change")
+    serve.add_argument("--poll", type=float, default=None, metavar="SECONDS",
+                       help="poll for changes every SECONDS instead of using inotify")
+
+    check = commands.add_parser("check-links", parents=[logging_options],
+                                help="check the links recorded by the last build against the output directory")
+    check.add_argument("--dest", default="public", help="output directory (default: public)")
+    check.add_argument("--links", default=LINKS_PATH, help=f"link graph written by the build (default: {LINKS_PATH})")
+
+    roll_back = commands.add_parser("rollback", parents=[logging_options],
+                                    help="publish an older generation of the output directory again")
+    roll_back.add_argument("--dest", default="public", help="output directory (default: public)")
+    roll_back.add_argument("--steps", type=int, default=1, help="generations to go back (default: 1)")
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in commands.choices and argv[0] not in ("-h", "--help"):
+        # Plain `python3 src/main.py [options]` keeps doing a build
+        argv = ["build"] + argv
+    return parser.parse_args(argv)
+
+
+def resolve_template(path):
+    """Return the template to wrap pages in, or None for bare pages."""
+    if path is None:
+        return DEFAULT_TEMPLATE if os.path.isfile(DEFAULT_TEMPLATE) else None
+    if not os.path.isfile(path):
+        log.logger.error("Template doesn't exist: %s", path)
+        log.flush()
+        sys.exit(1)
+    return path
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    log.configure(log_level(args), json_lines=args.log_json)
+    if args.command in ("build", "watch", "serve"):
+        args.template = resolve_template(args.template)
+        # Set before any worker processes are forked, so they inherit it
+        set_inline_cache_size(args.inline_cache_size)
+    if args.command == "serve":
+        serve(
+            args.content,
+            args.static,
+            args.host,
+            args.port,
+            cache_entries=args.cache_entries,
+            live_reload=not args.no_reload,
+            poll_interval=args.poll,
+            template=args.template,
+        )
+        log.report()
+        return
+    if args.command == "check-links":
+        try:
+            graph = LinkGraph.load(args.links)
+        except (OSError, ValueError) as error:
+            log.logger.error("Can't read link graph %s: %s", args.links, error)
+            log.flush()
+            sys.exit(1)
+        broken = report_broken_links(graph, args.dest)
+        log.report()
+        if broken:
+            sys.exit(1)
+        return
+    if args.command == "rollback":
+        try:
+            rollback(args.dest, args.steps)
+        except ValueError as error:
+            log.logger.error("%s", error)
+            log.flush()
+            sys.exit(1)
+        log.flush()
+        return
+
+    cache = None
+    if not args.no_cache:
+        cache = RenderCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+    if args.command == "build":
+        profile = None
+        if args.profile or args.profile_output:
+            profile = Profile()
+            profiling.enable()
+        profiler = None
+        if args.profile_output:
+            # cProfile only sees this process, so keep every page in it
+            args.workers = 1
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        if args.in_place:
+            output = nullcontext(args.dest)
+            manifest_dest = None
+        else:
+            # Staging starts as a clone of the live site, so the sync manifest
+            # always describes dest, whichever generation wrote it
+            seed = not args.full and live_dir(args.dest) is not None
+            output = staged(args.dest, keep=args.generations, seed=seed)
+            manifest_dest = args.dest
+        graph = LinkGraph()
+        broken = []
+        with output as out_dir:
+            distribute(
+                args.static,
+                out_dir,
+                incremental=not args.full,
+                checksum=args.checksum,
+                workers=args.copy_workers,
+                strategy=args.strategy,
+                scan_workers=args.scan_workers,
+                manifest_dest=manifest_dest,
+            )
+            build_site(
+                args.content,
+                out_dir,
+                workers=args.workers,
+                cache=cache,
+                profile=profile,
+                template=args.template,
+                index=MetadataIndex(args.content),
+                links=graph,
+            )
+            if not args.full:
+                # Pages carried over from the previous build whose source is gone
+                remove_stale_pages(args.content, out_dir, args.static)
+            graph.save()
+            if args.check_links:
+                broken = report_broken_links(graph, out_dir)
+
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile_output)
+            log.logger.info("Wrote cProfile stats to %s", args.profile_output)
+        log.report()
+        if profile is not None:
+            profiling.disable()
+            profile.collect()
+            print(profile.report(args.profile_top))
+        if broken:
+            sys.exit(1)
+    elif args.command == "watch":
+        try:
+            watch(
+                args.content,
+                args.static,
+                args.dest,
+                cache=cache,
+                strategy=args.strategy,
+                debounce=args.debounce / 1000,
+                poll_interval=args.poll,
+                template=args.template,
+                index=MetadataIndex(args.content),
+                workers=args.workers,
+                copy_workers=args.copy_workers,
+                scan_workers=args.scan_workers,
+                links_path=LINKS_PATH,
+            )
+        except KeyboardInterrupt:
+            pass
+        log.report()
 
-def main():
-    sampleNode = TextNode("hello", TextType.TEXT, "http://www.boot.dev")
-    print(sampleNode)
-    distribute("static", "public")
 
-main()
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,485 @@
-import os, shutil
+import os, shutil, json, hashlib, time, errno
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
-def distribute(source, dest):
+from log import count, fields, logger, trace
+
+# Incremental sync keeps its manifest outside of dest so it never gets published
+MANIFEST_PATH = os.path.join(".cache", "static-manifest.json")
+MANIFEST_VERSION = 2
+
+# How files get from source to dest. Everything falls back to a plain copy when
+# the filesystem (or platform) can't do it, e.g. hardlinks across devices.
+STRATEGIES = ("copy", "hardlink", "symlink", "reflink")
+
+# Linux ioctl that clones a file's extents (btrfs, XFS, bcachefs, ...)
+_FICLONE = 0x40049409
+
+# Errors that mean a strategy can't work here, rather than that this file is a problem
+_UNSUPPORTED_ERRNOS = (errno.EXDEV, errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP)
+# FICLONE on a filesystem without reflinks can also fail with these
+_REFLINK_UNSUPPORTED_ERRNOS = _UNSUPPORTED_ERRNOS + (errno.EINVAL, errno.ENOTTY)
+
+# Copying is I/O bound, so oversubscribe the CPUs like ThreadPoolExecutor does
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+
+class FileEntry(NamedTuple):
+    """One file found by scan_tree, with the stat fields the copier needs."""
+    path: str
+    size: int
+    mtime_ns: int
+    inode: int
+
+def distribute(source, dest, incremental=False, checksum=False, manifest_path=MANIFEST_PATH,
+               workers=DEFAULT_WORKERS, strategy="copy", scan_workers=1, manifest_dest=None):
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown publish strategy: {strategy}")
     if not os.path.exists(source):
-        print(f"Source directory doesn't exist: {source}")
+        logger.warning("Source directory doesn't exist: %s", source)
         return
     if os.listdir(source) == []:
         return
-    if os.path.exists(dest):
-        shutil.rmtree(dest)
+    if incremental:
+        return sync(source, dest, checksum, manifest_path, workers, strategy, scan_workers, manifest_dest)
+    _remove_tree(dest)
     os.mkdir(dest)
-    _distribute(source, dest)
-
-def _distribute(source, dest):
-    tree = os.listdir(source)
-
-    for item in tree:
-        item_path = os.path.join(source, item)
-        if not os.path.isfile(item_path):
-            new_path = os.path.join(dest, item)
-            os.mkdir(new_path)
-            print(f"Creating directory: {new_path}")
-            _distribute(item_path, new_path)
-        else:
-            shutil.copy(item_path, dest)
-            print(f"Copying file: {item_path} -> {dest}")
\ No newline at end of file
+    return _distribute(source, dest, workers, strategy, scan_workers)
+
+def _distribute(source, dest, workers=DEFAULT_WORKERS, strategy="copy", scan_workers=1):
+    # A symlinked directory is published as its contents, not as an empty directory
+    dirs, files = scan_tree(source, scan_workers, follow_symlinks=True)
+
+    # Create the whole directory skeleton up front so copies never race on it
+    for rel in dirs:
+        new_path = os.path.join(dest, rel)
+        os.mkdir(new_path)
+        trace("Created directory %s", new_path)
+    logger.debug("Created %d directories under %s", len(dirs), dest)
+
+    publish = _make_publisher(strategy)
+
+    def copy(rel):
+        item_path = os.path.join(source, rel)
+        publish(item_path, os.path.join(dest, rel))
+        trace("Copied %s -> %s", item_path, os.path.join(dest, rel))
+
+    start = time.perf_counter()
+    _run_parallel(copy, list(files), workers)
+    total_bytes = sum(entry.size for entry in files.values())
+    _report_throughput(len(files), total_bytes, time.perf_counter() - start)
+    stats = {"copied": len(files), "unchanged": 0, "removed": 0, "bytes": total_bytes}
+    _count_stats(stats)
+    return stats
+
+
+def sync(
+    source: str,
+    dest: str,
+    checksum: bool = False,
+    manifest_path: str = MANIFEST_PATH,
+    workers: int = DEFAULT_WORKERS,
+    strategy: str = "copy",
+    scan_workers: int = 1,
+    manifest_dest: Optional[str] = None
+) -> Dict[str, int]:
+    """
+    Incrementally mirror source into dest, copying only what changed.
+
+    Files are compared by size, mtime and inode against the manifest written
+    by the previous run; dest is only checked for whether each file is still
+    there, so one deleted from dest is copied again, but one edited in place
+    in dest isn't noticed until its source changes (distribute without
+    incremental, i.e. build --full, repairs that). With checksum=True a file
+    whose mtime moved but whose size did not is hashed before deciding to copy,
+    which keeps touched-but-identical files from being rewritten.
+
+    Files and directories recorded in the manifest that no longer exist in
+    source are removed from dest. Anything else in dest (e.g. rendered pages)
+    is left alone. Without a usable manifest every file is copied again, and
+    only the files an outdated manifest for dest lists are removed, so pages
+    rendered into dest survive a manifest format change.
+
+    Args:
+        source: Directory to copy from (e.g. "static")
+        dest: Directory to copy into (e.g. "public")
+        checksum: Hash files whose mtime changed but whose size did not
+        manifest_path: Where the manifest for this dest is kept
+        workers: Number of threads copying files concurrently
+        strategy: How files are published, one of STRATEGIES
+        scan_workers: Number of threads walking source concurrently
+        manifest_dest: Directory the manifest describes, if not dest itself. A
+            staging directory passes the live path, so the manifest it saves
+            matches the next build; if the live path is gone, dest is treated
+            as having no manifest.
+
+    Returns:
+        Counts of copied, unchanged and removed files and bytes copied
+    """
+    dirs, files = scan_tree(source, scan_workers, follow_symlinks=True)
+    manifest_dest = manifest_dest or dest
+    previous = _load_manifest(manifest_path, source, manifest_dest)
+    stats = {"copied": 0, "unchanged": 0, "removed": 0, "bytes": 0}
+
+    trusted = previous is not None and os.path.isdir(dest) and os.path.isdir(manifest_dest)
+    if trusted:
+        old_files, old_dirs = previous
+    elif os.path.isdir(dest):
+        # No trustworthy record of what dest holds, so every file is copied
+        # again. What an outdated manifest lists is still ours to remove, and
+        # everything else (rendered pages) stays.
+        old_files, old_dirs = _load_listed(manifest_path, manifest_dest)
+    else:
+        old_files, old_dirs = {}, []
+
+    # Remove orphans before creating anything, so a file that turned into a
+    # directory (or the other way round) doesn't collide with its old self
+    for rel in old_files.keys() - files.keys():
+        try:
+            os.remove(os.path.join(dest, rel))
+            stats["removed"] += 1
+            trace("Removed %s", os.path.join(dest, rel))
+        except FileNotFoundError:
+            pass
+    for rel in sorted(set(old_dirs) - set(dirs), reverse=True):
+        try:
+            os.rmdir(os.path.join(dest, rel))
+        except OSError:
+            pass
+
+    os.makedirs(dest, exist_ok=True)
+    for rel in dirs:
+        path = os.path.join(dest, rel)
+        if os.path.islink(path) or os.path.lexists(path) and not os.path.isdir(path):
+            # An untracked file (or a symlink left by the symlink strategy) is in the way
+            os.remove(path)
+        os.makedirs(path, exist_ok=True)
+
+    entries = {}
+    pending = []
+    for rel, entry in files.items():
+        digest = None
+        old = old_files.get(rel) if trusted else None
+        # A published file deleted from dest is copied again whatever the manifest says
+        if old is not None and old[0] == entry.size and os.path.lexists(os.path.join(dest, rel)):
+            # A file replaced by another with the same size and mtime still has a new inode
+            if old[1] == entry.mtime_ns and old[3] == entry.inode:
+                entries[rel] = old
+                stats["unchanged"] += 1
+                continue
+            if checksum and old[2] is not None:
+                digest = _hash_file(os.path.join(source, rel))
+                if digest == old[2]:
+                    entries[rel] = [entry.size, entry.mtime_ns, digest, entry.inode]
+                    stats["unchanged"] += 1
+                    continue
+        pending.append((entry, digest))
+
+    publish = _make_publisher(strategy)
+
+    def copy(job):
+        entry, digest = job
+        src_path = os.path.join(source, entry.path)
+        publish(src_path, os.path.join(dest, entry.path))
+        trace("Copied %s -> %s", src_path, os.path.join(dest, entry.path))
+        if checksum and digest is None:
+            digest = _hash_file(src_path)
+        return entry.path, [entry.size, entry.mtime_ns, digest, entry.inode]
+
+    start = time.perf_counter()
+    for rel, entry in _run_parallel(copy, pending, workers):
+        entries[rel] = entry
+        stats["copied"] += 1
+        stats["bytes"] += entry[0]
+    if pending:
+        _report_throughput(stats["copied"], stats["bytes"], time.perf_counter() - start)
+
+    _save_manifest(manifest_path, source, manifest_dest, entries, dirs)
+    logger.info(
+        "Synced %s -> %s", source, dest,
+        extra=fields(copied=stats["copied"], unchanged=stats["unchanged"], removed=stats["removed"]),
+    )
+    _count_stats(stats)
+    return stats
+
+
+def _make_publisher(strategy: str) -> Callable[[str, str], None]:
+    """
+    Return a function that publishes one file from src to dst using strategy.
+
+    The first time a strategy turns out to be unsupported (cross-device hardlink,
+    no symlink permission, filesystem without reflinks, ...) a warning is logged
+    and every later file goes straight to the fallback, so a large tree doesn't
+    pay for thousands of failing syscalls. Any other error (a missing source, a
+    full disk) is raised instead of being mistaken for an unsupported strategy.
+
+    Any existing dst is unlinked before publishing. Besides being required for
+    links, this means a dst that is a hardlink shared with another tree is
+    replaced instead of being overwritten in place.
+    """
+    unsupported = set()
+
+    def fallback(name: str, error: OSError) -> None:
+        if name not in unsupported:
+            unsupported.add(name)
+            logger.warning("Publish strategy '%s' unsupported, falling back", name, extra=fields(error=error.strerror))
+
+    def publish(src: str, dst: str) -> None:
+        try:
+            os.unlink(dst)
+        except FileNotFoundError:
+            pass
+        if strategy == "hardlink" and "hardlink" not in unsupported:
+            try:
+                os.link(src, dst)
+                return
+            except OSError as error:
+                if error.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                fallback("hardlink", error)
+        elif strategy == "symlink" and "symlink" not in unsupported:
+            try:
+                os.symlink(os.path.abspath(src), dst)
+                return
+            except OSError as error:
+                if error.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                fallback("symlink", error)
+        elif strategy == "reflink":
+            _copy_reflink(src, dst, unsupported, fallback)
+            return
+        shutil.copy(src, dst)
+
+    return publish
+
+
+def _copy_reflink(src: str, dst: str, unsupported: set, fallback: Callable) -> None:
+    """
+    Copy src to dst without moving the bytes through user space if possible.
+
+    Tries, in order: a FICLONE reflink (shares extents, instant), then
+    os.copy_file_range (in-kernel copy, which some filesystems also turn into a
+    reflink or server-side copy), then os.sendfile, then a regular copy.
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if "reflink" not in unsupported:
+            try:
+                import fcntl
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+                shutil.copymode(src, dst)
+                return
+            except ImportError:
+                unsupported.add("reflink")
+            except OSError as error:
+                if error.errno not in _REFLINK_UNSUPPORTED_ERRNOS:
+                    raise
+                fallback("reflink", error)
+
+        size = os.fstat(fsrc.fileno()).st_size
+        for name in ("copy_file_range", "sendfile"):
+            if name in unsupported:
+                continue
+            if not hasattr(os, name):
+                unsupported.add(name)
+                continue
+            try:
+                offset = 0
+                while offset < size:
+                    if name == "copy_file_range":
+                        sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - offset, offset, offset)
+                    else:
+                        sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                shutil.copymode(src, dst)
+                return
+            except OSError as error:
+                if error.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP):
+                    raise
+                fallback(name, error)
+                fdst.seek(0)
+                fdst.truncate()
+
+    shutil.copy(src, dst)
+
+
+def _run_parallel(func: Callable, jobs: list, workers: int) -> list:
+    """Run func over jobs on a bounded thread pool, returning results in job order."""
+    if workers <= 1 or len(jobs) <= 1:
+        return [func(job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(func, jobs))
+
+
+def _report_throughput(files: int, total_bytes: int, seconds: float) -> None:
+    """Log how many files and megabytes per second a copy pass achieved."""
+    seconds = max(seconds, 1e-9)
+    megabytes = total_bytes / (1024 * 1024)
+    logger.info(
+        "Copied %d files (%.1f MB) in %.2fs", files, megabytes, seconds,
+        extra=fields(files_per_s=round(files / seconds), mb_per_s=round(megabytes / seconds, 1)),
+    )
+
+
+def _count_stats(stats: Dict[str, int]) -> None:
+    """Add a distribute/sync result to the build's summary counters."""
+    count("files_copied", stats["copied"])
+    count("files_unchanged", stats["unchanged"])
+    count("files_removed", stats["removed"])
+    count("bytes_copied", stats["bytes"])
+
+
+def scan_tree(
+    source: str,
+    workers: int = 1,
+    follow_symlinks: bool = False
+) -> Tuple[List[str], Dict[str, FileEntry]]:
+    """
+    Walk source with os.scandir and stat every file once.
+
+    Entry types come from the directory listing itself, so only files are
+    stat'ed. With workers > 1 subdirectories are listed concurrently, which
+    pays off on network filesystems and cold caches. Symlinked directories
+    are listed but not descended into, like os.walk, unless follow_symlinks
+    is set; even then one that points back at its own parent is not.
+
+    Args:
+        source: Directory to scan
+        workers: Number of threads listing directories
+        follow_symlinks: Descend into symlinked directories
+
+    Returns:
+        Relative directory paths, parents before children, and
+        {relative file path: FileEntry}
+    """
+    dirs = []
+    files = {}
+
+    def add(result: Tuple[List[str], List[str], List[FileEntry]]) -> List[str]:
+        found_dirs, descend, found_files = result
+        dirs.extend(found_dirs)
+        for entry in found_files:
+            files[entry.path] = entry
+        return descend
+
+    if workers <= 1:
+        stack = [""]
+        while stack:
+            stack.extend(add(_scan_dir(source, stack.pop(), follow_symlinks)))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(_scan_dir, source, "", follow_symlinks)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for rel in add(future.result()):
+                        pending.add(pool.submit(_scan_dir, source, rel, follow_symlinks))
+
+    # Sorting puts every directory after its parent, so they can be created in order
+    dirs.sort()
+    return dirs, files
+
+
+def _scan_dir(
+    source: str,
+    rel: str,
+    follow_symlinks: bool = False
+) -> Tuple[List[str], List[str], List[FileEntry]]:
+    """List one directory: (subdirectories, the ones to descend into, files)."""
+    dirs, descend, files = [], [], []
+    with os.scandir(os.path.join(source, rel)) as it:
+        for entry in it:
+            entry_rel = os.path.join(rel, entry.name) if rel else entry.name
+            try:
+                if entry.is_dir():
+                    dirs.append(entry_rel)
+                    if not entry.is_symlink() or follow_symlinks and not _links_to_ancestor(entry.path):
+                        descend.append(entry_rel)
+                    continue
+                st = entry.stat()
+            except FileNotFoundError:
+                # Deleted mid-scan, or a dangling symlink
+                continue
+            files.append(FileEntry(entry_rel, st.st_size, st.st_mtime_ns, st.st_ino))
+    return dirs, descend, files
+
+
+def _links_to_ancestor(path: str) -> bool:
+    """Return whether a symlinked directory points at itself or a directory containing it."""
+    target = os.path.realpath(path)
+    parent = os.path.realpath(os.path.dirname(path))
+    return parent == target or parent.startswith(target.rstrip(os.sep) + os.sep)
+
+
+def _remove_tree(path: str) -> None:
+    """Remove a directory tree; a symlink (e.g. to a published generation) is only unlinked."""
+    if os.path.islink(path):
+        os.unlink(path)
+    elif os.path.exists(path):
+        shutil.rmtree(path)
+
+
+def _hash_file(path: str) -> str:
+    """Return the hex SHA-256 digest of a file's contents."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _load_manifest(
+    manifest_path: str,
+    source: str,
+    dest: str
+) -> Optional[Tuple[Dict[str, list], List[str]]]:
+    """Load the manifest for source -> dest, or None if it's missing, malformed or doesn't match."""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if (
+            manifest.get("version") != MANIFEST_VERSION
+            or manifest.get("source") != os.path.abspath(source)
+            or manifest.get("dest") != os.path.abspath(dest)
+        ):
+            return None
+        files, dirs = manifest["files"], manifest["dirs"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+    if not isinstance(files, dict) or not isinstance(dirs, list):
+        return None
+    return files, dirs
+
+
+def _load_listed(manifest_path: str, dest: str) -> Tuple[Dict[str, list], List[str]]:
+    """Return the files and directories any manifest for dest lists, whatever its version."""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("dest") == os.path.abspath(dest):
+            return dict(manifest["files"]), list(manifest["dirs"])
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+    return {}, []
+
+
+def _save_manifest(
+    manifest_path: str,
+    source: str,
+    dest: str,
+    files: Dict[str, list],
+    dirs: List[str]
+) -> None:
+    """Atomically write the manifest so an interrupted run can't leave it half-written."""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "source": os.path.abspath(source),
+        "dest": os.path.abspath(dest),
+        "dirs": dirs,
+        "files": files,
+    }
+    directory = os.path.dirname(manifest_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp_path, manifest_path)
@@ -6,16 +6,28 @@ that can be rendered as HTML. Supports all major markdown block types including
 paragraphs, headings, code blocks, quotes, and lists.
 """
 
-import re
+import threading
+from collections import OrderedDict
 from enum import Enum
-from typing import List
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple, Union
 from htmlnode import HTMLNode
+from flatdoc import FlatDocument
 from textnode import *
+from patterns import (
+    HEADING_PATTERN,
+    CODE_BLOCK_PATTERN,
+    ORDERED_LIST_ITEM_PATTERN,
+    INDENTED_NEWLINE_PATTERN,
+)
 
 # Constants
 CODE_BLOCK_DELIMITER = "```"
-HEADING_PATTERN = r'^(#{1,6}) (.+)'
-CODE_BLOCK_PATTERN = r'^```[\s\S]*```$'
+QUOTE_PREFIX = "> "
+UNORDERED_LIST_PREFIX = "- "
+DEFAULT_BLOCK_CACHE_ENTRIES = 16384
+# Distinct inline texts (paragraphs, list items, headings) kept converted
+DEFAULT_INLINE_CACHE_SIZE = 8192
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -31,134 +43,307 @@ def block_to_block_type(block: str) -> BlockType:
         return BlockType.PARAGRAPH
         
     # Check for code block (starts and ends with ```)
-    if re.match(CODE_BLOCK_PATTERN, block, re.DOTALL):
+    if CODE_BLOCK_PATTERN.match(block):
         return BlockType.CODE
-    if re.match(HEADING_PATTERN, block):
+    if HEADING_PATTERN.match(block):
         return BlockType.HEADING
     lines = block.split("\n")
-    if all(re.match(r'^> ', line) for line in lines):
+    # Fixed prefixes don't need a regex at all
+    if all(line.startswith(QUOTE_PREFIX) for line in lines):
         return BlockType.QUOTE
-    if all(re.match(r'^- ', line) for line in lines):
+    if all(line.startswith(UNORDERED_LIST_PREFIX) for line in lines):
         return BlockType.UNORDERED_LIST
     # Alternative for full markdown spec (supports -, *, +):
-    # if all(re.match(r'^[-*+] ', line) for line in lines):
+    # if all(line[:2] in ("- ", "* ", "+ ") for line in lines):
     #     return BlockType.UNORDERED_LIST
-    is_ordered_list = []
-    for i in range(1, len(lines) + 1):
-        if re.match(f'^{i}\\. ', lines[i-1]):  # f-string with escaped dot
-            is_ordered_list.append(True)
-        else:
-            is_ordered_list.append(False)
-            break
-    if all(is_ordered_list):
-        return BlockType.ORDERED_LIST
-    else:
-        return BlockType.PARAGRAPH
+    for i, line in enumerate(lines, 1):
+        # Items must be numbered 1, 2, 3, ... in order
+        item_match = ORDERED_LIST_ITEM_PATTERN.match(line)
+        if item_match is None or int(item_match.group(1)) != i:
+            return BlockType.PARAGRAPH
+    return BlockType.ORDERED_LIST
 
 
 def markdown_to_blocks(markdown: str) -> List[str]:
     """Split markdown text into blocks separated by double newlines."""
-    if not markdown.strip():
-        return []
-        
-    raw_blocks = markdown.split("\n\n")
-    print("\nblocks split on two newlines:", raw_blocks)
-    cleaned_blocks = list(map(_clean_block, raw_blocks))
-    print("\ncleaned_blocks: ", cleaned_blocks)
+    return list(iter_blocks(markdown))
+
+
+def iter_blocks(markdown: Union[str, TextIO, Iterable[str]]) -> Iterator[str]:
+    """
+    Lazily yield the cleaned, non-empty blocks of a markdown document.
     
-    # Filter out empty blocks after cleaning
-    non_empty_blocks = [block for block in cleaned_blocks if block]
-    return non_empty_blocks
+    Produces the same blocks as markdown_to_blocks, but only ever holds the
+    lines of the current block in memory. A block ends at an empty line, which
+    is exactly where splitting the whole text on two newlines would cut it.
+    
+    Args:
+        markdown: Markdown text, or a text file object / iterable of lines
+        
+    Yields:
+        Each cleaned block in document order
+    """
+    lines = []
+    for line in _iter_lines(markdown):
+        if line:
+            lines.append(line)
+            continue
+        if lines:
+            block = _clean_block("\n".join(lines))
+            lines = []
+            if block:
+                yield block
+    if lines:
+        block = _clean_block("\n".join(lines))
+        if block:
+            yield block
 
 
-def markdown_to_html_node(markdown: str) -> HTMLNode:
+def markdown_to_html_node(
+    markdown: Union[str, TextIO, Iterable[str]],
+    links: Optional[List[Tuple[str, str]]] = None,
+    block_cache: Optional["BlockCache"] = None
+) -> HTMLNode:
     """
     Convert markdown text to an HTMLNode tree.
     
+    Blocks are consumed one at a time from iter_blocks, so passing an open
+    file avoids loading the whole document into memory first.
+    
     Args:
-        markdown: The markdown text to convert
+        markdown: The markdown text to convert, or a text file object / iterable of lines
+        links: List to append a (tag, url) pair to for every link ("a") and
+            image ("img") found while parsing, if any
+        block_cache: Cache to reuse the nodes of blocks seen before from, if any
         
     Returns:
         HTMLNode: A div element containing the converted markdown blocks
     """
-    blocks = markdown_to_blocks(markdown)
-    parent = HTMLNode("div", children=[])
+    return blocks_to_html_node(iter_blocks(markdown), links, block_cache)
+
 
+def blocks_to_html_node(
+    blocks: Iterable[str],
+    links: Optional[List[Tuple[str, str]]] = None,
+    block_cache: Optional["BlockCache"] = None
+) -> HTMLNode:
+    """
+    Convert an iterable of markdown blocks to an HTMLNode tree.
+    
+    Args:
+        blocks: Cleaned markdown blocks, e.g. from iter_blocks
+        links: List to collect (tag, url) pairs in, as for markdown_to_html_node
+        block_cache: Cache to reuse the nodes of blocks seen before from, if any
+        
+    Returns:
+        HTMLNode: A div element containing the converted markdown blocks
+    """
+    parent = HTMLNode("div", children=[])
     for block in blocks:
-        type = block_to_block_type(block)
-        child_node = None
-
-        match type.name:
-            case "PARAGRAPH":
-                # Replace newlines with spaces in paragraph text
-                paragraph_text = block.replace('\n', ' ')
-                children = _text_to_children(paragraph_text)
-                child_node = HTMLNode("p", children=children)
-            case "CODE":
-                # Remove the ``` markers but preserve internal whitespace/newlines
-                delimiter_length = len(CODE_BLOCK_DELIMITER)
-                code_content = block[delimiter_length:-delimiter_length]
-                # Remove leading newline if present, but preserve trailing newlines
-                if code_content.startswith('\n'):
-                    code_content = code_content[1:]
-                # Create nested structure: <pre><code>content</code></pre>
-                code_node = HTMLNode("code", value=code_content)
-                child_node = HTMLNode("pre", children=[code_node])
-            case "QUOTE":
-                lines = block.split('\n')
-                content = list(map(lambda line: line.strip("> "), lines))
-                cleaned_content = '\n'.join(content)
-                
-                # Process inline markdown within the quote
-                children = _text_to_children(cleaned_content)
-                child_node = HTMLNode("blockquote", children=children)
-            case "UNORDERED_LIST":
-                child_node = _create_list_node(block, "ul")
-            case "ORDERED_LIST":
-                child_node = _create_list_node(block, "ol")
-            case "HEADING":
-                # Count # symbols to determine heading level
-                heading_match = re.match(HEADING_PATTERN, block)
-                if heading_match:
-                    hash_symbols = heading_match.group(1)
-                    heading_level = len(hash_symbols)  # Number of # symbols
-                    heading_text = heading_match.group(2)  # Text after the #'s
-                    
-                    # Process inline markdown in heading text
-                    children = _text_to_children(heading_text)
-                    
-                    # Create heading tag (h1, h2, etc.)
-                    heading_tag = f"h{heading_level}"
-                    child_node = HTMLNode(heading_tag, children=children)
-
-        parent.children.append(child_node)
+        if block_cache is None:
+            parent.children.append(_block_to_html_node(block, links))
+        else:
+            parent.children.append(block_cache.block_to_html_node(block, links))
+    return parent
+
+
+class BlockCache:
+    """
+    LRU of converted blocks keyed by their markdown text.
+    
+    Re-rendering a page that changed in one place only classifies and parses
+    the blocks whose text changed; every other block is taken from the cache
+    and spliced into the new tree as a RenderedBlock, which serializes as its
+    HTML from the first render. A block's type follows from its text, so the
+    text alone is the key. Links found in a block are cached with it and
+    reported again on every hit.
+    
+    Cached nodes are shared by every tree they are spliced into, so trees
+    built with a cache must not be modified. Pages are rendered on several
+    threads by the dev server, so every lookup takes a lock.
+    
+    Attributes:
+        max_entries: Blocks kept before the least recently used is dropped
+        hits: Blocks served from the cache
+        misses: Blocks that had to be converted
+    """
+    
+    def __init__(self, max_entries: int = DEFAULT_BLOCK_CACHE_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[RenderedBlock, Tuple[Tuple[str, str], ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def block_to_html_node(self, block: str, links: Optional[List[Tuple[str, str]]] = None) -> HTMLNode:
+        """Return the node for a markdown block, converting it only if it isn't cached."""
+        with self._lock:
+            entry = self._entries.get(block)
+            if entry is not None:
+                self._entries.move_to_end(block)
+                self.hits += 1
+        if entry is None:
+            found: List[Tuple[str, str]] = []
+            entry = (RenderedBlock(_block_to_html_node(block, found)), tuple(found))
+            with self._lock:
+                self.misses += 1
+                self._entries[block] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        if links is not None:
+            links.extend(entry[1])
+        return entry[0]
+
+
+class RenderedBlock(HTMLNode):
+    """
+    A converted block together with its rendered HTML.
+    
+    Keeps the block node's tag and children, so the tree can still be
+    inspected (e.g. for the page title), but renders as the HTML captured
+    when it was created instead of walking its children again.
+    """
+    
+    __slots__ = ("html",)
+    
+    def __init__(self, node: HTMLNode) -> None:
+        super().__init__(node.tag, node.value, node.children, node.props)
+        self.html = node.to_html()
+    
+    def _html_parts(self) -> Tuple[str, Optional[List[HTMLNode]], str]:
+        return self.html, None, ""
+
+
+def markdown_to_flat_document(markdown: Union[str, TextIO]) -> FlatDocument:
+    """
+    Convert markdown text straight to a FlatDocument, without building a tree.
+    
+    Produces the same HTML as markdown_to_html_node(markdown).to_html(), but
+    allocates parallel arrays instead of one HTMLNode per element.
+    
+    Args:
+        markdown: The markdown text to convert, or a text file object
         
-    return parent 
+    Returns:
+        FlatDocument: A div element containing the converted markdown blocks
+    """
+    doc = FlatDocument()
+    root = doc.add_element("div")
+    for block in iter_blocks(markdown):
+        _emit_block(doc, block, root)
+    return doc
+
+
+def _block_to_html_node(block: str, links: Optional[List[Tuple[str, str]]] = None) -> HTMLNode:
+    """Convert a single markdown block to its HTMLNode."""
+    type = block_to_block_type(block)
+    child_node = None
+
+    match type.name:
+        case "PARAGRAPH":
+            children = _text_to_children(_paragraph_text(block), links)
+            child_node = HTMLNode("p", children=children)
+        case "CODE":
+            # Create nested structure: <pre><code>content</code></pre>
+            code_node = HTMLNode("code", value=_code_content(block))
+            child_node = HTMLNode("pre", children=[code_node])
+        case "QUOTE":
+            # Process inline markdown within the quote
+            children = _text_to_children(_quote_text(block), links)
+            child_node = HTMLNode("blockquote", children=children)
+        case "UNORDERED_LIST":
+            child_node = _create_list_node(block, "ul", links)
+        case "ORDERED_LIST":
+            child_node = _create_list_node(block, "ol", links)
+        case "HEADING":
+            heading = _heading_parts(block)
+            if heading:
+                heading_tag, heading_text = heading
+                # Process inline markdown in heading text
+                children = _text_to_children(heading_text, links)
+                child_node = HTMLNode(heading_tag, children=children)
+
+    return child_node
+
+
+def _emit_block(doc: FlatDocument, block: str, parent: int) -> None:
+    """Append a single markdown block to a FlatDocument under parent."""
+    match block_to_block_type(block).name:
+        case "PARAGRAPH":
+            _emit_inline(doc, _paragraph_text(block), doc.add_element("p", parent))
+        case "CODE":
+            doc.add_leaf("code", _code_content(block), doc.add_element("pre", parent))
+        case "QUOTE":
+            _emit_inline(doc, _quote_text(block), doc.add_element("blockquote", parent))
+        case "UNORDERED_LIST" | "ORDERED_LIST" as name:
+            list_type = "ul" if name == "UNORDERED_LIST" else "ol"
+            list_index = doc.add_element(list_type, parent)
+            for item_text in _list_item_texts(block, list_type):
+                _emit_inline(doc, item_text, doc.add_element("li", list_index))
+        case "HEADING":
+            heading = _heading_parts(block)
+            if heading:
+                heading_tag, heading_text = heading
+                _emit_inline(doc, heading_text, doc.add_element(heading_tag, parent))
+
 
+def _emit_inline(doc: FlatDocument, text: str, parent: int) -> None:
+    """Append the leaves for text with inline markdown to a FlatDocument."""
+    for text_node in text_to_textnodes(text):
+        tag, value, props = text_node_to_leaf_parts(text_node)
+        doc.add_leaf(tag, value, parent, props)
 
-def _text_to_children(text: str) -> List[HTMLNode]:
-    """Convert text with inline markdown to a list of HTMLNode children."""
-    text_nodes = text_to_textnodes(text)
+
+def _text_to_children(text: str, links: Optional[List[Tuple[str, str]]] = None) -> List[HTMLNode]:
+    """
+    Convert text with inline markdown to a list of HTMLNode children, collecting link URLs into links.
+    
+    Conversions are memoized by exact text, since sites repeat the same list
+    items, boilerplate paragraphs and headings across many pages. The
+    children of a repeated text are the same node objects every time, so
+    trees must not be modified after conversion.
+    """
+    children, found = _inline_cache(text)
+    if links is not None and found:
+        links.extend(found)
+    return list(children)
+
+
+def _convert_inline(text: str) -> Tuple[Tuple[HTMLNode, ...], Tuple[Tuple[str, str], ...]]:
+    """Return the children for text with inline markdown and the (tag, url) links among them."""
     children = []
-    for text_node in text_nodes:
+    links = []
+    for text_node in text_to_textnodes(text):
         html_node = text_node_to_html_node(text_node)
         children.append(html_node)
-    return children
+        if text_node.url is not None:
+            links.append((html_node.tag, text_node.url))
+    return tuple(children), tuple(links)
+
+
+_inline_cache = lru_cache(maxsize=DEFAULT_INLINE_CACHE_SIZE)(_convert_inline)
+
+
+def set_inline_cache_size(max_entries: int) -> None:
+    """Replace the inline memo with an empty one holding up to max_entries texts (0 turns it off)."""
+    global _inline_cache
+    _inline_cache = lru_cache(maxsize=max_entries)(_convert_inline)
+
 
-def _create_list_node(block: str, list_type: str) -> HTMLNode:
+def inline_cache_info() -> Tuple[int, int, Optional[int], int]:
+    """Return the inline memo's hits, misses, maxsize and currsize, as functools.lru_cache reports them."""
+    return _inline_cache.cache_info()
+
+def _create_list_node(block: str, list_type: str, links: Optional[List[Tuple[str, str]]] = None) -> HTMLNode:
     """Create a list HTMLNode (ul or ol) from a block of list items."""
-    lines = block.split('\n')
     list_items = []
     
-    for line in lines:
-        # Remove prefix based on list type
-        if list_type == "ul":
-            item_text = line.strip("- ").strip()
-        else:  # ol
-            item_text = re.sub(r'^\d+\. ', '', line).strip()
-        
+    for item_text in _list_item_texts(block, list_type):
         # Process inline markdown for each list item
-        children = _text_to_children(item_text)
+        children = _text_to_children(item_text, links)
         
         # Create li element for this item
         li_node = HTMLNode("li", children=children)
@@ -168,6 +353,69 @@ def _create_list_node(block: str, list_type: str) -> HTMLNode:
     return HTMLNode(list_type, children=list_items)
 
 
+# Block content extraction, shared by the tree and flat document builders
+def _paragraph_text(block: str) -> str:
+    """Return a paragraph's inline text, with newlines replaced by spaces."""
+    return block.replace('\n', ' ')
+
+
+def _code_content(block: str) -> str:
+    """Return a code block's raw content without the ``` markers."""
+    # Remove the ``` markers but preserve internal whitespace/newlines
+    delimiter_length = len(CODE_BLOCK_DELIMITER)
+    code_content = block[delimiter_length:-delimiter_length]
+    # Remove leading newline if present, but preserve trailing newlines
+    if code_content.startswith('\n'):
+        code_content = code_content[1:]
+    return code_content
+
+
+def _quote_text(block: str) -> str:
+    """Return a quote's inline text with the > markers removed."""
+    lines = block.split('\n')
+    content = list(map(lambda line: line.strip("> "), lines))
+    return '\n'.join(content)
+
+
+def _heading_parts(block: str) -> Optional[Tuple[str, str]]:
+    """Return (heading tag, heading text) for a heading block, e.g. ("h2", "Title")."""
+    heading_match = HEADING_PATTERN.match(block)
+    if not heading_match:
+        return None
+    # Count # symbols to determine heading level
+    heading_level = len(heading_match.group(1))
+    return f"h{heading_level}", heading_match.group(2)
+
+
+def _list_item_texts(block: str, list_type: str) -> List[str]:
+    """Return the inline text of each item in a ul or ol block."""
+    item_texts = []
+    for line in block.split('\n'):
+        # Remove prefix based on list type
+        if list_type == "ul":
+            item_texts.append(line.strip("- ").strip())
+        else:  # ol
+            item_match = ORDERED_LIST_ITEM_PATTERN.match(line)
+            item_texts.append(line[item_match.end():].strip() if item_match else line.strip())
+    return item_texts
+
+
+def _iter_lines(markdown: Union[str, TextIO, Iterable[str]]) -> Iterator[str]:
+    """Yield lines without their trailing newline, from a string or a line iterable."""
+    if isinstance(markdown, str):
+        # Walk the string by index rather than materializing split("\\n")
+        start = 0
+        while True:
+            end = markdown.find("\n", start)
+            if end == -1:
+                yield markdown[start:]
+                return
+            yield markdown[start:end]
+            start = end + 1
+    for line in markdown:
+        yield line[:-1] if line.endswith("\n") else line
+
+
 def _clean_block(block: str) -> str:
     """
     Clean a markdown block by removing extra whitespace.
@@ -179,4 +427,4 @@ def _clean_block(block: str) -> str:
     cleaned = block.strip("\n").strip()
     
     # Normalize internal whitespace: replace newline + spaces with just newline
-    return re.sub(r'\n\s+', '\n', cleaned)
\ No newline at end of file
+    return INDENTED_NEWLINE_PATTERN.sub('\n', cleaned)
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Persistent index of page metadata.
+
+The index maps every page under a content directory to its front matter,
+remembering the mtime and size of the file it was read from. A build asks
+the index for each page's metadata; pages that haven't changed since the
+last build are answered from the index with one stat, and only changed
+pages have their header read again. Listing, tag and archive pages can then
+be put together from pages(), tags() and archive() without opening a single
+markdown file.
+
+The index file is loaded on first use and written back by save() only if
+something changed.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from frontmatter import read_page_metadata
+
+INDEX_PATH = os.path.join(".cache", "metadata.json")
+INDEX_VERSION = 1
+
+
+class MetadataIndex:
+    """
+    Front matter of every page under a content directory, keyed by relative path.
+
+    Examples:
+        index = MetadataIndex("content")
+        index.get("content/blog/post.md") -> {"title": "Post", "tags": ["news"]}
+        index.tags() -> {"news": ["blog/post.md"]}
+        index.save()
+
+    Attributes:
+        content_dir: Directory the indexed pages live in
+        path: Index file, or None to keep the index in memory only
+    """
+
+    def __init__(self, content_dir: str, path: Optional[str] = INDEX_PATH) -> None:
+        self.content_dir = content_dir
+        self.path = path
+        self._entries: Optional[Dict[str, List[Any]]] = None
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def get(self, source_path: str) -> Dict[str, Any]:
+        """Return the metadata of the page at source_path, reading its header only if it changed."""
+        entries = self._load()
+        rel = os.path.relpath(source_path, self.content_dir)
+        st = os.stat(source_path)
+        entry = entries.get(rel)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return entry[2]
+        metadata = read_page_metadata(source_path)
+        entries[rel] = [st.st_mtime_ns, st.st_size, metadata]
+        self._dirty = True
+        return metadata
+
+    def discard(self, source_path: str) -> None:
+        """Forget a page that no longer exists, or every page under a directory that doesn't."""
+        entries = self._load()
+        rel = os.path.relpath(source_path, self.content_dir)
+        gone = [key for key in entries if key == rel or key.startswith(rel + os.sep)]
+        for key in gone:
+            del entries[key]
+        if gone:
+            self._dirty = True
+
+    def retain(self, source_paths: Iterable[str]) -> int:
+        """
+        Forget every page not in source_paths.
+
+        Returns:
+            Number of pages forgotten
+        """
+        entries = self._load()
+        keep = {os.path.relpath(path, self.content_dir) for path in source_paths}
+        gone = [rel for rel in entries if rel not in keep]
+        for rel in gone:
+            del entries[rel]
+        if gone:
+            self._dirty = True
+        return len(gone)
+
+    def pages(self, drafts: bool = False) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Return (relative path, metadata) for the indexed pages, newest first.
+
+        Pages without a date come last, in path order.
+        """
+        listed = [(rel, entry[2]) for rel, entry in self._load().items() if drafts or not entry[2].get("draft")]
+        listed.sort(key=lambda item: item[0])
+        listed.sort(key=lambda item: str(item[1].get("date", "")), reverse=True)
+        return listed
+
+    def tags(self) -> Dict[str, List[str]]:
+        """Return each tag mapped to the pages carrying it, newest first."""
+        tagged: Dict[str, List[str]] = {}
+        for rel, metadata in self.pages():
+            for tag in metadata.get("tags", ()):
+                tagged.setdefault(tag, []).append(rel)
+        return dict(sorted(tagged.items()))
+
+    def archive(self) -> Dict[str, List[str]]:
+        """Return each year (the first four characters of a page's date) mapped to its pages, newest first."""
+        years: Dict[str, List[str]] = {}
+        for rel, metadata in self.pages():
+            date = str(metadata.get("date", ""))
+            if date:
+                years.setdefault(date[:4], []).append(rel)
+        return years
+
+    def save(self) -> bool:
+        """
+        Write the index back if it changed.
+
+        Returns:
+            Whether anything was written
+        """
+        if self.path is None or not self._dirty:
+            return False
+        index = {
+            "version": INDEX_VERSION,
+            "content": os.path.abspath(self.content_dir),
+            "pages": self._entries,
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        return True
+
+    def _load(self) -> Dict[str, List[Any]]:
+        """Return the entries, reading the index file the first time they're needed."""
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        if self.path is None:
+            return self._entries
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return self._entries
+        if index.get("version") == INDEX_VERSION and index.get("content") == os.path.abspath(self.content_dir):
+            self._entries = index["pages"]
+        return self._entries
@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from htmlnode import HTMLNode
 
 
@@ -15,6 +15,8 @@ class ParentNode(HTMLNode):
         ParentNode("section", [child1, child2], {"class": "container"}) -> <section class="container">...</section>
     """
     
+    __slots__ = ()
+    
     def __init__(self, tag: str, children: List[HTMLNode], props: Optional[Dict[str, str]] = None) -> None:
         """
         Initialize a ParentNode.
@@ -26,12 +28,13 @@ class ParentNode(HTMLNode):
         """
         super().__init__(tag, None, children, props)
 
-    def to_html(self) -> str:
+    def _html_parts(self) -> Tuple[str, Optional[List[HTMLNode]], str]:
         """
-        Convert this ParentNode to an HTML string representation.
+        Describe how this ParentNode renders (see HTMLNode.to_html / iter_html).
         
         Returns:
-            HTML string representation with all child nodes rendered inside the parent tag
+            The opening tag with props, the children to render inside it, and
+            the closing tag
             
         Raises:
             ValueError: If the node has no tag or no children
@@ -48,10 +51,4 @@ class ParentNode(HTMLNode):
         if self.children is None or self.children == []:
             raise ValueError("ParentNode requires at least one child")
         
-        # Generate HTML for all children
-        child_html = ""
-        for child in self.children:
-            child_html += child.to_html()
-            
-        # Generate complete HTML with tag, props, and children
-        return f"<{self.tag}{self.props_to_html()}>{child_html}</{self.tag}>"
\ No newline at end of file
+        return f"<{self.tag}{self.props_to_html()}>", self.children, f"</{self.tag}>"
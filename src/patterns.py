@@ -0,0 +1,19 @@
+"""
+Compiled regular expressions shared by the block and inline markdown parsers.
+
+Every pattern is compiled once at import time, so the parsers never pay for
+pattern construction or a trip through the re module's cache per line.
+"""
+
+import re
+
+# Inline syntax
+INLINE_TOKEN_PATTERN = re.compile(r"\*\*|_|`|!?\[")  # Anything that can open an inline span
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+# Block syntax
+HEADING_PATTERN = re.compile(r"^(#{1,6}) (.+)")
+CODE_BLOCK_PATTERN = re.compile(r"^```[\s\S]*```$")
+ORDERED_LIST_ITEM_PATTERN = re.compile(r"([1-9]\d*)\. ")  # Item number is checked as an int
+INDENTED_NEWLINE_PATTERN = re.compile(r"\n\s+")
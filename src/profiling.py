@@ -0,0 +1,193 @@
+"""
+Build profiling.
+
+enable() swaps the functions behind each build stage for timed wrappers,
+wherever they have been imported, and disable() puts the originals back.
+Nothing is wrapped until enable() is called, so a normal build pays nothing
+for profiling being available.
+
+Stage times are exclusive: when one timed function calls another of a
+different stage, the inner call is only counted towards its own stage. A
+timed function called from one of the same stage (markdown_to_blocks
+draining iter_blocks) is part of the outer call and isn't counted again. Timings accumulate in this process until drain()
+hands them over, which is how worker processes send theirs back to the
+Profile that reports on the whole build.
+"""
+
+import importlib
+import inspect
+import sys
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+# Stage name -> functions timed as part of it, as (module, attribute path)
+STAGES: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    "blocks": (("markdown", "markdown_to_blocks"), ("markdown", "iter_blocks")),
+    "classify": (("markdown", "block_to_block_type"),),
+    "inline": (("textnode", "text_to_textnodes"),),
+    "convert": (("textnode", "text_node_to_html_node"), ("textnode", "text_node_to_leaf_parts")),
+    "serialize": (
+        ("htmlnode", "HTMLNode.to_html"),
+        ("htmlnode", "HTMLNode.write_html"),
+        ("flatdoc", "FlatDocument.to_html"),
+    ),
+    "copy": (("make_public", "distribute"),),
+}
+
+DEFAULT_TOP_PAGES = 10
+
+# Stage name -> [wall seconds, cpu seconds, calls] since the last drain()
+_stats: Dict[str, List[float]] = {}
+# Stage of each running timed call and the time spent in its timed callees, innermost last
+_stack: List[Tuple[str, List[float]]] = []
+# (namespace, attribute, original) for every reference enable() replaced
+_patched: List[Tuple[Any, str, Any]] = []
+
+
+def enable() -> None:
+    """Start timing the build stages. Calling it again is a no-op."""
+    if _patched:
+        return
+    for stage, targets in STAGES.items():
+        for module_name, path in targets:
+            owner = importlib.import_module(module_name)
+            *owner_path, name = path.split(".")
+            for attr in owner_path:
+                owner = getattr(owner, attr)
+            original = owner.__dict__[name]
+            wrapper = _wrap(stage, original)
+            if owner_path:
+                _patch(owner, name, original, wrapper)
+                continue
+            # `from module import *` copies functions around, so replace every reference
+            for module in list(sys.modules.values()):
+                namespace = getattr(module, "__dict__", None)
+                if namespace is not None and namespace.get(name) is original:
+                    _patch(module, name, original, wrapper)
+
+
+def disable() -> None:
+    """Put back every function enable() wrapped."""
+    while _patched:
+        owner, name, original = _patched.pop()
+        setattr(owner, name, original)
+
+
+def is_enabled() -> bool:
+    """Return whether the stages are currently being timed."""
+    return bool(_patched)
+
+
+def drain() -> Dict[str, List[float]]:
+    """Return the stage timings gathered so far and start over from zero."""
+    stats = dict(_stats)
+    _stats.clear()
+    return stats
+
+
+def init_worker(enabled: bool) -> None:
+    """
+    Set up profiling in a forked worker process.
+
+    The worker starts with a copy of the parent's undrained timings, which the
+    parent reports itself, so they are dropped before anything is timed here.
+    """
+    drain()
+    if enabled:
+        enable()
+
+
+class Profile:
+    """
+    Stage timings and page render times for a whole build.
+
+    Attributes:
+        stages: Stage name -> [wall seconds, cpu seconds, calls]
+        pages: (seconds, source path) for every rendered page
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, List[float]] = {}
+        self.pages: List[Tuple[float, str]] = []
+
+    def merge(self, stats: Dict[str, List[float]]) -> None:
+        """Add stage timings returned by drain(), possibly in another process."""
+        for stage, values in stats.items():
+            totals = self.stages.setdefault(stage, [0.0, 0.0, 0])
+            for i, value in enumerate(values):
+                totals[i] += value
+
+    def collect(self) -> None:
+        """Merge the timings gathered in this process."""
+        self.merge(drain())
+
+    def add_page(self, path: str, seconds: float) -> None:
+        """Record how long one page took to render."""
+        self.pages.append((seconds, path))
+
+    def report(self, top: int = DEFAULT_TOP_PAGES) -> str:
+        """
+        Format a per-stage breakdown followed by the slowest pages.
+
+        Times are summed over every worker process, so with several workers
+        the stage totals can exceed the build's elapsed time.
+        """
+        lines = [f"{'stage':<12}{'wall s':>10}{'cpu s':>10}{'calls':>12}"]
+        for stage in STAGES:
+            wall, cpu, calls = self.stages.get(stage, (0.0, 0.0, 0))
+            lines.append(f"{stage:<12}{wall:>10.3f}{cpu:>10.3f}{int(calls):>12,}")
+        if self.pages and top > 0:
+            lines.append(f"Slowest {min(top, len(self.pages))} pages:")
+            for seconds, path in sorted(self.pages, reverse=True)[:top]:
+                lines.append(f"{seconds * 1000:>10.1f} ms  {path}")
+        return "\n".join(lines)
+
+
+def _patch(owner: Any, name: str, original: Any, wrapper: Any) -> None:
+    setattr(owner, name, wrapper)
+    _patched.append((owner, name, original))
+
+
+def _wrap(stage: str, func: Callable) -> Callable:
+    if inspect.isgeneratorfunction(func):
+        # Time the work done for each item, not just creating the generator
+        @wraps(func)
+        def generator_wrapper(*args, **kwargs) -> Iterator:
+            iterator = func(*args, **kwargs)
+            while True:
+                try:
+                    item = _timed(stage, next, (iterator,), {})
+                except StopIteration:
+                    return
+                yield item
+        return generator_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return _timed(stage, func, args, kwargs)
+    return wrapper
+
+
+def _timed(stage: str, func: Callable, args: tuple, kwargs: dict) -> Any:
+    if _stack and _stack[-1][0] == stage:
+        # Part of a call already timed as this stage (text_node_to_html_node
+        # calling text_node_to_leaf_parts), so it isn't a call of its own
+        return func(*args, **kwargs)
+    callees = [0.0, 0.0]
+    _stack.append((stage, callees))
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        _stack.pop()
+        totals = _stats.setdefault(stage, [0.0, 0.0, 0])
+        totals[0] += wall - callees[0]
+        totals[1] += cpu - callees[1]
+        totals[2] += 1
+        if _stack:
+            _stack[-1][1][0] += wall
+            _stack[-1][1][1] += cpu
@@ -0,0 +1,212 @@
+"""
+Atomic, staged publishing of the output directory.
+
+Instead of being rebuilt in place, the output directory is a symlink to
+one of several numbered generations kept next to it:
+
+    public -> public.generations/000042
+    public.generations/000041
+    public.generations/000042
+
+A build writes into a staging directory under public.generations. When it
+finishes, the staging directory is renamed to the next generation number
+and the public symlink is replaced with one pointing at it. Replacing the
+symlink is a single rename, so anything serving public sees either the old
+site or the new one, never a half-written one. A build that fails leaves the
+live generation untouched. Older generations are kept for instant rollback().
+
+Staging starts out as a hardlinked clone of the live generation, so an
+incremental build only rewrites what changed. That is safe because nothing
+writes into a published file in place: assets are unlinked before they are
+published and pages are written to a temporary file and renamed.
+"""
+
+import os
+import shutil
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from log import fields, logger
+from make_public import scan_tree
+
+GENERATIONS_SUFFIX = ".generations"
+STAGING_PREFIX = ".staging-"
+# Previous generations kept around for rollback
+DEFAULT_KEEP = 2
+
+
+def generations_dir(dest: str) -> str:
+    """Return the directory holding dest's generations."""
+    return os.path.normpath(dest) + GENERATIONS_SUFFIX
+
+
+def list_generations(dest: str) -> List[str]:
+    """Return the names of dest's generations, oldest first."""
+    try:
+        names = os.listdir(generations_dir(dest))
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names if name.isdigit())
+
+
+def current_generation(dest: str) -> Optional[str]:
+    """Return the name of the generation dest points at, or None if it isn't a published symlink."""
+    if not os.path.islink(dest):
+        return None
+    target = os.readlink(dest)
+    if os.path.dirname(target) != os.path.basename(generations_dir(dest)):
+        return None
+    return os.path.basename(target)
+
+
+def live_dir(dest: str) -> Optional[str]:
+    """Return the directory currently served as dest, if there is one."""
+    return dest if os.path.isdir(dest) else None
+
+
+def stage(dest: str, seed: bool = True) -> str:
+    """
+    Create a staging directory for the next generation of dest.
+
+    Args:
+        dest: Output directory (e.g. "public")
+        seed: Start from a hardlinked clone of the live site instead of an empty directory
+
+    Returns:
+        Path of the staging directory
+    """
+    root = generations_dir(dest)
+    os.makedirs(root, exist_ok=True)
+    staging = os.path.join(root, f"{STAGING_PREFIX}{os.getpid()}")
+    # Left over by a crashed build that happened to have our pid
+    shutil.rmtree(staging, ignore_errors=True)
+    live = live_dir(dest)
+    if seed and live is not None:
+        _clone_tree(live, staging)
+    else:
+        os.mkdir(staging)
+    return staging
+
+
+def commit(dest: str, staging: str, keep: int = DEFAULT_KEEP) -> str:
+    """
+    Publish a staging directory as the newest generation of dest.
+
+    A dest that is still a plain directory (built before generations were
+    used) is moved into the generations first, so it can be rolled back to;
+    that one-time move is the only moment dest doesn't exist.
+
+    Args:
+        dest: Output directory
+        staging: Directory returned by stage()
+        keep: Number of previous generations to keep
+
+    Returns:
+        Name of the new generation
+    """
+    if os.path.isdir(dest) and not os.path.islink(dest):
+        migrated = _add_generation(dest, dest)
+        logger.info("Moved %s into %s", dest, generations_dir(dest), extra=fields(generation=migrated))
+    generation = _add_generation(dest, staging)
+    _point(dest, generation)
+    prune(dest, keep)
+    logger.info("Published %s", dest, extra=fields(generation=generation))
+    return generation
+
+
+def abort(staging: str) -> None:
+    """Throw away a staging directory."""
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+@contextmanager
+def staged(dest: str, keep: int = DEFAULT_KEEP, seed: bool = True) -> Iterator[str]:
+    """
+    Yield a staging directory and publish it if the block completes.
+
+    Examples:
+        with staged("public") as out:
+            build_site("content", out)
+    """
+    staging = stage(dest, seed)
+    try:
+        yield staging
+    except BaseException:
+        abort(staging)
+        raise
+    commit(dest, staging, keep)
+
+
+def rollback(dest: str, steps: int = 1) -> str:
+    """
+    Point dest back at an older generation.
+
+    Returns:
+        Name of the generation now published
+
+    Raises:
+        ValueError: If dest isn't published from generations or there's no generation that old
+    """
+    current = current_generation(dest)
+    generations = list_generations(dest)
+    if current not in generations:
+        raise ValueError(f"{dest} is not published from {generations_dir(dest)}")
+    index = generations.index(current) - steps
+    if index < 0:
+        raise ValueError(f"No generation {steps} before {current} to roll back to")
+    _point(dest, generations[index])
+    logger.info("Rolled %s back", dest, extra=fields(generation=generations[index], was=current))
+    return generations[index]
+
+
+def prune(dest: str, keep: int = DEFAULT_KEEP) -> List[str]:
+    """
+    Delete all but the keep newest generations besides the live one.
+
+    Returns:
+        Names of the deleted generations
+    """
+    current = current_generation(dest)
+    others = [name for name in list_generations(dest) if name != current]
+    removed = others[:max(0, len(others) - keep)]
+    for name in removed:
+        shutil.rmtree(os.path.join(generations_dir(dest), name), ignore_errors=True)
+    return removed
+
+
+def _add_generation(dest: str, directory: str) -> str:
+    """Rename directory to the next free generation number and return its name."""
+    root = generations_dir(dest)
+    existing = list_generations(dest)
+    number = int(existing[-1]) + 1 if existing else 1
+    while True:
+        name = f"{number:06d}"
+        try:
+            os.rename(directory, os.path.join(root, name))
+            return name
+        except OSError:
+            # Another build took this number first
+            if not os.path.exists(os.path.join(root, name)):
+                raise
+            number += 1
+
+
+def _point(dest: str, generation: str) -> None:
+    """Atomically replace dest with a symlink to generation."""
+    target = os.path.join(os.path.basename(generations_dir(dest)), generation)
+    link = f"{os.path.normpath(dest)}.{os.getpid()}.link"
+    if os.path.lexists(link):
+        os.unlink(link)
+    os.symlink(target, link)
+    os.replace(link, dest)
+
+
+def _clone_tree(source: str, dest: str) -> None:
+    """Recreate source under dest with every file hardlinked instead of copied."""
+    dirs, files = scan_tree(source)
+    os.mkdir(dest)
+    for rel in dirs:
+        os.mkdir(os.path.join(dest, rel))
+    for rel in files:
+        # A published symlink is linked as itself, not as the file it points at
+        os.link(os.path.join(source, rel), os.path.join(dest, rel), follow_symlinks=False)
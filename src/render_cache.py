@@ -0,0 +1,139 @@
+"""
+Persistent, content-addressed cache of rendered pages.
+
+Entries are keyed by a hash of the markdown source bytes plus the renderer
+version, so an unchanged page is served from disk instead of going back
+through markdown_to_html_node. The renderer version is derived from the source
+of the rendering modules, which means editing the renderer invalidates every
+entry without anyone having to remember to bump a number. Only the layout of
+an entry, which the build decides, carries an explicit ENTRY_FORMAT number.
+
+Recency is tracked with file mtimes (a hit touches its entry), and evict()
+drops least recently used entries until the cache fits its size budget.
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_DIR = os.path.join(".cache", "render")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Modules whose code determines the HTML produced for a given markdown source,
+# plus template, which extracts the title stored with it, and frontmatter,
+# which decides where the body starts and which title wins
+RENDERER_MODULES = ("markdown", "textnode", "patterns", "htmlnode", "leafnode", "parentnode", "template", "frontmatter")
+
+# Layout of an entry: a JSON line of page metadata (title, links), then the
+# HTML. Bump it when pack_entry() or what the build puts in the metadata changes.
+ENTRY_FORMAT = 1
+
+ENTRY_EXTENSION = ".html"
+
+
+@lru_cache(maxsize=1)
+def renderer_version() -> str:
+    """Return a digest of the rendering modules' source code and the entry format."""
+    digest = hashlib.sha256(f"format {ENTRY_FORMAT}\n".encode("ascii"))
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in RENDERER_MODULES:
+        with open(os.path.join(src_dir, f"{name}.py"), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    On-disk cache mapping markdown sources to their rendered HTML.
+
+    Entries are stored as <cache_dir>/<key[:2]>/<key>.html and written
+    atomically, so several build processes can share one cache directory.
+
+    Attributes:
+        cache_dir: Directory holding the cache entries
+        max_bytes: Size budget enforced by evict()
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, source: bytes) -> str:
+        """Return the cache key for a markdown source."""
+        digest = hashlib.sha256(renderer_version().encode("ascii"))
+        digest.update(source)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached HTML for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # Mark the entry as recently used for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, html: bytes) -> None:
+        """Store rendered HTML under key."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+
+    def evict(self) -> int:
+        """
+        Delete least recently used entries until the cache fits in max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = []
+        total = 0
+        for root, _, file_names in os.walk(self.cache_dir):
+            for name in file_names:
+                if not name.endswith(ENTRY_EXTENSION):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, path))
+                total += st.st_size
+
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ENTRY_EXTENSION)
+
+
+def pack_entry(meta: Dict[str, Any], html: bytes) -> bytes:
+    """Return a cache entry: the page's metadata as a JSON line, then its HTML."""
+    return json.dumps(meta).encode("utf-8") + b"\n" + html
+
+
+def unpack_entry(entry: bytes) -> Tuple[Dict[str, Any], bytes]:
+    """Split a cache entry into its metadata and HTML."""
+    header, _, html = entry.partition(b"\n")
+    return json.loads(header), html
@@ -0,0 +1,141 @@
+"""
+Page templates.
+
+A template is an HTML file with {{ Name }} placeholders, typically
+
+    <title>{{ Title }}</title>
+    ...
+    <article>{{ Content }}</article>
+
+load_template() parses a file once into a Template: the literal text
+between placeholders and the placeholder names, alternating in one list.
+Filling it in for a page is a copy of that list with the values dropped into
+the placeholder slots and a join, so wrapping thousands of pages never scans
+the template text again. Parsed templates are kept in memory keyed by path
+and checked against the file's mtime and size, so an edited template is
+picked up by the next page that uses it.
+
+Placeholders with no value for a page render as an empty string.
+"""
+
+import html
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple, Union
+
+from htmlnode import HTMLNode
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# Used when the command line doesn't name a template and this file exists
+DEFAULT_TEMPLATE = "template.html"
+
+TITLE = "Title"
+CONTENT = "Content"
+
+_templates: Dict[str, Tuple[Tuple[int, int], "Template"]] = {}
+_lock = threading.Lock()
+
+
+class Template:
+    """
+    A parsed template.
+
+    Attributes:
+        parts: Literal text and placeholder names, alternating; even indices
+            are literals and odd indices are names
+        names: Placeholder names in order of appearance
+    """
+
+    __slots__ = ("parts", "names")
+
+    def __init__(self, text: str) -> None:
+        self.parts: List[str] = PLACEHOLDER_PATTERN.split(text)
+        self.names: List[str] = self.parts[1::2]
+
+    def render(self, values: Dict[str, str]) -> str:
+        """Return the template with every placeholder replaced by its value."""
+        parts = self.parts.copy()
+        for index in range(1, len(parts), 2):
+            parts[index] = values.get(parts[index], "")
+        return "".join(parts)
+
+    def write(self, stream: TextIO, values: Dict[str, Union[str, HTMLNode]]) -> None:
+        """
+        Write the filled in template to stream.
+
+        Values may be nodes, which write their HTML straight into the stream
+        instead of being rendered to a string first.
+        """
+        for index, part in enumerate(self.parts):
+            if index % 2 == 0:
+                stream.write(part)
+                continue
+            value = values.get(part, "")
+            if isinstance(value, HTMLNode):
+                value.write_html(stream)
+            else:
+                stream.write(value)
+
+
+def load_template(path: str) -> Template:
+    """
+    Return the parsed template at path, parsing it only if it changed since the last call.
+
+    Raises:
+        OSError: If the template can't be read
+    """
+    st = os.stat(path)
+    version = (st.st_mtime_ns, st.st_size)
+    key = os.path.abspath(path)
+    with _lock:
+        cached = _templates.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        template = Template(f.read())
+    with _lock:
+        _templates[key] = (version, template)
+    return template
+
+
+def template_version(path: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Return the (mtime_ns, size) of a template file, or None if there's no template."""
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def page_values(title: Optional[str], content: Union[str, HTMLNode]) -> Dict[str, Union[str, HTMLNode]]:
+    """Return the placeholder values for a page with the given title and content."""
+    return {TITLE: html.escape(title or "", quote=False), CONTENT: content}
+
+
+def page_title(metadata: Dict[str, Any], node: HTMLNode) -> Optional[str]:
+    """Return a page's title: the one in its front matter, else its first heading."""
+    title = metadata.get("title")
+    return str(title) if title else extract_title(node)
+
+
+def extract_title(node: HTMLNode) -> Optional[str]:
+    """Return the plain text of the first top-level <h1> in a rendered page, or None."""
+    for child in node.children or ():
+        if child.tag == "h1":
+            return "".join(_iter_text(child))
+    return None
+
+
+def _iter_text(node: HTMLNode) -> Iterable[str]:
+    """Yield the text of every leaf under node, in document order."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.children:
+            stack.extend(reversed(current.children))
+        elif current.value:
+            yield current.value
@@ -0,0 +1,172 @@
+import os
+import tempfile
+import unittest
+
+import profiling
+from build import *
+from links import LinkGraph
+from markdown import markdown_to_html_node
+from metadata import MetadataIndex
+from profiling import Profile
+from render_cache import RenderCache
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+class TestBuildSite(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self._tmp.name, "content")
+        self.dest = os.path.join(self._tmp.name, "public")
+        _write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome **home**")
+        _write(os.path.join(self.content, "notes.txt"), "not markdown")
+        for i in range(20):
+            _write(os.path.join(self.content, "blog", f"post{i}.md"), f"Post _{i}_")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_find_pages_maps_paths(self):
+        jobs = find_pages(self.content, self.dest)
+        self.assertEqual(len(jobs), 21)
+        self.assertIn(
+            (os.path.join(self.content, "index.md"), os.path.join(self.dest, "index.html")),
+            jobs,
+        )
+
+    def test_build_renders_every_page(self):
+        stats = build_site(self.content, self.dest, workers=1)
+        self.assertEqual(stats["pages"], 21)
+        self.assertEqual(
+            _read(os.path.join(self.dest, "index.html")),
+            "<div><h1>Home</h1><p>Welcome <b>home</b></p></div>",
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "notes.html")))
+
+    def test_build_with_process_pool(self):
+        stats = build_site(self.content, self.dest, workers=2)
+        self.assertEqual(stats["pages"], 21)
+        self.assertEqual(
+            _read(os.path.join(self.dest, "blog", "post7.html")),
+            "<div><p>Post <i>7</i></p></div>",
+        )
+
+    def test_unchanged_pages_come_from_cache(self):
+        cache = RenderCache(os.path.join(self._tmp.name, "cache"))
+        first = build_site(self.content, self.dest, workers=1, cache=cache)
+        self.assertEqual(first["cached"], 0)
+        _write(os.path.join(self.content, "index.md"), "# Changed")
+        second = build_site(self.content, self.dest, workers=2, cache=cache)
+        self.assertEqual(second["cached"], 20)
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), "<div><h1>Changed</h1></div>")
+        self.assertEqual(
+            _read(os.path.join(self.dest, "blog", "post3.html")),
+            "<div><p>Post <i>3</i></p></div>",
+        )
+
+    def test_build_with_profile(self):
+        profile = Profile()
+        profiling.enable()
+        try:
+            stats = build_site(self.content, self.dest, workers=2, profile=profile)
+        finally:
+            profiling.disable()
+        self.assertEqual(stats["pages"], 21)
+        self.assertEqual(len(profile.pages), 21)
+        self.assertEqual(profile.stages["classify"][2], 22)  # index.md has two blocks
+        self.assertEqual(
+            _read(os.path.join(self.dest, "blog", "post7.html")),
+            "<div><p>Post <i>7</i></p></div>",
+        )
+
+    def test_profile_ignores_timings_inherited_by_workers(self):
+        profile = Profile()
+        profiling.enable()
+        try:
+            # Undrained timings in the parent are copied into every forked worker
+            markdown_to_html_node("Not part of the build")
+            stats = build_site(self.content, self.dest, workers=2, profile=profile)
+        finally:
+            profiling.disable()
+            profiling.drain()
+        self.assertEqual(stats["pages"], 21)
+        self.assertEqual(profile.stages["classify"][2], 22)
+
+    def test_pages_wrapped_in_template(self):
+        template = os.path.join(self._tmp.name, "template.html")
+        _write(template, "<title>{{ Title }}</title>{{ Content }}")
+        cache = RenderCache(os.path.join(self._tmp.name, "cache"))
+        build_site(self.content, self.dest, workers=1, template=template)
+        expected = "<title>Home</title><div><h1>Home</h1><p>Welcome <b>home</b></p></div>"
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), expected)
+
+        build_site(self.content, self.dest, workers=1, cache=cache, template=template)
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), expected)
+        # A new template is applied to cached pages without rendering them again
+        _write(template, "<main>{{ Content }}</main>")
+        stats = build_site(self.content, self.dest, workers=2, cache=cache, template=template)
+        self.assertEqual(stats["cached"], 21)
+        self.assertEqual(
+            _read(os.path.join(self.dest, "blog", "post3.html")),
+            "<main><div><p>Post <i>3</i></p></div></main>",
+        )
+
+    def test_front_matter_and_drafts(self):
+        template = os.path.join(self._tmp.name, "template.html")
+        _write(template, "<title>{{ Title }}</title>{{ Content }}")
+        _write(os.path.join(self.content, "index.md"), "---\ntitle: Front\n---\n# Home")
+        build_site(self.content, self.dest, workers=1, template=template)
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), "<title>Front</title><div><h1>Home</h1></div>")
+
+        cache = RenderCache(os.path.join(self._tmp.name, "cache"))
+        index = MetadataIndex(self.content, os.path.join(self._tmp.name, "metadata.json"))
+        _write(os.path.join(self.content, "blog", "post3.md"), "---\ndraft: true\n---\nPost _3_")
+        stats = build_site(self.content, self.dest, workers=1, cache=cache, template=template, index=index)
+        self.assertEqual(stats["pages"], 20)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post3.html")))
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), "<title>Front</title><div><h1>Home</h1></div>")
+        self.assertEqual(len(index.pages()), 20)
+
+    def test_collects_link_graph(self):
+        _write(os.path.join(self.content, "index.md"), "# Home\n\n[First](blog/post0) ![logo](/logo.png)")
+        cache = RenderCache(os.path.join(self._tmp.name, "cache"))
+        for workers, hits in ((1, 0), (2, 21)):
+            graph = LinkGraph()
+            stats = build_site(self.content, self.dest, workers=workers, cache=cache, links=graph)
+            self.assertEqual(stats["cached"], hits)
+            self.assertEqual(graph.pages["index.html"], [("a", "blog/post0"), ("img", "/logo.png")])
+            self.assertEqual(graph.pages["blog/post3.html"], [])
+        graph = LinkGraph()
+        build_site(self.content, self.dest, workers=1, links=graph)
+        self.assertEqual(len(graph), 2)
+
+    def test_remove_stale_pages(self):
+        static = os.path.join(self._tmp.name, "static")
+        _write(os.path.join(static, "about.html"), "static page")
+        _write(os.path.join(self.dest, "about.html"), "static page")
+        build_site(self.content, self.dest, workers=1)
+        os.remove(os.path.join(self.content, "index.md"))
+        _write(os.path.join(self.dest, "old", "gone", "page.html"), "gone")
+        self.assertEqual(remove_stale_pages(self.content, self.dest, static), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "old")))
+        self.assertEqual(_read(os.path.join(self.dest, "about.html")), "static page")
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog", "post3.html")))
+        self.assertEqual(remove_stale_pages(os.path.join(self._tmp.name, "nope"), self.dest), 0)
+
+    def test_missing_content_dir(self):
+        stats = build_site(os.path.join(self._tmp.name, "nope"), self.dest)
+        self.assertEqual(stats["pages"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
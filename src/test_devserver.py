@@ -0,0 +1,155 @@
+import asyncio
+import http.client
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from devserver import *
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self._tmp.name, "content")
+        self.static = os.path.join(self._tmp.name, "static")
+        _write(os.path.join(self.content, "index.md"), "# Home")
+        _write(os.path.join(self.content, "blog", "post.md"), "A **post**")
+        _write(os.path.join(self.content, "blog", "index.md"), "Blog")
+        _write(os.path.join(self.static, "style.css"), "body { color: red; }")
+        _write(os.path.join(self._tmp.name, "secret.txt"), "secret")
+
+        self.server = DevServer(self.content, self.static, port=0, cache_entries=2, poll_interval=0.01)
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.server.start())
+            started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        started.wait(5)
+
+    def tearDown(self):
+        asyncio.run_coroutine_threadsafe(self.server.close(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+        self._tmp.cleanup()
+
+    def _get(self, path, method="GET"):
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        try:
+            connection.request(method, path)
+            response = connection.getresponse()
+            return response.status, response.getheader("Content-Type"), response.read()
+        finally:
+            connection.close()
+
+    def test_renders_pages_on_request(self):
+        status, content_type, body = self._get("/blog/post")
+        self.assertEqual(status, 200)
+        self.assertEqual(content_type, "text/html; charset=utf-8")
+        self.assertTrue(body.startswith(b"<div><p>A <b>post</b></p></div><script>"))
+        self.assertEqual(self._get("/blog/post.html")[2], body)
+        self.assertTrue(self._get("/")[2].startswith(b"<div><h1>Home</h1></div>"))
+        self.assertTrue(self._get("/blog/")[2].startswith(b"<div><p>Blog</p></div>"))
+
+    def test_pages_are_cached_until_edited(self):
+        self._get("/blog/post")
+        self._get("/blog/post")
+        self.assertEqual((self.server.pages.hits, self.server.pages.misses), (1, 1))
+        _write(os.path.join(self.content, "blog", "post.md"), "An _edited_ post")
+        self.assertIn(b"<i>edited</i>", self._get("/blog/post")[2])
+
+    def test_pages_wrapped_in_template(self):
+        template = os.path.join(self._tmp.name, "template.html")
+        _write(template, "<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.server.template = template
+        self.assertEqual(
+            self._get("/")[2].decode(),
+            "<title>Home</title><body><div><h1>Home</h1></div>" + LIVE_RELOAD_SCRIPT + "</body>",
+        )
+        _write(template, "<main>{{ Content }}</main><body></body>")
+        os.utime(template, ns=(0, 0))
+        self.assertTrue(self._get("/")[2].startswith(b"<main><div><h1>Home</h1></div></main>"))
+
+    def test_page_cache_evicts_least_recently_used(self):
+        cache = PageCache(max_entries=2)
+        cache.put("a", (1, 1), b"a")
+        cache.put("b", (1, 1), b"b")
+        cache.get("a", (1, 1))
+        cache.put("c", (1, 1), b"c")
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b", (1, 1)))
+        self.assertEqual(cache.get("a", (1, 1)), b"a")
+        self.assertIsNone(cache.get("a", (2, 1)))
+
+    def test_serves_static_files(self):
+        status, content_type, body = self._get("/style.css")
+        self.assertEqual((status, content_type, body), (200, "text/css", b"body { color: red; }"))
+        status, _, body = self._get("/style.css", method="HEAD")
+        self.assertEqual((status, body), (200, b""))
+
+    def test_missing_and_outside_paths(self):
+        self.assertEqual(self._get("/nope")[0], 404)
+        self.assertEqual(self._get("/../secret.txt")[0], 404)
+        self.assertEqual(self._get("/%2e%2e/secret.txt")[0], 404)
+        self.assertEqual(self._get("/", method="POST")[0], 405)
+
+    def test_render_failure_serves_reloading_error_page(self):
+        _write(os.path.join(self.content, "blog", "post.md"), "A **broken")
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        try:
+            connection.request("GET", "/blog/post")
+            response = connection.getresponse()
+            body = response.read()
+            self.assertEqual(response.status, 500)
+            self.assertIn(b"Invalid Markdown", body)
+            self.assertIn(LIVE_RELOAD_SCRIPT.encode(), body)
+            # The connection stays usable
+            _write(os.path.join(self.content, "blog", "post.md"), "A **fixed** post")
+            connection.request("GET", "/blog/post")
+            response = connection.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertIn(b"<b>fixed</b>", response.read())
+        finally:
+            connection.close()
+
+    def test_keep_alive(self):
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        try:
+            for _ in range(3):
+                connection.request("GET", "/style.css")
+                self.assertEqual(connection.getresponse().read(), b"body { color: red; }")
+        finally:
+            connection.close()
+
+    def test_live_reload_event_on_change(self):
+        with socket.create_connection(("127.0.0.1", self.server.port), timeout=5) as sock:
+            sock.sendall(f"GET {LIVE_RELOAD_PATH} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            received = b""
+            while b": connected" not in received:
+                received += sock.recv(4096)
+            self.assertIn(b"text/event-stream", received)
+            time.sleep(0.05)
+            page = os.path.join(self.content, "blog", "post.md")
+            _write(page, "Changed and longer")
+            while b"\n\n" not in received.split(b": connected\n\n", 1)[1]:
+                received += sock.recv(4096)
+        self.assertIn(f"event: reload\ndata: {os.path.abspath(page)}\n\n".encode(), received)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from flatdoc import *
+from leafnode import LeafNode
+from parentnode import ParentNode
+from markdown import markdown_to_html_node, markdown_to_flat_document
+
+
+class TestFlatDocument(unittest.TestCase):
+    def test_build_and_render(self):
+        doc = FlatDocument()
+        div = doc.add_element("div")
+        p = doc.add_element("p", div)
+        doc.add_leaf(None, "Hello ", p)
+        doc.add_leaf("a", "world", p, {"href": "/world"})
+        doc.add_leaf("b", "!", div)
+        self.assertEqual(len(doc), 5)
+        self.assertEqual(doc.to_html(), '<div><p>Hello <a href="/world">world</a></p><b>!</b></div>')
+
+    def test_text_shares_one_buffer(self):
+        doc = FlatDocument()
+        div = doc.add_element("div")
+        doc.add_leaf(None, "one", div)
+        doc.add_leaf("i", "two", div)
+        self.assertEqual(doc.buffer, "onetwo")
+        self.assertEqual(list(doc.text_starts), [-1, 0, 3])
+
+    def test_identical_props_are_interned(self):
+        doc = FlatDocument()
+        div = doc.add_element("div")
+        for _ in range(3):
+            doc.add_leaf("a", "home", div, {"href": "/"})
+        self.assertEqual(len(doc.props_table), 1)
+        self.assertEqual(list(doc.props)[1:], [0, 0, 0])
+
+    def test_from_node(self):
+        node = ParentNode("div", [
+            ParentNode("ul", [LeafNode("li", "one"), LeafNode("li", "two")], {"class": "list"}),
+            LeafNode(None, "tail"),
+        ])
+        self.assertEqual(FlatDocument.from_node(node).to_html(), node.to_html())
+
+    def test_markdown_matches_tree(self):
+        md = """# Heading with **bold**
+
+Paragraph with a [link](https://boot.dev) and ![image](/img.png)
+
+> quoted _text_
+
+- item one
+- item `two`
+
+1. first
+2. second
+
+```
+code _stays_ raw
+```"""
+        self.assertEqual(markdown_to_flat_document(md).to_html(), markdown_to_html_node(md).to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
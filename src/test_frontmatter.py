@@ -0,0 +1,54 @@
+import io
+import os
+import tempfile
+import unittest
+
+from frontmatter import *
+
+PAGE = "---\ntitle: Hello\ndate: 2024-03-01\ntags: [a, \"b c\"]\ndraft: true\n---\n# Body\n\ntext\n"
+META = {"title": "Hello", "date": "2024-03-01", "tags": ["a", "b c"], "draft": True}
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split_front_matter(self):
+        self.assertEqual(split_front_matter(PAGE), (META, "# Body\n\ntext\n"))
+
+    def test_read_front_matter_leaves_body_unread(self):
+        stream = io.StringIO(PAGE)
+        metadata, lines = read_front_matter(stream)
+        self.assertEqual(metadata, META)
+        self.assertEqual(stream.readline(), "# Body\n")
+        self.assertEqual(list(lines), ["\n", "text\n"])
+
+    def test_no_front_matter(self):
+        for text in ("# Title\n\nbody", "---\ntitle: never closed\n\nbody", ""):
+            self.assertEqual(split_front_matter(text), ({}, text))
+            metadata, lines = read_front_matter(io.StringIO(text))
+            self.assertEqual((metadata, "".join(lines)), ({}, text))
+
+    def test_header_longer_than_limit_is_markdown(self):
+        text = "---\n" + "x: 1\n" * (MAX_HEADER_LINES + 1) + "---\nbody"
+        self.assertEqual(split_front_matter(text), ({}, text))
+        metadata, lines = read_front_matter(io.StringIO(text))
+        self.assertEqual((metadata, "".join(lines)), ({}, text))
+
+    def test_front_matter_at_end_of_file(self):
+        self.assertEqual(split_front_matter("---\ntitle: Only\n---"), ({"title": "Only"}, ""))
+
+    def test_parse_fields(self):
+        self.assertEqual(
+            parse_fields(["Title: 'Quoted: yes'", "# comment", "", "tags: x, y", "draft: false", "junk"]),
+            {"title": "Quoted: yes", "tags": ["x", "y"], "draft": False},
+        )
+        self.assertEqual(parse_fields(["tags:"]), {"tags": []})
+
+    def test_read_page_metadata(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, "w") as f:
+                f.write(PAGE)
+            self.assertEqual(read_page_metadata(path), META)
+
+
+if __name__ == "__main__":
+    unittest.main()
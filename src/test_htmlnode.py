@@ -34,6 +34,36 @@ class TestHTMLNode(unittest.TestCase):
         html1 = HTMLNode(None, None, None, {"class": "p-8", "target": "_blank"}).props_to_html()
         html2 = HTMLNode(None, None, None, {"class": "p-8", "target": "_blank"}).props_to_html()
         self.assertEqual(html1, html2)
+        self.assertEqual(html1, ' class="p-8" target="_blank"')
+
+    def test_props_to_html_escapes_values(self):
+        node = HTMLNode("a", "link", None, {"href": '/search?q="a"&b=<c>', "title": "it's"})
+        self.assertEqual(
+            node.props_to_html(),
+            ' href="/search?q=&quot;a&quot;&amp;b=&lt;c&gt;" title="it&#x27;s"',
+        )
+
+    def test_props_to_html_shared_and_mutable(self):
+        props = {"href": "/"}
+        node = HTMLNode("a", "home", None, props)
+        other = HTMLNode("a", "home", None, {"href": "/"})
+        self.assertIs(node.props_to_html(), other.props_to_html())
+        props["href"] = "/about"
+        self.assertEqual(node.props_to_html(), ' href="/about"')
+        self.assertEqual(other.props_to_html(), ' href="/"')
+
+    def test_render_props_keeps_value_types_apart(self):
+        self.assertEqual(render_props({"data-n": 1}), ' data-n="1"')
+        self.assertEqual(render_props({"data-n": True}), ' data-n="True"')
+        self.assertEqual(render_props({"data-n": 1.0}), ' data-n="1.0"')
+
+    def test_render_props_none(self):
+        self.assertEqual(render_props(None), "")
+
+    def test_slotted(self):
+        node = HTMLNode("p", "text")
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(repr(node), "HTMLNode(p, text, None, None)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from links import *
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class TestLinks(unittest.TestCase):
+    def test_resolve_link(self):
+        self.assertEqual(resolve_link("blog/post.html", "../about#team"), "about")
+        self.assertEqual(resolve_link("blog/post.html", "img/a%20b.png?v=2"), "blog/img/a b.png")
+        self.assertEqual(resolve_link("blog/post.html", "/"), "")
+        self.assertEqual(resolve_link("index.html", "./"), "")
+        for url in ("https://example.com/x", "//cdn.example.com/x.js", "mailto:me@example.com", "#top", ""):
+            self.assertIsNone(resolve_link("index.html", url))
+
+    def test_check_links(self):
+        graph = LinkGraph()
+        graph.add("index.html", [("a", "/blog/post"), ("a", "blog/"), ("img", "/cat.png"), ("a", "https://x.y")])
+        graph.add("blog/post.html", [("a", "../"), ("a", "missing"), ("img", "../dog.png")])
+        files = {"index.html", "blog/post.html", "blog/index.html", "cat.png"}
+        self.assertEqual(
+            check_links(graph, files),
+            [BrokenLink("blog/post.html", "a", "missing"), BrokenLink("blog/post.html", "img", "../dog.png")],
+        )
+
+    def test_backlinks(self):
+        graph = LinkGraph()
+        graph.add("a.html", [("a", "b"), ("a", "/b"), ("img", "x.png")])
+        graph.add("c.html", [("a", "b.html")])
+        self.assertEqual(graph.backlinks(), {"b": ["a.html"], "x.png": ["a.html"], "b.html": ["c.html"]})
+
+    def test_discard_page_or_directory(self):
+        graph = LinkGraph()
+        for page in ("index.html", "blog/a.html", "blog/old/b.html", "blogroll.html"):
+            graph.add(page, [])
+        graph.discard("index.html")
+        graph.discard("blog")
+        self.assertEqual(list(graph.pages), ["blogroll.html"])
+
+    def test_save_load_and_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            graph = LinkGraph()
+            graph.add("index.html", [("a", "/about"), ("a", "/gone")])
+            path = os.path.join(tmp, "cache", "links.json")
+            graph.save(path)
+            loaded = LinkGraph.load(path)
+            self.assertEqual(loaded.pages, graph.pages)
+            self.assertEqual(len(loaded), 2)
+
+            dest = os.path.join(tmp, "public")
+            _write(os.path.join(dest, "about", "index.html"), "")
+            self.assertEqual(report_broken_links(loaded, dest), [BrokenLink("index.html", "a", "/gone")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import io
+import json
+import logging
+import unittest
+
+import log
+from log import StructuredFormatter, fields, logger
+
+
+class TestLog(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.handler = log.configure(logging.INFO, stream=self.stream, buffer_records=3)
+        log.drain_counters()
+
+    def tearDown(self):
+        logger.removeHandler(self.handler)
+        logger.setLevel(logging.NOTSET)
+        logger.propagate = True
+        log.drain_counters()
+
+    def test_fields_follow_message(self):
+        logger.info("Synced %s -> %s", "static", "public", extra=fields(copied=3, removed=0))
+        log.flush()
+        self.assertEqual(self.stream.getvalue(), "Synced static -> public copied=3 removed=0\n")
+
+    def test_json_lines(self):
+        formatter = StructuredFormatter(json_lines=True)
+        record = logger.makeRecord("ssg", logging.WARNING, __file__, 1, "Missing %s", ("x",), None,
+                                   extra=fields(path="x"))
+        self.assertEqual(
+            json.loads(formatter.format(record)),
+            {"level": "warning", "message": "Missing x", "path": "x"},
+        )
+
+    def test_output_is_batched(self):
+        logger.info("one")
+        logger.info("two")
+        self.assertEqual(self.stream.getvalue(), "")
+        logger.info("three")
+        self.assertEqual(self.stream.getvalue(), "one\ntwo\nthree\n")
+
+    def test_warnings_flush_immediately(self):
+        logger.info("queued")
+        logger.warning("problem")
+        self.assertEqual(self.stream.getvalue(), "queued\nwarning: problem\n")
+
+    def test_levels(self):
+        log.trace("per file")
+        logger.debug("details")
+        log.flush()
+        self.assertEqual(self.stream.getvalue(), "")
+        log.configure(log.TRACE, stream=self.stream)
+        log.trace("per file %s", "a.txt")
+        log.flush()
+        self.assertEqual(self.stream.getvalue(), "per file a.txt\n")
+        self.handler = logger.handlers[0]
+
+    def test_counters_report(self):
+        log.count("files_copied", 2)
+        log.count("files_copied")
+        log.merge_counters({"blocks_parsed": 7, "files_copied": 1})
+        log.report()
+        self.assertEqual(self.stream.getvalue(), "Summary blocks_parsed=7 files_copied=4\n")
+        self.assertEqual(log.drain_counters(), {})
+
+    def test_default_level_shows_only_problems_and_summary(self):
+        log.configure(stream=self.stream)
+        logger.info("Synced")
+        logger.warning("Broken link")
+        log.count("files_copied")
+        log.report()
+        self.assertEqual(self.stream.getvalue(), "warning: Broken link\nSummary files_copied=1\n")
+        self.handler = logger.handlers[0]
+
+
+if __name__ == "__main__":
+    unittest.main()
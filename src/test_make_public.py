@@ -0,0 +1,262 @@
+import json
+import os
+import tempfile
+import unittest
+
+from make_public import *
+from make_public import _make_publisher
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+class TestDistribute(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self._tmp.name, "static")
+        self.dest = os.path.join(self._tmp.name, "public")
+        for i in range(20):
+            _write(os.path.join(self.source, f"dir{i % 3}", "nested", f"file{i}.txt"), f"file {i}")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_parallel_copy_mirrors_tree(self):
+        _write(os.path.join(self.dest, "stale.txt"), "stale")
+        stats = distribute(self.source, self.dest, workers=4)
+        self.assertEqual(stats["copied"], 20)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "stale.txt")))
+        self.assertEqual(_read(os.path.join(self.dest, "dir1", "nested", "file7.txt")), "file 7")
+
+    def test_single_worker_copy(self):
+        stats = distribute(self.source, self.dest, workers=1)
+        self.assertEqual(stats["copied"], 20)
+
+
+class TestPublishStrategies(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self._tmp.name, "static")
+        self.dest = os.path.join(self._tmp.name, "public")
+        _write(os.path.join(self.source, "images", "big.png"), "x" * 100000)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _published(self):
+        return os.path.join(self.dest, "images", "big.png")
+
+    def test_hardlink(self):
+        distribute(self.source, self.dest, strategy="hardlink")
+        src_stat = os.stat(os.path.join(self.source, "images", "big.png"))
+        self.assertEqual(os.stat(self._published()).st_ino, src_stat.st_ino)
+
+    def test_symlink(self):
+        distribute(self.source, self.dest, strategy="symlink")
+        self.assertTrue(os.path.islink(self._published()))
+        self.assertEqual(_read(self._published()), "x" * 100000)
+
+    def test_reflink_copies_content(self):
+        distribute(self.source, self.dest, strategy="reflink")
+        self.assertFalse(os.path.islink(self._published()))
+        self.assertEqual(_read(self._published()), "x" * 100000)
+
+    def test_incremental_relinks_changed_file(self):
+        manifest = os.path.join(self._tmp.name, "manifest.json")
+        distribute(self.source, self.dest, incremental=True, manifest_path=manifest, strategy="hardlink")
+        # Replace the source with a new inode; rewriting it in place would show through the old hardlink
+        source = os.path.join(self.source, "images", "big.png")
+        _write(source + ".new", "y")
+        os.replace(source + ".new", source)
+        distribute(self.source, self.dest, incremental=True, manifest_path=manifest, strategy="hardlink")
+        self.assertEqual(_read(self._published()), "y")
+        self.assertEqual(os.stat(self._published()).st_ino, os.stat(source).st_ino)
+
+    def test_other_errors_dont_disable_strategy(self):
+        publish = _make_publisher("hardlink")
+        os.makedirs(self.dest)
+        with self.assertRaises(FileNotFoundError):
+            publish(os.path.join(self.source, "missing.png"), os.path.join(self.dest, "missing.png"))
+        publish(os.path.join(self.source, "images", "big.png"), os.path.join(self.dest, "big.png"))
+        src_stat = os.stat(os.path.join(self.source, "images", "big.png"))
+        self.assertEqual(os.stat(os.path.join(self.dest, "big.png")).st_ino, src_stat.st_ino)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            distribute(self.source, self.dest, strategy="teleport")
+
+
+class TestSync(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.source = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "public")
+        self.manifest = os.path.join(self.root, ".cache", "manifest.json")
+        _write(os.path.join(self.source, "index.css"), "body {}")
+        _write(os.path.join(self.source, "images", "a.png"), "png")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _sync(self, checksum=False):
+        return distribute(self.source, self.dest, incremental=True,
+                          checksum=checksum, manifest_path=self.manifest)
+
+    def test_first_run_copies_everything(self):
+        stats = self._sync()
+        self.assertEqual(stats["copied"], 2)
+        self.assertEqual(_read(os.path.join(self.dest, "images", "a.png")), "png")
+        self.assertTrue(os.path.exists(self.manifest))
+
+    def test_second_run_skips_unchanged(self):
+        self._sync()
+        stats = self._sync()
+        self.assertEqual(stats["copied"], 0)
+        self.assertEqual(stats["unchanged"], 2)
+
+    def test_changed_file_is_recopied(self):
+        self._sync()
+        _write(os.path.join(self.source, "index.css"), "body { color: red }")
+        stats = self._sync()
+        self.assertEqual(stats["copied"], 1)
+        self.assertEqual(_read(os.path.join(self.dest, "index.css")), "body { color: red }")
+
+    def test_orphans_are_removed(self):
+        self._sync()
+        os.remove(os.path.join(self.source, "images", "a.png"))
+        os.rmdir(os.path.join(self.source, "images"))
+        stats = self._sync()
+        self.assertEqual(stats["removed"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+
+    def test_file_deleted_from_dest_is_recopied(self):
+        self._sync()
+        os.remove(os.path.join(self.dest, "images", "a.png"))
+        stats = self._sync()
+        self.assertEqual((stats["copied"], stats["unchanged"]), (1, 1))
+        self.assertEqual(_read(os.path.join(self.dest, "images", "a.png")), "png")
+
+    def test_untracked_dest_files_are_kept(self):
+        self._sync()
+        _write(os.path.join(self.dest, "index.html"), "<div></div>")
+        self._sync()
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_checksum_skips_touched_but_identical(self):
+        self._sync(checksum=True)
+        path = os.path.join(self.source, "index.css")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        stats = self._sync(checksum=True)
+        self.assertEqual(stats["copied"], 0)
+
+    def test_replaced_file_with_same_size_and_mtime_is_recopied(self):
+        self._sync()
+        path = os.path.join(self.source, "index.css")
+        st = os.stat(path)
+        _write(path + ".new", "body {{}")
+        os.utime(path + ".new", ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(path + ".new", path)
+        stats = self._sync()
+        self.assertEqual(stats["copied"], 1)
+        self.assertEqual(_read(os.path.join(self.dest, "index.css")), "body {{}")
+
+    def test_malformed_manifest_is_ignored(self):
+        self._sync()
+        missing_files = {
+            "version": MANIFEST_VERSION, "source": os.path.abspath(self.source), "dest": os.path.abspath(self.dest),
+        }
+        for manifest in ("[]", json.dumps(missing_files), "{"):
+            with open(self.manifest, "w") as f:
+                f.write(manifest)
+            stats = self._sync()
+            self.assertEqual(stats["copied"], 2)
+        self.assertEqual(self._sync()["unchanged"], 2)
+
+    def test_outdated_manifest_keeps_rendered_pages(self):
+        self._sync()
+        _write(os.path.join(self.dest, "index.html"), "<div></div>")
+        os.remove(os.path.join(self.source, "images", "a.png"))
+        with open(self.manifest) as f:
+            manifest = json.load(f)
+        manifest["version"] = MANIFEST_VERSION - 1
+        with open(self.manifest, "w") as f:
+            json.dump(manifest, f)
+        stats = self._sync()
+        self.assertEqual((stats["copied"], stats["unchanged"], stats["removed"]), (1, 0, 1))
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), "<div></div>")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images", "a.png")))
+        # Without any manifest nothing is removed
+        os.remove(self.manifest)
+        self._sync()
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), "<div></div>")
+
+    def test_symlinked_directories_are_published(self):
+        shared = os.path.join(self.root, "shared")
+        _write(os.path.join(shared, "fonts", "a.woff"), "woff")
+        os.symlink(shared, os.path.join(self.source, "shared"))
+        # A link back up the tree would never end
+        os.symlink(self.source, os.path.join(self.source, "images", "loop"))
+        for strategy in ("copy", "symlink"):
+            for incremental in (False, True):
+                stats = distribute(self.source, self.dest, incremental=incremental, strategy=strategy,
+                                   manifest_path=self.manifest)
+                self.assertEqual(stats["copied"] + stats["unchanged"], 3)
+                self.assertEqual(_read(os.path.join(self.dest, "shared", "fonts", "a.woff")), "woff")
+                self.assertTrue(os.path.isdir(os.path.join(self.dest, "images", "loop")))
+
+
+class TestScanTree(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self._tmp.name, "static")
+        for i in range(30):
+            _write(os.path.join(self.source, f"d{i % 4}", f"s{i % 3}", f"f{i}.txt"), "x" * i)
+        _write(os.path.join(self.source, "top.txt"), "top")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_matches_os_walk(self):
+        dirs, files = scan_tree(self.source)
+        expected_dirs, expected_files = [], {}
+        for root, dir_names, file_names in os.walk(self.source):
+            rel_root = os.path.relpath(root, self.source)
+            expected_dirs += [os.path.normpath(os.path.join(rel_root, name)) for name in dir_names]
+            for name in file_names:
+                st = os.stat(os.path.join(root, name))
+                rel = os.path.normpath(os.path.join(rel_root, name))
+                expected_files[rel] = FileEntry(rel, st.st_size, st.st_mtime_ns, st.st_ino)
+        self.assertEqual(dirs, sorted(expected_dirs))
+        self.assertEqual(files, expected_files)
+
+    def test_concurrent_scan_matches_serial(self):
+        self.assertEqual(scan_tree(self.source, workers=4), scan_tree(self.source))
+
+    def test_parents_come_before_children(self):
+        dirs, _ = scan_tree(self.source, workers=4)
+        for i, rel in enumerate(dirs):
+            parent = os.path.dirname(rel)
+            if parent:
+                self.assertIn(parent, dirs[:i])
+
+    def test_symlinks(self):
+        os.symlink(os.path.join(self.source, "d0"), os.path.join(self.source, "linked"))
+        os.symlink(os.path.join(self.source, "missing"), os.path.join(self.source, "dangling"))
+        dirs, files = scan_tree(self.source)
+        self.assertIn("linked", dirs)
+        self.assertNotIn(os.path.join("linked", "s0"), dirs)
+        self.assertNotIn("dangling", files)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from markdown import *
@@ -154,6 +155,19 @@ With more lines
         )
 
 
+    def test_iter_blocks_from_file_object(self):
+        md = "# Title\n\nFirst paragraph\n  continued\n\n\n\n- item\n- item\n"
+        blocks = list(iter_blocks(io.StringIO(md)))
+        self.assertEqual(blocks, ["# Title", "First paragraph\ncontinued", "- item\n- item"])
+        self.assertEqual(blocks, markdown_to_blocks(md))
+
+    def test_iter_blocks_is_lazy(self):
+        lines = iter(["first\n", "\n", "second\n"])
+        blocks = iter_blocks(lines)
+        self.assertEqual(next(blocks), "first")
+        self.assertEqual(next(lines), "second\n")
+
+
 class TestBlockToBlockType(unittest.TestCase):
     def test_code_block(self):
         block = "```\nprint('hello world')\n```"
@@ -190,6 +204,16 @@ class TestBlockToBlockType(unittest.TestCase):
         result = block_to_block_type(block)
         self.assertEqual(result, BlockType.ORDERED_LIST)
 
+    def test_ordered_list_out_of_order_is_paragraph(self):
+        block = "1. First item\n3. Third item\n2. Second item"
+        result = block_to_block_type(block)
+        self.assertEqual(result, BlockType.PARAGRAPH)
+
+    def test_ordered_list_ten_items(self):
+        block = "\n".join(f"{i}. item" for i in range(1, 11))
+        result = block_to_block_type(block)
+        self.assertEqual(result, BlockType.ORDERED_LIST)
+
     def test_paragraph_block(self):
         block = "This is just a regular paragraph with some text."
         result = block_to_block_type(block)
@@ -409,6 +433,20 @@ Final paragraph."""
         self.assertEqual(node.children[6].tag, "h2")      # Subheading
         self.assertEqual(node.children[7].tag, "p")       # Final paragraph
 
+    def test_file_object_input(self):
+        md = "# Heading\n\nSome _text_\n"
+        html = markdown_to_html_node(io.StringIO(md)).to_html()
+        self.assertEqual(html, "<div><h1>Heading</h1><p>Some <i>text</i></p></div>")
+
+    def test_collects_links(self):
+        md = "# [Home](/)\n\n- ![cat](cat.png)\n- [a](a.html)\n\n> [q](https://example.com)\n\n```\n[not](code)\n```"
+        links = []
+        markdown_to_html_node(md, links)
+        self.assertEqual(
+            links,
+            [("a", "/"), ("img", "cat.png"), ("a", "a.html"), ("a", "https://example.com")],
+        )
+
     def test_assignment_examples(self):
         # Test 1 from the assignment
         md1 = """
@@ -434,4 +472,74 @@ the **same** even with inline stuff
         node2 = markdown_to_html_node(md2)
         html2 = node2.to_html()
         expected2 = "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>"
-        self.assertEqual(html2, expected2)
\ No newline at end of file
+        self.assertEqual(html2, expected2)
+
+class TestBlockCache(unittest.TestCase):
+    def test_reuses_unchanged_blocks(self):
+        paragraphs = [f"Paragraph {i} with a [link](/p{i}) and **bold**" for i in range(50)]
+        md = "# Title\n\n" + "\n\n".join(paragraphs)
+        cache = BlockCache()
+        node = markdown_to_html_node(md, block_cache=cache)
+        self.assertEqual(node.to_html(), markdown_to_html_node(md).to_html())
+        self.assertEqual((cache.hits, cache.misses), (0, 51))
+
+        paragraphs[10] = "An _edited_ paragraph"
+        edited = "# Title\n\n" + "\n\n".join(paragraphs)
+        links = []
+        node = markdown_to_html_node(edited, links, cache)
+        self.assertEqual(node.to_html(), markdown_to_html_node(edited).to_html())
+        self.assertEqual((cache.hits, cache.misses), (50, 52))
+        self.assertEqual(len(links), 49)
+        self.assertEqual(links[10], ("a", "/p11"))
+        # Spliced blocks still show their structure
+        self.assertIsInstance(node.children[0], RenderedBlock)
+        self.assertEqual(node.children[0].tag, "h1")
+        self.assertEqual(node.children[0].children[0].value, "Title")
+
+    def test_evicts_least_recently_used(self):
+        cache = BlockCache(max_entries=2)
+        markdown_to_html_node("one\n\ntwo", block_cache=cache)
+        markdown_to_html_node("one\n\nthree", block_cache=cache)
+        self.assertEqual(len(cache), 2)
+        markdown_to_html_node("one", block_cache=cache)
+        markdown_to_html_node("two", block_cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+
+class TestInlineCache(unittest.TestCase):
+    def setUp(self):
+        set_inline_cache_size(DEFAULT_INLINE_CACHE_SIZE)
+
+    def tearDown(self):
+        set_inline_cache_size(DEFAULT_INLINE_CACHE_SIZE)
+
+    def test_repeated_text_is_converted_once(self):
+        md = "- [Home](/) and **more**\n- [Home](/) and **more**\n\n# [Home](/) and **more**"
+        links = []
+        node = markdown_to_html_node(md, links)
+        self.assertEqual(
+            node.to_html(),
+            '<div><ul><li><a href="/">Home</a> and <b>more</b></li><li><a href="/">Home</a> and <b>more</b></li></ul>'
+            '<h1><a href="/">Home</a> and <b>more</b></h1></div>',
+        )
+        self.assertEqual(links, [("a", "/")] * 3)
+        info = inline_cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (2, 1, 1))
+        # Each use gets its own children list, even though the nodes are shared
+        first, second = node.children[0].children
+        self.assertIsNot(first.children, second.children)
+        self.assertIs(first.children[0], second.children[0])
+
+    def test_cache_size(self):
+        set_inline_cache_size(1)
+        markdown_to_html_node("one\n\ntwo\n\none")
+        self.assertEqual(inline_cache_info()[:2], (0, 3))
+        set_inline_cache_size(0)
+        markdown_to_html_node("one\n\none")
+        info = inline_cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (0, 2, 0))
+
+    def test_invalid_markdown_still_raises(self):
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                markdown_to_html_node("an **unclosed span")
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import metadata
+from metadata import *
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class TestMetadataIndex(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self._tmp.name, "content")
+        self.path = os.path.join(self._tmp.name, "cache", "metadata.json")
+        self.pages = {
+            "old.md": "---\ndate: 2022-05-01\ntags: [news]\n---\nOld",
+            "new.md": "---\ndate: 2024-01-02\ntags: [news, python]\n---\nNew",
+            "blog/draft.md": "---\ndate: 2024-06-01\ndraft: true\n---\nDraft",
+            "about.md": "About",
+        }
+        for rel, text in self.pages.items():
+            _write(os.path.join(self.content, rel), text)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _index_all(self, index):
+        for rel in self.pages:
+            index.get(os.path.join(self.content, rel))
+
+    def test_queries(self):
+        index = MetadataIndex(self.content, self.path)
+        self._index_all(index)
+        self.assertEqual([rel for rel, _ in index.pages()], ["new.md", "old.md", "about.md"])
+        self.assertEqual(len(index.pages(drafts=True)), 4)
+        self.assertEqual(index.tags(), {"news": ["new.md", "old.md"], "python": ["new.md"]})
+        self.assertEqual(index.archive(), {"2024": ["new.md"], "2022": ["old.md"]})
+
+    def test_saved_index_answers_without_reading_pages(self):
+        index = MetadataIndex(self.content, self.path)
+        self._index_all(index)
+        self.assertTrue(index.save())
+        self.assertFalse(index.save())
+
+        reloaded = MetadataIndex(self.content, self.path)
+        with mock.patch.object(metadata, "read_page_metadata") as read:
+            self._index_all(reloaded)
+            self.assertEqual(reloaded.tags()["news"], ["new.md", "old.md"])
+        read.assert_not_called()
+
+        # Only the edited page is read again
+        _write(os.path.join(self.content, "about.md"), "---\ntitle: About us\n---\nAbout")
+        with mock.patch.object(metadata, "read_page_metadata", wraps=read_page_metadata) as read:
+            self._index_all(reloaded)
+        read.assert_called_once_with(os.path.join(self.content, "about.md"))
+
+    def test_discard_and_retain(self):
+        index = MetadataIndex(self.content, self.path)
+        self._index_all(index)
+        index.discard(os.path.join(self.content, "blog"))
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.retain([os.path.join(self.content, "new.md")]), 2)
+        self.assertEqual([rel for rel, _ in index.pages()], ["new.md"])
+
+    def test_index_for_other_content_dir_is_ignored(self):
+        index = MetadataIndex(self.content, self.path)
+        self._index_all(index)
+        index.save()
+        self.assertEqual(len(MetadataIndex(self._tmp.name, self.path)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import *
@@ -38,4 +39,37 @@ class TestParentNode(unittest.TestCase):
         self.assertEqual(
             parent_node.to_html(),
             "<div><header><h1>site title</h1><button>click me</button></header><main>main text</main></div>",
-        )
\ No newline at end of file
+        )
+
+    def test_deeply_nested_tree(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "<b>deep</b>"))
+        self.assertTrue(html.endswith("</span>" * 5000))
+
+    def test_iter_html_chunks(self):
+        parent_node = ParentNode("ul", [LeafNode("li", "one"), LeafNode("li", "two")], {"class": "list"})
+        self.assertEqual(
+            list(parent_node.iter_html()),
+            ['<ul class="list">', "<li>one</li>", "<li>two</li>", "</ul>"],
+        )
+
+    def test_write_html(self):
+        parent_node = ParentNode("div", [LeafNode(None, "x" * 10) for _ in range(100)])
+        stream = io.StringIO()
+        parent_node.write_html(stream, buffer_size=64)
+        self.assertEqual(stream.getvalue(), parent_node.to_html())
+        self.assertEqual(stream.getvalue(), "<div>" + "x" * 1000 + "</div>")
+
+    def test_invalid_descendant_raises(self):
+        parent_node = ParentNode("div", [ParentNode("section", [])])
+        with self.assertRaises(ValueError):
+            parent_node.to_html()
+
+    def test_none_child_raises(self):
+        # A None child must not be mistaken for the end of the children
+        parent_node = ParentNode("div", [LeafNode("b", "x"), None, LeafNode("i", "y")])
+        with self.assertRaises(AttributeError):
+            parent_node.to_html()
@@ -0,0 +1,77 @@
+import unittest
+
+import markdown
+import profiling
+import textnode
+from markdown import markdown_to_html_node
+from profiling import Profile
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        profiling.drain()
+
+    def tearDown(self):
+        profiling.disable()
+        profiling.drain()
+
+    def test_disabled_leaves_functions_alone(self):
+        original = markdown.block_to_block_type
+        self.assertFalse(profiling.is_enabled())
+        markdown_to_html_node("# Heading\n\nSome **bold** text").to_html()
+        self.assertEqual(profiling.drain(), {})
+        profiling.enable()
+        self.assertIsNot(markdown.block_to_block_type, original)
+        profiling.disable()
+        self.assertIs(markdown.block_to_block_type, original)
+
+    def test_enable_times_every_render_stage(self):
+        profiling.enable()
+        html = markdown_to_html_node("# Heading\n\nSome **bold** text\n\n- a\n- b").to_html()
+        self.assertEqual(
+            html,
+            "<div><h1>Heading</h1><p>Some <b>bold</b> text</p><ul><li>a</li><li>b</li></ul></div>",
+        )
+        stats = profiling.drain()
+        for stage in ("blocks", "classify", "inline", "convert", "serialize"):
+            self.assertGreater(stats[stage][2], 0, stage)
+        self.assertEqual(stats["classify"][2], 3)
+        self.assertEqual(stats["serialize"][2], 1)
+
+    def test_enable_patches_star_imports(self):
+        original = textnode.text_to_textnodes
+        profiling.enable()
+        self.assertIs(markdown.text_to_textnodes, textnode.text_to_textnodes)
+        self.assertIsNot(markdown.text_to_textnodes, original)
+
+    def test_nested_stages_are_not_double_counted(self):
+        profiling.enable()
+        markdown.markdown_to_blocks("a\n\nb\n\nc")
+        stats = profiling.drain()
+        # The iter_blocks steps it drains are part of the one markdown_to_blocks call
+        self.assertEqual(stats["blocks"][2], 1)
+        self.assertGreaterEqual(stats["blocks"][0], 0.0)
+        # Streaming still times each step
+        list(markdown.iter_blocks("a\n\nb\n\nc"))
+        self.assertEqual(profiling.drain()["blocks"][2], 4)
+
+    def test_convert_counts_each_text_node_once(self):
+        profiling.enable()
+        textnode.text_node_to_html_node(textnode.TextNode("bold", textnode.TextType.BOLD))
+        self.assertEqual(profiling.drain()["convert"][2], 1)
+
+    def test_profile_merge_and_report(self):
+        profile = Profile()
+        profile.merge({"inline": [0.5, 0.25, 10]})
+        profile.merge({"inline": [0.5, 0.25, 5], "copy": [1.0, 0.5, 1]})
+        profile.add_page("content/fast.md", 0.001)
+        profile.add_page("content/slow.md", 0.5)
+        self.assertEqual(profile.stages["inline"], [1.0, 0.5, 15])
+        report = profile.report(top=1)
+        self.assertIn("inline", report)
+        self.assertIn("content/slow.md", report)
+        self.assertNotIn("content/fast.md", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
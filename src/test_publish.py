@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+
+from build import build_site
+from make_public import distribute
+from publish import *
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _replace(path, content):
+    # Staged files may be hardlinked to the live site, so never write into them
+    _write(path + ".tmp", content)
+    os.replace(path + ".tmp", path)
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+class TestPublish(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dest = os.path.join(self._tmp.name, "public")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _publish(self, files, keep=DEFAULT_KEEP, seed=True):
+        with staged(self.dest, keep=keep, seed=seed) as out:
+            for rel, content in files.items():
+                _replace(os.path.join(out, rel), content)
+        return current_generation(self.dest)
+
+    def test_commit_flips_symlink(self):
+        self.assertEqual(self._publish({"index.html": "one"}), "000001")
+        self.assertTrue(os.path.islink(self.dest))
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), "one")
+        self.assertEqual(self._publish({"index.html": "two"}), "000002")
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), "two")
+        self.assertEqual(sorted(os.listdir(generations_dir(self.dest))), ["000001", "000002"])
+
+    def test_failed_build_keeps_live_site(self):
+        self._publish({"index.html": "one"})
+        with self.assertRaises(RuntimeError):
+            with staged(self.dest) as out:
+                _replace(os.path.join(out, "index.html"), "half")
+                raise RuntimeError("build failed")
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), "one")
+        self.assertEqual(list_generations(self.dest), ["000001"])
+        self.assertEqual(sorted(os.listdir(generations_dir(self.dest))), ["000001"])
+
+    def test_staging_is_seeded_with_hardlinks(self):
+        self._publish({"style.css": "body {}", "blog/post.html": "post"})
+        staging = stage(self.dest)
+        try:
+            live = os.path.join(self.dest, "style.css")
+            seeded = os.path.join(staging, "style.css")
+            self.assertEqual(os.stat(live).st_ino, os.stat(seeded).st_ino)
+            self.assertEqual(_read(os.path.join(staging, "blog", "post.html")), "post")
+        finally:
+            abort(staging)
+        self.assertFalse(os.path.exists(staging))
+
+    def test_writers_never_touch_the_live_generation(self):
+        root = self._tmp.name
+        _write(os.path.join(root, "static", "style.css"), "body {}")
+        _write(os.path.join(root, "static", "logo.svg"), "<svg/>")
+        _write(os.path.join(root, "content", "index.md"), "# One")
+        manifest = os.path.join(root, "manifest.json")
+        # The first build has no live site to seed from, but its manifest must
+        # still describe dest for the next build to sync incrementally
+        with staged(self.dest) as out:
+            distribute(os.path.join(root, "static"), out, incremental=True,
+                       manifest_path=manifest, manifest_dest=self.dest)
+            build_site(os.path.join(root, "content"), out, workers=1)
+        live = os.path.realpath(self.dest)
+
+        _write(os.path.join(root, "static", "style.css"), "body { color: red }")
+        _write(os.path.join(root, "content", "index.md"), "# Two")
+        with staged(self.dest) as out:
+            stats = distribute(os.path.join(root, "static"), out, incremental=True,
+                               manifest_path=manifest, manifest_dest=self.dest)
+            build_site(os.path.join(root, "content"), out, workers=1)
+        self.assertEqual((stats["copied"], stats["unchanged"]), (1, 1))
+        self.assertEqual(_read(os.path.join(live, "style.css")), "body {}")
+        self.assertEqual(_read(os.path.join(live, "index.html")), "<div><h1>One</h1></div>")
+        self.assertEqual(_read(os.path.join(self.dest, "style.css")), "body { color: red }")
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), "<div><h1>Two</h1></div>")
+
+    def test_manifest_of_deleted_site_is_ignored(self):
+        root = self._tmp.name
+        _write(os.path.join(root, "static", "style.css"), "body {}")
+        manifest = os.path.join(root, "manifest.json")
+        for _ in range(2):
+            with staged(self.dest) as out:
+                distribute(os.path.join(root, "static"), out, incremental=True,
+                           manifest_path=manifest, manifest_dest=self.dest)
+            os.unlink(self.dest)
+        self.assertEqual(_read(os.path.join(generations_dir(self.dest), "000002", "style.css")), "body {}")
+
+    def test_plain_directory_is_migrated(self):
+        _write(os.path.join(self.dest, "index.html"), "old")
+        self._publish({"index.html": "new"}, seed=False)
+        self.assertEqual(list_generations(self.dest), ["000001", "000002"])
+        self.assertEqual(rollback(self.dest), "000001")
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), "old")
+
+    def test_prune_keeps_newest_generations(self):
+        for i in range(5):
+            self._publish({"index.html": str(i)}, keep=2)
+        self.assertEqual(list_generations(self.dest), ["000003", "000004", "000005"])
+
+    def test_rollback(self):
+        for i in range(3):
+            self._publish({"index.html": str(i)})
+        self.assertEqual(rollback(self.dest, steps=2), "000001")
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), "0")
+        with self.assertRaises(ValueError):
+            rollback(self.dest)
+        # Publishing after a rollback still moves forward
+        self.assertEqual(self._publish({"index.html": "3"}), "000004")
+
+    def test_rollback_needs_generations(self):
+        with self.assertRaises(ValueError):
+            rollback(self.dest)
+
+
+if __name__ == "__main__":
+    unittest.main()
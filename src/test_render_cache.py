@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from render_cache import *
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(self._tmp.name, max_bytes=1024)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_miss_then_hit(self):
+        key = self.cache.key(b"# Title")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, b"<div><h1>Title</h1></div>")
+        self.assertEqual(self.cache.get(key), b"<div><h1>Title</h1></div>")
+
+    def test_key_depends_on_source(self):
+        self.assertNotEqual(self.cache.key(b"a"), self.cache.key(b"b"))
+        self.assertEqual(self.cache.key(b"a"), self.cache.key(b"a"))
+
+    def test_entry_round_trip(self):
+        meta = {"title": "Title", "links": [["a", "/about"]]}
+        entry = pack_entry(meta, b"<p>one\ntwo</p>")
+        self.assertEqual(unpack_entry(entry), (meta, b"<p>one\ntwo</p>"))
+
+    def test_build_code_is_not_in_the_key(self):
+        # Logging or pool tuning in build.py must not throw the cache away
+        self.assertNotIn("build", RENDERER_MODULES)
+
+    def test_evict_drops_least_recently_used(self):
+        keys = [self.cache.key(str(i).encode()) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, b"x" * 400)
+            path = self.cache._path(key)
+            os.utime(path, ns=(i * 10**9, i * 10**9))
+        # Reading the oldest entry makes it the most recently used one
+        self.cache.get(keys[0])
+
+        removed = self.cache.evict()
+        self.assertEqual(removed, 1)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+
+from leafnode import LeafNode
+from markdown import markdown_to_html_node
+from template import *
+
+
+class TestTemplate(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "template.html")
+        with open(self.path, "w") as f:
+            f.write("<title>{{ Title }}</title><body>{{Content}}</body>")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_parse_splits_literals_and_names(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(template.parts, ["<h1>", "Title", "</h1>", "Content", ""])
+        self.assertEqual(template.names, ["Title", "Content"])
+
+    def test_render_fills_placeholders(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}{{ Missing }}")
+        self.assertEqual(
+            template.render({"Title": "Home", "Content": "<p>hi</p>"}),
+            "<title>Home</title><p>hi</p>",
+        )
+        # Rendering leaves the parsed template untouched
+        self.assertEqual(template.render({}), "<title></title>")
+
+    def test_write_streams_nodes(self):
+        node = markdown_to_html_node("# A & B\n\nSome **bold**")
+        out = StringIO()
+        Template("<title>{{ Title }}</title>{{ Content }}").write(out, page_values(extract_title(node), node))
+        self.assertEqual(out.getvalue(), "<title>A &amp; B</title>" + node.to_html())
+
+    def test_extract_title(self):
+        self.assertEqual(extract_title(markdown_to_html_node("Intro\n\n# The _big_ one\n\n# Second")), "The big one")
+        self.assertIsNone(extract_title(markdown_to_html_node("## Not a title")))
+        self.assertEqual(extract_title(LeafNode("p", "leaf")), None)
+
+    def test_load_template_is_cached_until_changed(self):
+        first = load_template(self.path)
+        self.assertIs(load_template(self.path), first)
+        with open(self.path, "w") as f:
+            f.write("<main>{{ Content }}</main>")
+        os.utime(self.path, ns=(0, 0))
+        second = load_template(self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.render({"Content": "x"}), "<main>x</main>")
+
+    def test_template_version(self):
+        self.assertIsNone(template_version(None))
+        self.assertIsNone(template_version(os.path.join(self._tmp.name, "missing.html")))
+        self.assertEqual(template_version(self.path)[1], os.path.getsize(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,6 +19,11 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("Foxtrot Charlie", TextType.BOLD)
         self.assertNotEqual(node, node2)
 
+    def test_slotted(self):
+        node = TextNode("compact", TextType.CODE)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(repr(node), "TextNode(compact, code text, None)")
+
 class TestTextNodeToHtmlNode(unittest.TestCase):
     def test_plain_text(self):
         node = TextNode("This is a plain text node", TextType.TEXT)
@@ -156,6 +161,12 @@ class TestSplitNodesDelimeter(unittest.TestCase):
         with self.assertRaises(Exception):
             split_nodes_delimiter([node], "**", TextType.BOLD)
     
+    def test_many_delimited_spans(self):
+        node = TextNode("`code` " * 3000, TextType.TEXT)
+        new_nodes = split_nodes_delimiter([node], "`", TextType.CODE)
+        self.assertEqual(len(new_nodes), 6000)
+        self.assertEqual(new_nodes[-1], TextNode(" ", TextType.TEXT))
+    
     def test_delimiter_with_spaces(self):
         node = TextNode("text with ** bold ** spaces", TextType.TEXT)
         new_nodes = split_nodes_delimiter([node], "**", TextType.BOLD)
@@ -354,6 +365,12 @@ class TestSplitNodesLink(unittest.TestCase):
         ]
         self.assertEqual(new_nodes, expected)
     
+    def test_many_links(self):
+        node = TextNode("[a](https://example.com) " * 3000, TextType.TEXT)
+        new_nodes = split_nodes_link([node])
+        self.assertEqual(len(new_nodes), 6000)
+        self.assertEqual(new_nodes[0], TextNode("a", TextType.LINK, "https://example.com"))
+    
     def test_link_does_not_match_image(self):
         # This test ensures that the link regex doesn't match image syntax
         node = TextNode("![image](https://example.com/image.png) [link](https://example.com/link)", TextType.TEXT)
@@ -508,6 +525,50 @@ class TestTextToTextNodes(unittest.TestCase):
         ]
         self.assertEqual(nodes, expected)
 
+    def test_link_url_with_underscore(self):
+        """Test that underscores inside a link aren't read as italics."""
+        text = "See [the_docs](https://example.com/some_page) now"
+        nodes = text_to_textnodes(text)
+        expected = [
+            TextNode("See ", TextType.TEXT),
+            TextNode("the_docs", TextType.LINK, "https://example.com/some_page"),
+            TextNode(" now", TextType.TEXT),
+        ]
+        self.assertEqual(nodes, expected)
+
+    def test_code_span_keeps_delimiters(self):
+        """Test that delimiters inside a code span stay literal."""
+        text = "Call `a_b**c` here"
+        nodes = text_to_textnodes(text)
+        expected = [
+            TextNode("Call ", TextType.TEXT),
+            TextNode("a_b**c", TextType.CODE),
+            TextNode(" here", TextType.TEXT),
+        ]
+        self.assertEqual(nodes, expected)
+
+    def test_incomplete_link_is_text(self):
+        """Test that brackets that don't form a link are kept as text."""
+        text = "array[0] and ![alt] and [link](https://example.com)"
+        nodes = text_to_textnodes(text)
+        expected = [
+            TextNode("array[0] and ![alt] and ", TextType.TEXT),
+            TextNode("link", TextType.LINK, "https://example.com"),
+        ]
+        self.assertEqual(nodes, expected)
+
+    def test_unmatched_delimiter_raises(self):
+        """Test that an unmatched delimiter is invalid markdown."""
+        with self.assertRaises(ValueError):
+            text_to_textnodes("this **never closes")
+
+    def test_many_spans(self):
+        """Test a paragraph with thousands of inline spans."""
+        text = "`x` " * 5000
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 10000)
+        self.assertEqual(nodes[-2], TextNode("x", TextType.CODE))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
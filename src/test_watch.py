@@ -0,0 +1,252 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import watch as watch_module
+from build import build_site
+from links import LinkGraph
+from make_public import distribute
+from markdown import BlockCache
+from metadata import MetadataIndex
+from publish import list_generations, staged
+from render_cache import RenderCache
+from watch import *
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def _inotify_available():
+    try:
+        InotifyWatcher([]).close()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        root = self._tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.dest = os.path.join(root, "public")
+        self.manifest = os.path.join(root, "cache", "manifest.json")
+        _write(os.path.join(self.content, "index.md"), "# Home")
+        _write(os.path.join(self.content, "blog", "post.md"), "A _post_")
+        _write(os.path.join(self.static, "style.css"), "body {}")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _rebuild(self, changed):
+        return rebuild(changed, self.content, self.static, self.dest, manifest_path=self.manifest)
+
+    def test_watcher_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Watcher([self.content])
+
+    def test_rebuild_renders_only_changed_page(self):
+        self._rebuild({self.content})
+        index = os.path.join(self.dest, "index.html")
+        os.utime(index, ns=(0, 0))
+        _write(os.path.join(self.content, "blog", "post.md"), "An _edited_ post")
+        stats = self._rebuild({os.path.join(self.content, "blog", "post.md")})
+        self.assertEqual(stats["rendered"], 1)
+        self.assertEqual(_read(os.path.join(self.dest, "blog", "post.html")), "<div><p>An <i>edited</i> post</p></div>")
+        self.assertEqual(os.stat(index).st_mtime_ns, 0)
+
+    def test_rebuild_survives_invalid_markdown(self):
+        self._rebuild({self.content})
+        post = os.path.join(self.content, "blog", "post.md")
+        _write(post, "A **half typed")
+        stats = self._rebuild({post, os.path.join(self.content, "index.md")})
+        self.assertEqual((stats["failed"], stats["rendered"]), (1, 1))
+        # The last good version stays published, with no temporary file next to it
+        self.assertEqual(_read(os.path.join(self.dest, "blog", "post.html")), "<div><p>A <i>post</i></p></div>")
+        self.assertEqual(os.listdir(os.path.join(self.dest, "blog")), ["post.html"])
+
+    def test_rebuild_removes_deleted_pages(self):
+        self._rebuild({self.content})
+        post = os.path.join(self.content, "blog", "post.md")
+        os.remove(post)
+        stats = self._rebuild({post})
+        self.assertEqual(stats["deleted"], 1)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post.html")))
+
+    def test_rebuild_removes_pages_of_moved_directory(self):
+        self._rebuild({self.content, self.static})
+        _write(os.path.join(self.static, "blog", "kept.html"), "static page")
+        self._rebuild({os.path.join(self.static, "blog", "kept.html")})
+        os.rename(os.path.join(self.content, "blog"), os.path.join(self._tmp.name, "blog"))
+        stats = self._rebuild({os.path.join(self.content, "blog")})
+        self.assertEqual(stats["deleted"], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog", "kept.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_rebuild_rewraps_pages_when_template_changes(self):
+        template = os.path.join(self._tmp.name, "template.html")
+        _write(template, "<main>{{ Content }}</main>")
+        rebuild({self.content}, self.content, self.static, self.dest, manifest_path=self.manifest, template=template)
+        _write(template, "<title>{{ Title }}</title>{{ Content }}")
+        stats = rebuild({template}, self.content, self.static, self.dest, manifest_path=self.manifest, template=template)
+        self.assertEqual(stats["rendered"], 2)
+        self.assertEqual(_read(os.path.join(self.dest, "index.html")), "<title>Home</title><div><h1>Home</h1></div>")
+
+    def test_rebuild_removes_page_turned_draft(self):
+        index = MetadataIndex(self.content, os.path.join(self._tmp.name, "cache", "metadata.json"))
+        post = os.path.join(self.content, "blog", "post.md")
+        rebuild({self.content}, self.content, self.static, self.dest, manifest_path=self.manifest, index=index)
+        _write(post, "---\ndraft: true\n---\nA _post_")
+        stats = rebuild({post}, self.content, self.static, self.dest, manifest_path=self.manifest, index=index)
+        self.assertEqual((stats["rendered"], stats["deleted"]), (0, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post.html")))
+        self.assertEqual([rel for rel, _ in MetadataIndex(self.content, index.path).pages()], ["index.md"])
+
+    def test_rebuild_reparses_only_changed_blocks(self):
+        post = os.path.join(self.content, "blog", "post.md")
+        _write(post, "# Post\n\nFirst\n\nSecond")
+        block_cache = BlockCache()
+        rebuild({post}, self.content, self.static, self.dest, manifest_path=self.manifest, block_cache=block_cache)
+        _write(post, "# Post\n\nFirst\n\nSecond _edited_")
+        rebuild({post}, self.content, self.static, self.dest, manifest_path=self.manifest, block_cache=block_cache)
+        self.assertEqual((block_cache.hits, block_cache.misses), (2, 4))
+        self.assertEqual(
+            _read(os.path.join(self.dest, "blog", "post.html")),
+            "<div><h1>Post</h1><p>First</p><p>Second <i>edited</i></p></div>",
+        )
+
+    def test_rebuild_keeps_link_graph_current(self):
+        _write(os.path.join(self.content, "index.md"), "[Post](blog/post)")
+        _write(os.path.join(self.content, "docs", "guide.md"), "[Home](/)")
+        graph = LinkGraph()
+        rebuild({self.content}, self.content, self.static, self.dest, manifest_path=self.manifest, links=graph)
+        self.assertEqual(sorted(graph.pages), ["blog/post.html", "docs/guide.html", "index.html"])
+
+        index = os.path.join(self.content, "index.md")
+        _write(index, "[Gone](/missing)")
+        post = os.path.join(self.content, "blog", "post.md")
+        os.remove(post)
+        rebuild({index, post}, self.content, self.static, self.dest, manifest_path=self.manifest, links=graph)
+        self.assertEqual(graph.pages["index.html"], [("a", "/missing")])
+        self.assertNotIn("blog/post.html", graph.pages)
+
+        # A page that fails to render keeps the links of its last good version
+        _write(index, "[Half](/typed) **oops")
+        docs = os.path.join(self.content, "docs")
+        os.remove(os.path.join(docs, "guide.md"))
+        os.rmdir(docs)
+        rebuild({index, docs}, self.content, self.static, self.dest, manifest_path=self.manifest, links=graph)
+        self.assertEqual(graph.pages, {"index.html": [("a", "/missing")]})
+
+    def test_rebuild_passes_worker_options_on(self):
+        with mock.patch.object(watch_module, "build_site", wraps=build_site) as build, \
+                mock.patch.object(watch_module, "distribute", wraps=distribute) as sync:
+            rebuild({self.content, self.static}, self.content, self.static, self.dest, manifest_path=self.manifest,
+                    workers=3, copy_workers=2, scan_workers=4)
+        self.assertEqual(build.call_args.kwargs["workers"], 3)
+        self.assertEqual((sync.call_args.kwargs["workers"], sync.call_args.kwargs["scan_workers"]), (2, 4))
+
+    def test_rebuild_syncs_static_changes(self):
+        self._rebuild({self.static})
+        _write(os.path.join(self.static, "app.js"), "run()")
+        stats = self._rebuild({os.path.join(self.static, "app.js")})
+        self.assertEqual(stats["copied"], 1)
+        self.assertEqual(_read(os.path.join(self.dest, "app.js")), "run()")
+
+    def test_polling_watcher_reports_changes(self):
+        with PollingWatcher([self.content], interval=0.01) as watcher:
+            post = os.path.join(self.content, "blog", "post.md")
+            _write(post, "Changed, and longer than before")
+            new = os.path.join(self.content, "new.md")
+            _write(new, "New")
+            self.assertEqual(watcher.wait(1), {post, new})
+            os.remove(new)
+            self.assertEqual(watcher.wait(1), {new})
+            self.assertEqual(watcher.wait(0.02), set())
+
+    @unittest.skipUnless(_inotify_available(), "inotify not available")
+    def test_inotify_watcher_follows_new_directories(self):
+        with InotifyWatcher([self.content]) as watcher:
+            page = os.path.join(self.content, "docs", "guide.md")
+            _write(page, "Guide")
+            changed = collect_changes(watcher, 1, debounce=0.05)
+            self.assertIn(page, changed)
+            _write(page, "Guide, edited")
+            self.assertIn(page, collect_changes(watcher, 1, debounce=0.05))
+            self.assertEqual(watcher.wait(0.01), set())
+
+    def test_watch_loop_rebuilds_until_stopped(self):
+        stop = threading.Event()
+        cache = RenderCache(os.path.join(self._tmp.name, "cache", "render"))
+        links = os.path.join(self._tmp.name, "cache", "links.json")
+        thread = threading.Thread(
+            target=watch,
+            args=(self.content, self.static, self.dest),
+            kwargs={
+                "cache": cache, "manifest_path": self.manifest, "stop": stop, "poll_interval": 0.01,
+                "links_path": links,
+            },
+        )
+        thread.start()
+        try:
+            index = os.path.join(self.dest, "index.html")
+            deadline = time.monotonic() + 5
+            while not os.path.exists(index) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            _write(os.path.join(self.content, "index.md"), "# Home, [edited](/nowhere)")
+            while "edited" not in _read(index) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(_read(index), '<div><h1>Home, <a href="/nowhere">edited</a></h1></div>')
+        finally:
+            stop.set()
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+        # The graph was saved after the batch, so check-links sees the new link
+        self.assertEqual(LinkGraph.load(links).pages["index.html"], [("a", "/nowhere")])
+
+    def test_watch_edits_touch_only_what_changed(self):
+        with staged(self.dest):
+            pass
+        first = os.path.realpath(self.dest)
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=watch,
+            args=(self.content, self.static, self.dest),
+            kwargs={"manifest_path": self.manifest, "stop": stop, "poll_interval": 0.01, "keep": 5},
+        )
+        thread.start()
+        try:
+            index = os.path.join(self.dest, "index.html")
+            deadline = time.monotonic() + 5
+            while not os.path.exists(index) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            session = os.path.realpath(self.dest)
+            unrelated = [os.path.join(self.dest, "blog", "post.html"), os.path.join(self.dest, "style.css")]
+            before = [(os.stat(path).st_ino, os.stat(path).st_mtime_ns) for path in unrelated]
+            _write(os.path.join(self.content, "index.md"), "# Home, edited")
+            while "edited" not in _read(index) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(_read(index), "<div><h1>Home, edited</h1></div>")
+        finally:
+            stop.set()
+            thread.join(5)
+        # The session publishes one generation up front and updates it in place from then on
+        self.assertEqual(os.listdir(first), [])
+        self.assertEqual(os.path.realpath(self.dest), session)
+        self.assertEqual(list_generations(self.dest), ["000001", "000002"])
+        self.assertEqual([(os.stat(path).st_ino, os.stat(path).st_mtime_ns) for path in unrelated], before)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,7 @@
-import re
 from enum import Enum
-from typing import List, Tuple, Optional, Union
+from typing import Dict, List, Tuple, Optional, Union
 from leafnode import LeafNode
+from patterns import INLINE_TOKEN_PATTERN, IMAGE_PATTERN, LINK_PATTERN
 
 # Constants
 INVALID_MARKDOWN_MSG = "invalid Markdown"
@@ -20,8 +20,7 @@ def extract_markdown_images(text: str) -> List[Tuple[str, str]]:
     Examples:
         extract_markdown_images("![alt](url)") -> [("alt", "url")]
     """
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    return re.findall(pattern, text)
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text: str) -> List[Tuple[str, str]]:
@@ -37,8 +36,7 @@ def extract_markdown_links(text: str) -> List[Tuple[str, str]]:
     Examples:
         extract_markdown_links("[text](url)") -> [("text", "url")]
     """
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    return re.findall(pattern, text)
+    return LINK_PATTERN.findall(text)
 
 
 class TextType(Enum):
@@ -56,6 +54,14 @@ class TextType(Enum):
     IMAGE = "image"
 
 
+# Inline delimiters and the formatting the text between them gets
+_DELIMITER_TYPES = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+
 class TextNode:
     """
     Represents a node of inline text with a specific formatting type.
@@ -76,6 +82,9 @@ class TextNode:
         TextNode("Alt text", TextType.IMAGE, "image.png") -> Image with URL
     """
     
+    # Inline parsing makes one per run of text and drops it once converted, so creation cost matters
+    __slots__ = ("text", "text_type", "url")
+    
     def __init__(self, text: str, text_type: TextType, url: Optional[str] = None) -> None:
         """
         Initialize a TextNode.
@@ -113,8 +122,11 @@ def text_to_textnodes(text: str) -> List[TextNode]:
     """
     Convert a string with markdown formatting to a list of TextNodes.
     
-    This function processes text in order: bold -> italic -> code -> links -> images.
-    Each step splits existing TEXT nodes while preserving already-formatted nodes.
+    The text is scanned once, left to right. At each position where a span can
+    open (``**``, ``_``, `` ` ``, ``![`` or ``[``) the span is either consumed
+    whole or, for images and links that don't complete, kept as plain text.
+    Plain text between spans is only sliced out when a span is emitted, so the
+    whole conversion is linear in the length of the text.
     
     Args:
         text: String containing markdown formatting
@@ -122,20 +134,53 @@ def text_to_textnodes(text: str) -> List[TextNode]:
     Returns:
         List of TextNodes representing the parsed markdown
         
+    Raises:
+        ValueError: If a delimiter is unmatched or encloses no text
+        
     Examples:
         text_to_textnodes("**bold** and _italic_") -> 
         [TextNode("bold", BOLD), TextNode(" and ", TEXT), TextNode("italic", ITALIC)]
     """
-    # Start with a single TEXT node and progressively split it
-    nodes = [TextNode(text, TextType.TEXT)]
-    
-    # Process in order: bold, italic, code, links, images
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_link(nodes)
-    nodes = split_nodes_image(nodes)
+    nodes = []
+    text_start = 0  # Start of the plain text not yet emitted
+    pos = 0
+    search = INLINE_TOKEN_PATTERN.search
+    
+    while True:
+        match = search(text, pos)
+        if match is None:
+            break
+        token = match.group()
+        start = match.start()
+        
+        text_type = _DELIMITER_TYPES.get(token)
+        if text_type is not None:
+            close = text.find(token, match.end())
+            if close == -1 or close == match.end():
+                raise ValueError("Invalid Markdown: unmatched or empty delimiters")
+            if start > text_start:
+                nodes.append(TextNode(text[text_start:start], TextType.TEXT))
+            nodes.append(TextNode(text[match.end():close], text_type))
+            pos = text_start = close + len(token)
+            continue
+        
+        if token == "![":
+            span = IMAGE_PATTERN.match(text, start)
+            node_type = TextType.IMAGE
+        else:
+            span = LINK_PATTERN.match(text, start)
+            node_type = TextType.LINK
+        if span is None:
+            # Not a complete image/link, the bracket is just text
+            pos = start + 1
+            continue
+        if start > text_start:
+            nodes.append(TextNode(text[text_start:start], TextType.TEXT))
+        nodes.append(TextNode(span.group(1), node_type, span.group(2)))
+        pos = text_start = span.end()
     
+    if text_start < len(text) or not nodes:
+        nodes.append(TextNode(text[text_start:], TextType.TEXT))
     return nodes
 
 
@@ -157,6 +202,20 @@ def text_node_to_html_node(text_node: TextNode) -> LeafNode:
         text_node_to_html_node(TextNode("text", TextType.BOLD)) -> LeafNode("b", "text")
         text_node_to_html_node(TextNode("link", TextType.LINK, "url")) -> LeafNode("a", "link", {"href": "url"})
     """
+    tag, text, props = text_node_to_leaf_parts(text_node)
+    return LeafNode(tag, text, props)
+
+
+def text_node_to_leaf_parts(text_node: TextNode) -> Tuple[Optional[str], str, Optional[Dict[str, str]]]:
+    """
+    Return the (tag, value, props) of the leaf a TextNode renders as.
+    
+    Shared by text_node_to_html_node and renderers that don't build LeafNodes.
+    
+    Raises:
+        ValueError: If text_node is not a TextNode instance
+        ValueError: If text_node has an unsupported text_type
+    """
     if not isinstance(text_node, TextNode):
         raise ValueError(f"Expected TextNode, got {type(text_node)}")
     
@@ -166,21 +225,21 @@ def text_node_to_html_node(text_node: TextNode) -> LeafNode:
     
     match text_type_name:
         case "TEXT":
-            return LeafNode(None, text)
+            return None, text, None
         case "BOLD":
-            return LeafNode("b", text)
+            return "b", text, None
         case "ITALIC":
-            return LeafNode("i", text)
+            return "i", text, None
         case "CODE":
-            return LeafNode("code", text)
+            return "code", text, None
         case "LINK":
             if url is None:
                 raise ValueError("LINK TextNode requires a URL")
-            return LeafNode("a", text, {"href": url})
+            return "a", text, {"href": url}
         case "IMAGE":
             if url is None:
                 raise ValueError("IMAGE TextNode requires a URL")
-            return LeafNode("img", text, {"src": url})
+            return "img", text, {"src": url}
         case _:
             raise ValueError(f"Unsupported text type: {text_type_name}")
 
@@ -286,54 +345,39 @@ def _split_text_by_image_or_link(text: str, node_type: TextType) -> List[TextNod
     """
     Split a single text string by image or link markdown syntax.
     
+    Walks the matches by index instead of recursing on the remaining text, so
+    any number of images/links is handled without copying the tail each time.
+    
     Args:
         text: Text to split
         node_type: Either TextType.IMAGE or TextType.LINK
         
     Returns:
-        List of TextNodes with the first found image/link converted
+        List of TextNodes with every image/link converted
         
     Raises:
         ValueError: If node_type is not IMAGE or LINK
     """
-    # Extract images or links based on node type
     if node_type == TextType.IMAGE:
-        extracts = extract_markdown_images(text)
+        pattern = IMAGE_PATTERN
     elif node_type == TextType.LINK:
-        extracts = extract_markdown_links(text)
+        pattern = LINK_PATTERN
     else:
         raise ValueError("Can only extract images or links")
     
-    # If no images/links found, return original text as TEXT node
-    if not extracts:
-        return [TextNode(text, TextType.TEXT)]
-    
-    # Process the first found image/link
-    extract_text, url = extracts[0]
-    prefix = "!" if node_type == TextType.IMAGE else ""
-    markdown_syntax = f"{prefix}[{extract_text}]({url})"
-    
-    # Find the position of the markdown syntax
-    start_pos = text.find(markdown_syntax)
-    end_pos = start_pos + len(markdown_syntax)
-
-    # Split the text into before, during, and after
-    before_text = text[:start_pos]
-    after_text = text[end_pos:]
-    
     result = []
-    
-    # Add before text if it exists
-    if before_text:
-        result.append(TextNode(before_text, TextType.TEXT))
-    
-    # Add the image/link node
-    result.append(TextNode(extract_text, node_type, url))
-
-    # Recursively process remaining text
-    if after_text:
-        result.extend(_split_text_by_image_or_link(after_text, node_type))
-
+    pos = 0
+    for match in pattern.finditer(text):
+        start = match.start()
+        # Add the text before this image/link if it exists
+        if start > pos:
+            result.append(TextNode(text[pos:start], TextType.TEXT))
+        result.append(TextNode(match.group(1), node_type, match.group(2)))
+        pos = match.end()
+    
+    # Add whatever follows the last match, or the original text if none matched
+    if pos < len(text) or not result:
+        result.append(TextNode(text[pos:], TextType.TEXT))
     return result
 
 
@@ -345,6 +389,10 @@ def _split_text_by_delimiter(
     """
     Split a single text string by delimiter and return list of TextNodes.
     
+    Scans forward by index instead of recursing on the remaining text, so a
+    paragraph with thousands of delimited spans neither hits the recursion
+    limit nor copies its tail once per span.
+    
     Args:
         text: Text to split
         delimiter: Delimiter to split by
@@ -357,33 +405,28 @@ def _split_text_by_delimiter(
         ValueError: If invalid Markdown syntax (unmatched delimiters)
     """
     delimiter_length = len(delimiter)
-    start_pos = text.find(delimiter)
-    
-    # If no delimiter found, return original text
-    if start_pos == -1:
-        return [TextNode(text, TextType.TEXT)]
-    
-    # Find closing delimiter
-    end_pos = text.find(delimiter, start_pos + delimiter_length)
-    if end_pos == -1 or (end_pos - start_pos == delimiter_length):
-        raise ValueError("Invalid Markdown: unmatched or empty delimiters")
-    
-    # Split text into parts
-    before_text = text[:start_pos]
-    between_text = text[start_pos + delimiter_length:end_pos]
-    after_text = text[end_pos + delimiter_length:]
-    
     result = []
+    pos = 0
     
-    # Add before text if it exists
-    if before_text:
-        result.append(TextNode(before_text, TextType.TEXT))
-    
-    # Add the formatted text
-    result.append(TextNode(between_text, text_type))
-    
-    # Recursively process remaining text
-    if after_text:
-        result.extend(_split_text_by_delimiter(after_text, delimiter, text_type))
+    while True:
+        start_pos = text.find(delimiter, pos)
+        if start_pos == -1:
+            break
+        
+        # Find closing delimiter
+        end_pos = text.find(delimiter, start_pos + delimiter_length)
+        if end_pos == -1 or (end_pos - start_pos == delimiter_length):
+            raise ValueError("Invalid Markdown: unmatched or empty delimiters")
+        
+        # Add before text if it exists
+        if start_pos > pos:
+            result.append(TextNode(text[pos:start_pos], TextType.TEXT))
+        
+        # Add the formatted text
+        result.append(TextNode(text[start_pos + delimiter_length:end_pos], text_type))
+        pos = end_pos + delimiter_length
     
+    # Add the remaining text, or the original text if no delimiter was found
+    if pos < len(text) or not result:
+        result.append(TextNode(text[pos:], TextType.TEXT))
     return result
@@ -0,0 +1,504 @@
+"""
+Watch mode: rebuild only what changed while the sources are being edited.
+
+A Watcher reports paths that changed under a set of directories. On Linux
+that comes straight from inotify (through ctypes, so there is nothing to
+install); anywhere else, or if inotify can't be set up, a PollingWatcher
+compares stat snapshots instead.
+
+watch() does one regular build and then waits for changes. A burst of
+events (an editor writing a temp file and renaming it, a `git checkout`) is
+debounced into one batch, and the batch is applied incrementally:
+
+- a changed or new page under content is re-rendered on its own, and only
+  the blocks of it that changed are parsed again (see BlockCache)
+- a deleted page has its HTML removed, and so does a page turned into a draft
+- any change under static runs an incremental sync, which copies only the
+  assets whose size or mtime moved
+- a change to a watched root itself (inotify queue overflow, the directory
+  being replaced) falls back to a full build
+- an edited template re-wraps every page; the pages themselves come out of
+  the render cache, so that is a join and a write per page
+
+The template usually sits next to content rather than inside a watched
+directory, so instead of watching its whole directory the loop compares its
+mtime and size each time it wakes up.
+
+A dest published from generations (see publish.py) gets one new generation
+for the session: the first build is staged and swapped in like a regular
+build, and later batches update that generation in place, so a batch costs
+what it changes rather than a clone of the whole site. Pages are written to
+a temporary file and renamed and assets are unlinked before they are
+published, so files the generation shares with older ones through its
+hardlinked seed are replaced, never modified, and older generations stay as
+they were.
+"""
+
+import abc
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from contextlib import nullcontext
+from typing import ContextManager, Dict, Iterable, List, Optional, Set, Tuple
+
+from build import HTML_EXTENSION, MARKDOWN_EXTENSION, build_site, render_page
+from frontmatter import read_page_metadata
+from links import LinkGraph
+from log import NOTICE, count, fields, flush, logger, trace
+from markdown import BlockCache
+from make_public import DEFAULT_WORKERS, MANIFEST_PATH, distribute, scan_tree
+from metadata import MetadataIndex
+from publish import DEFAULT_KEEP, current_generation, staged
+from render_cache import RenderCache
+from template import template_version
+
+# Quiet period that ends a burst of changes
+DEFAULT_DEBOUNCE = 0.02
+# How often the polling fallback rescans
+DEFAULT_POLL_INTERVAL = 0.5
+# How often a blocked watch loop checks whether it was asked to stop
+STOP_CHECK_INTERVAL = 0.25
+
+# inotify(7) event bits
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+
+class Watcher(abc.ABC):
+    """
+    Reports changed paths under a set of root directories.
+
+    Attributes:
+        roots: Absolute paths of the watched directories
+    """
+
+    def __init__(self, roots: Iterable[str]) -> None:
+        self.roots = [os.path.abspath(root) for root in roots]
+
+    @abc.abstractmethod
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Block until something changes or timeout seconds pass.
+
+        Returns:
+            Absolute paths that changed; a root in the set means anything
+            under it may have changed. Empty if the timeout expired.
+        """
+
+    def close(self) -> None:
+        """Release whatever the watcher holds."""
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class InotifyWatcher(Watcher):
+    """
+    Watcher backed by Linux inotify, with one watch per directory.
+
+    Directories created later are picked up as their IN_CREATE events arrive.
+
+    Raises:
+        OSError: If inotify isn't available or the watches can't be added
+    """
+
+    def __init__(self, roots: Iterable[str]) -> None:
+        super().__init__(roots)
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self._dirs: Dict[int, str] = {}
+        try:
+            for root in self.roots:
+                if os.path.isdir(root):
+                    self._add_tree(root)
+        except OSError:
+            self.close()
+            raise
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed: Set[str] = set()
+        while True:
+            try:
+                data = os.read(self._fd, _READ_SIZE)
+            except BlockingIOError:
+                break
+            self._parse(data, changed)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _add_tree(self, top: str) -> List[str]:
+        """Watch top and every directory below it, returning the files found."""
+        files = []
+        for root, _, file_names in os.walk(top):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                raise OSError(error, os.strerror(error), root)
+            self._dirs[wd] = root
+            files.extend(os.path.join(root, name) for name in file_names)
+        return files
+
+    def _parse(self, data: bytes, changed: Set[str]) -> None:
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, so nothing short of a rescan is safe
+                changed.update(self.roots)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]
+                continue
+            path = os.path.join(directory, name) if name else directory
+            changed.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                # Files can land in a new directory before its watch exists
+                try:
+                    changed.update(self._add_tree(path))
+                except OSError:
+                    pass
+
+
+class PollingWatcher(Watcher):
+    """Watcher that rescans the roots every interval seconds and diffs their stats."""
+
+    def __init__(self, roots: Iterable[str], interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        super().__init__(roots)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, deadline - time.monotonic())
+                if delay <= 0:
+                    return set()
+            time.sleep(delay)
+            snapshot = self._scan()
+            changed = {
+                path for path in snapshot.keys() | self._snapshot.keys()
+                if snapshot.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+    def _scan(self) -> Dict[str, Tuple[int, int, int]]:
+        snapshot = {}
+        for top in self.roots:
+            if not os.path.isdir(top):
+                continue
+            _, files = scan_tree(top)
+            for rel, entry in files.items():
+                snapshot[os.path.join(top, rel)] = (entry.size, entry.mtime_ns, entry.inode)
+        return snapshot
+
+
+def open_watcher(roots: Iterable[str], poll_interval: Optional[float] = None) -> Watcher:
+    """
+    Return an inotify watcher for roots, or a polling one if inotify is unavailable.
+
+    Args:
+        roots: Directories to watch
+        poll_interval: Always poll, every this many seconds
+    """
+    roots = list(roots)
+    if poll_interval is None:
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as error:
+            logger.warning("inotify unavailable, polling for changes", extra=fields(error=error))
+    return PollingWatcher(roots, poll_interval or DEFAULT_POLL_INTERVAL)
+
+
+def collect_changes(watcher: Watcher, timeout: Optional[float], debounce: float = DEFAULT_DEBOUNCE) -> Set[str]:
+    """Wait up to timeout for a change, then keep collecting until debounce seconds pass quietly."""
+    changed = watcher.wait(timeout)
+    while changed:
+        more = watcher.wait(debounce)
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+def rebuild(
+    changed: Set[str],
+    content_dir: str,
+    static_dir: str,
+    dest_dir: str,
+    cache: Optional[RenderCache] = None,
+    strategy: str = "copy",
+    manifest_path: str = MANIFEST_PATH,
+    template: Optional[str] = None,
+    index: Optional[MetadataIndex] = None,
+    block_cache: Optional[BlockCache] = None,
+    workers: Optional[int] = None,
+    copy_workers: int = DEFAULT_WORKERS,
+    scan_workers: int = 1,
+    links: Optional[LinkGraph] = None
+) -> Dict[str, int]:
+    """
+    Bring dest_dir up to date after the given source paths changed.
+
+    Args:
+        changed: Absolute paths reported by a Watcher
+        content_dir: Markdown source directory
+        static_dir: Static asset directory
+        dest_dir: Output directory
+        cache: Render cache to keep up to date, if any
+        strategy: How static assets are published
+        manifest_path: Manifest used by the incremental static sync
+        template: Path of the template pages are wrapped in, if any
+        index: Metadata index to keep up to date, if any
+        block_cache: Blocks of earlier renders to reuse for changed pages, if any
+        workers: Rendering processes for a full rebuild, defaults to the CPU count
+        copy_workers: Threads copying assets
+        scan_workers: Threads walking the static directory
+        links: Link graph to keep up to date, if any; a page that fails to
+            render keeps the links of its last good version
+
+    Returns:
+        Counts of pages rendered, removed and failed, and of assets copied and removed
+    """
+    content_root = os.path.abspath(content_dir)
+    static_root = os.path.abspath(static_dir)
+    stats = {"rendered": 0, "deleted": 0, "copied": 0, "removed": 0, "failed": 0}
+
+    if any(_is_within(path, static_root) for path in changed):
+        synced = distribute(
+            static_dir, dest_dir, incremental=True, manifest_path=manifest_path, workers=copy_workers,
+            strategy=strategy, scan_workers=scan_workers,
+        )
+        if synced is not None:
+            stats["copied"], stats["removed"] = synced["copied"], synced["removed"]
+
+    if content_root in changed or (template is not None and os.path.abspath(template) in changed):
+        if links is not None:
+            # Every page is about to be recorded again, and only pages that still exist will be
+            links.pages.clear()
+        stats["rendered"] = build_site(
+            content_dir, dest_dir, workers=workers, cache=cache, template=template, index=index, links=links
+        )["pages"]
+        return stats
+
+    for path in sorted(changed):
+        if not _is_within(path, content_root) or path == content_root:
+            continue
+        rel = os.path.relpath(path, content_root)
+        stem, extension = os.path.splitext(rel)
+        dest_path = os.path.join(dest_dir, stem + HTML_EXTENSION)
+        # The page's key in the link graph, as build_site records it
+        page = (stem + HTML_EXTENSION).replace(os.sep, "/")
+        if extension != MARKDOWN_EXTENSION:
+            if not os.path.exists(path):
+                # A directory moved or deleted wholesale takes its pages with it
+                stats["deleted"] += _remove_pages(os.path.join(dest_dir, rel), path, os.path.join(static_dir, rel))
+                if index is not None:
+                    index.discard(path)
+                if links is not None:
+                    links.discard(rel.replace(os.sep, "/"))
+            continue
+        if os.path.isfile(path):
+            try:
+                metadata = index.get(path) if index is not None else read_page_metadata(path)
+                if not metadata.get("draft"):
+                    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                    found: Optional[List[Tuple[str, str]]] = [] if links is not None else None
+                    render_page((path, dest_path), cache, template, links=found, block_cache=block_cache)
+                    if links is not None:
+                        links.add(page, found)
+                    stats["rendered"] += 1
+                    trace("Rendered %s -> %s", path, dest_path)
+                    continue
+            except (ValueError, OSError) as error:
+                # Pages are saved half-typed all the time; keep the last good
+                # version and try again on the next save
+                logger.error("Can't render %s: %s", path, error)
+                count("pages_failed")
+                stats["failed"] += 1
+                continue
+        elif os.path.exists(path):
+            continue
+        elif index is not None:
+            index.discard(path)
+        # Deleted, or turned into a draft
+        if links is not None:
+            links.discard(page)
+        try:
+            os.remove(dest_path)
+            stats["deleted"] += 1
+            trace("Removed %s", dest_path)
+        except FileNotFoundError:
+            pass
+    if index is not None:
+        index.save()
+    return stats
+
+
+def watch(
+    content_dir: str,
+    static_dir: str,
+    dest_dir: str,
+    cache: Optional[RenderCache] = None,
+    strategy: str = "copy",
+    debounce: float = DEFAULT_DEBOUNCE,
+    poll_interval: Optional[float] = None,
+    manifest_path: str = MANIFEST_PATH,
+    template: Optional[str] = None,
+    index: Optional[MetadataIndex] = None,
+    stop: Optional[threading.Event] = None,
+    keep: int = DEFAULT_KEEP,
+    workers: Optional[int] = None,
+    copy_workers: int = DEFAULT_WORKERS,
+    scan_workers: int = 1,
+    links_path: Optional[str] = None
+) -> None:
+    """
+    Build once, then rebuild whatever changes until interrupted or stop is set.
+
+    Args:
+        content_dir: Markdown source directory
+        static_dir: Static asset directory
+        dest_dir: Output directory
+        cache: Render cache shared with regular builds, if any
+        strategy: How static assets are published
+        debounce: Quiet period in seconds that ends a burst of changes
+        poll_interval: Poll every this many seconds instead of using inotify
+        manifest_path: Manifest used by the incremental static sync
+        template: Path of the template pages are wrapped in, if any
+        index: Metadata index shared with regular builds, if any
+        stop: Event that ends the loop when set
+        keep: Previous generations kept when dest is published from generations
+        workers: Rendering processes for full builds, defaults to the CPU count
+        copy_workers: Threads copying assets
+        scan_workers: Threads walking the static directory
+        links_path: Where to keep the link graph of the pages (see links.py)
+            up to date after every batch, if anywhere
+    """
+    graph = LinkGraph() if links_path is not None else None
+    # Only the session's first build goes through staging, see the module docstring
+    if current_generation(dest_dir) is not None:
+        output: ContextManager[str] = staged(dest_dir, keep=keep)
+    else:
+        output = nullcontext(dest_dir)
+
+    with open_watcher([content_dir, static_dir], poll_interval) as watcher:
+        with output as out_dir:
+            distribute(
+                static_dir, out_dir, incremental=True, manifest_path=manifest_path, workers=copy_workers,
+                strategy=strategy, scan_workers=scan_workers, manifest_dest=dest_dir,
+            )
+            build_site(content_dir, out_dir, workers=workers, cache=cache, template=template, index=index, links=graph)
+        if graph is not None:
+            graph.save(links_path)
+        logger.log(NOTICE, "Watching %s and %s for changes", content_dir, static_dir)
+        flush()
+        layout = template_version(template)
+        block_cache = BlockCache()
+        while stop is None or not stop.is_set():
+            changed = collect_changes(watcher, STOP_CHECK_INTERVAL, debounce)
+            version = template_version(template)
+            if version != layout:
+                layout = version
+                if version is None:
+                    logger.warning("Template %s is gone, keeping pages as they are", template)
+                else:
+                    changed.add(os.path.abspath(template))
+            if not changed:
+                continue
+            start = time.perf_counter()
+            try:
+                stats = rebuild(
+                    changed, content_dir, static_dir, dest_dir, cache, strategy, manifest_path, template, index,
+                    block_cache, workers, copy_workers, scan_workers, graph,
+                )
+                if graph is not None:
+                    graph.save(links_path)
+            except (ValueError, OSError) as error:
+                # A full rebuild stops at the first bad page; the next save retries it
+                logger.error("Rebuild failed: %s", error)
+                count("rebuilds_failed")
+                flush()
+                continue
+            count("rebuilds")
+            logger.log(
+                NOTICE, "Rebuilt in %.0f ms", (time.perf_counter() - start) * 1000,
+                extra=fields(changed=len(changed), **stats),
+            )
+            # Nobody wants to wait for the buffer to fill up to see the rebuild
+            flush()
+
+
+def _load_libc() -> ctypes.CDLL:
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+def _is_within(path: str, root: str) -> bool:
+    return path == root or path.startswith(root + os.sep)
+
+
+def _remove_pages(dest_subdir: str, content_subdir: str, static_subdir: str) -> int:
+    """Remove pages under dest_subdir whose markdown is gone, sparing files that came from static."""
+    removed = 0
+    for root, _, file_names in os.walk(dest_subdir):
+        rel_root = os.path.relpath(root, dest_subdir)
+        for name in file_names:
+            stem, extension = os.path.splitext(name)
+            if extension != HTML_EXTENSION:
+                continue
+            if os.path.exists(os.path.join(content_subdir, rel_root, stem + MARKDOWN_EXTENSION)):
+                continue
+            if os.path.exists(os.path.join(static_subdir, rel_root, name)):
+                continue
+            os.remove(os.path.join(root, name))
+            removed += 1
+    return removed
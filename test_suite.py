@@ -12,6 +12,19 @@ from test_htmlnode import TestHTMLNode
 from test_textnode import *
 from test_parentnode import TestParentNode
 from test_markdown import *
+from test_make_public import *
+from test_build import *
+from test_render_cache import *
+from test_flatdoc import *
+from test_profiling import *
+from test_log import *
+from test_watch import *
+from test_devserver import *
+from test_publish import *
+from test_template import *
+from test_frontmatter import *
+from test_metadata import *
+from test_links import *
 
 def create_test_suite():
     """Create a test suite with the specific tests you want to run."""
@@ -34,6 +47,24 @@ def create_test_suite():
         TestMarkdownToBlocks,
         TestBlockToBlockType,
         TestMarkdownToHtmlNode,
+        TestBlockCache,
+        TestInlineCache,
+        TestDistribute,
+        TestPublishStrategies,
+        TestSync,
+        TestScanTree,
+        TestBuildSite,
+        TestRenderCache,
+        TestFlatDocument,
+        TestProfiling,
+        TestLog,
+        TestWatch,
+        TestDevServer,
+        TestPublish,
+        TestTemplate,
+        TestFrontMatter,
+        TestMetadataIndex,
+        TestLinks,
     ]
     
     # Add all test classes to the suite